@@ -1,10 +1,25 @@
 # backend/app/api/schedule.py
 from fastapi import APIRouter
+from fastapi import Request as HTTPRequest  # scheduler.Request 와 이름이 겹친다
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal, Optional
+from collections import OrderedDict
+from dataclasses import replace
+import uuid
+import json
+import threading
+import asyncio
 import pandas as pd
 from pathlib import Path
-from app.core.scheduler import greedy_schedule  # 네가 만든 그리디 로직
+# main 이 backend.* 로 띄우므로 상대 import (app.* 로 따로 import 하면 jobs/캐시 싱글턴이 두 벌이 된다)
+from ..core.scheduler import greedy_schedule  # 그리디: 즉시 미리보기 + CP-SAT 힌트
+from ..core.scheduler import (
+    resolve, problem_from_rows, check_request, Instructor, Grid, Hard, Soft, Request
+)
+from ..core.jobs import jobs
+from ..core.solve_cache import cached_solve
+from ..core.availability import room_availability
 
 router = APIRouter()
 
@@ -14,10 +29,12 @@ def load_courses():
     if not CSV.exists():
         return [{"code":"AI101","name":"인공지능 기초","professor":"홍길동","day":"MON","time":"09:00~10:50","room":"A101"}]
     df = pd.read_csv(CSV, encoding="utf-8")
-    ren = {"코드":"code","과목코드":"code","과목명":"name","담당교수":"professor","교수":"professor","요일":"day","시간":"time","강의실":"room"}
+    ren = {"코드":"code","과목코드":"code","교과목코드":"code","과목명":"name","교과목명":"name",
+           "담당교수":"professor","교수":"professor","강좌담당교수":"professor","개설학과":"dept","요일":"day","시간":"time","강의실":"room",
+           "수강인원":"size","교과목학점":"credits","강의유형구분":"kind"}
     for k,v in ren.items():
         if k in df.columns and v not in df.columns: df[v]=df[k]
-    need=["code","name","professor","day","time","room"]
+    need=["code","name","professor","dept","day","time","room","size","credits","kind"]
     for c in need:
         if c not in df.columns: df[c]=""
     df["day"]=df["day"].astype(str).str.upper().str[:3]
@@ -31,9 +48,165 @@ class ScheduleIn(BaseModel):
     compactSameDay: bool = False
     priorityWeight: int = 1
     natural: str = ""
+    noFridayEvening: bool = False
+    engine: Literal["dense", "interval", "decomposed"] = "interval"   # 그 밖의 값은 422
+    timeLimit: float = 10.0
+    workers: int = 0               # 0 = CPU 개수
+    seed: Optional[int] = None     # 지정하면 같은 입력에 같은 결과
+    alternatives: int = 1          # 돌려받을 서로 다른 시간표 개수
+
+class MoveIn(BaseModel):
+    course_id: str
+    session_index: int = 0
+    day: str
+    block: int
+    room_id: Optional[str] = None   # 생략하면 원래 강의실 유지
+
+class UnavailableIn(BaseModel):
+    instructor_id: str
+    day: str
+    block: int
+
+class ScheduleDelta(BaseModel):
+    moves: List[MoveIn] = []
+    unavailable: List[UnavailableIn] = []
+    removeCourses: List[str] = []
+    mode: Literal["fix", "penalize"] = "fix"   # fix: 안 건드린 세션 고정 / penalize: 변경 벌점만
+    timeLimit: float = 1.0
+
+# ---------- 배정 결과 보관 (증분 재배정의 기준) ----------
+MAX_SCHEDULES = 64
+_SCHEDULES: "OrderedDict[str, dict]" = OrderedDict()
+# 비동기 작업의 on_done 은 JobManager 수집 스레드에서 불리므로 요청 스레드와 같이 건드린다
+_SCHEDULES_LOCK = threading.Lock()
+
+def _remember(courses, rooms, instructors, request, assignments, current: bool = True):
+    # current: 이 배정을 /v1/rooms 가 보는 강의실 가용성으로 (대안 해는 첫 번째만)
+    if current:
+        room_availability.publish(rooms, request.grid, assignments)
+    sid = uuid.uuid4().hex[:12]
+    with _SCHEDULES_LOCK:
+        _SCHEDULES[sid] = {"courses": courses, "rooms": rooms, "instructors": instructors,
+                           "request": request, "assignments": assignments}
+        while len(_SCHEDULES) > MAX_SCHEDULES:
+            _SCHEDULES.popitem(last=False)
+    return sid
+
+def _request_of(req: ScheduleIn) -> Request:
+    return Request(
+        grid=Grid(days=[d.upper() for d in req.days], blocks_per_day=req.periodsPerDay, block_minutes=req.blockMinutes),
+        hard=Hard(no_friday_evening=req.noFridayEvening),
+        soft=Soft(prefer_morning=req.preferMorning, weight=req.priorityWeight),
+        engine=req.engine,
+        time_limit=req.timeLimit,
+        workers=req.workers,
+        seed=req.seed,
+        randomize=req.seed is None,
+        pool_size=max(1, min(req.alternatives, 10)),
+        warm_start=True,
+    )
 
 @router.post("/schedule")
 def schedule(req: ScheduleIn):
     items = load_courses()
     sched = greedy_schedule(items, req.days, req.periodsPerDay, req.preferMorning)
-    return {"message":"배정 완료(그리디)","options":req.model_dump(),"schedule":sched}
+    courses, rooms, instructors = problem_from_rows(items)
+    sid = _remember(courses, rooms, instructors, _request_of(req), sched)
+    return {"message":"배정 완료(그리디)","schedule_id":sid,"options":req.model_dump(),"schedule":sched}
+
+@router.post("/schedule/optimize")
+def schedule_optimize(req: ScheduleIn):
+    items = load_courses()
+    courses, rooms, instructors = problem_from_rows(items)
+    request = _request_of(req)
+    try:
+        check_request(request)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
+    res, hit = cached_solve(courses, rooms, instructors, request)
+    alts = res.get("pool") or ([{"objective": res.get("objective"), "assignments": res["assignments"]}]
+                               if res["assignments"] else [])
+    alternatives = [{"schedule_id": _remember(courses, rooms, instructors, request, a["assignments"], current=i == 0),
+                     "objective": a["objective"], "schedule": a["assignments"]} for i, a in enumerate(alts)]
+    # 요청한 개수보다 적으면 그대로 알려 준다 (같은 품질의 해가 더 없거나 시간 안에 못 찾음)
+    return {"message":"배정 완료(CP-SAT)","status":res["status"],"cached":hit,"stats":res["stats"],
+            "options":req.model_dump(),"alternatives":alternatives,
+            "alternatives_requested":req.alternatives,"alternatives_found":len(alternatives)}
+
+# ---------- 비동기 작업 (POST 즉시 반환 + SSE 진행 상황) ----------
+@router.post("/schedule/jobs")
+def schedule_job_submit(req: ScheduleIn):
+    items = load_courses()
+    courses, rooms, instructors = problem_from_rows(items)
+    request = _request_of(req)
+    try:
+        check_request(request)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
+
+    def on_done(res):
+        summary = {"courses": len(courses), "rooms": len(rooms), "instructors": len(instructors),
+                   "days": request.grid.days, "blocks_per_day": request.grid.blocks_per_day,
+                   "block_minutes": request.grid.block_minutes}
+        return {"schedule_id": _remember(courses, rooms, instructors, request, res["assignments"]), "summary": summary}
+
+    job = jobs.submit(courses, rooms, instructors, request, on_done=on_done)
+    return {"job_id": job["id"], "status": job["status"], "cached": job["cached"]}
+
+@router.get("/schedule/jobs/{job_id}")
+def schedule_job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": f"job_id 없음: {job_id}"})
+    return jobs.snapshot(job)
+
+@router.get("/schedule/jobs/{job_id}/events")
+async def schedule_job_events(job_id: str, request: HTTPRequest):
+    job = jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": f"job_id 없음: {job_id}"})
+
+    async def stream():
+        # 클라이언트가 끊으면 폴링을 멈춘다 (탭을 닫아도 작업이 끝날 때까지 도는 일이 없도록)
+        sent = 0
+        while not await request.is_disconnected():
+            events = job["events"]
+            while sent < len(events):
+                ev = events[sent]
+                sent += 1
+                yield f"event: {ev['event']}\ndata: {json.dumps(ev['data'], ensure_ascii=False)}\n\n"
+                if ev["event"] in ("done", "error"):
+                    return
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.post("/schedule/{schedule_id}/delta")
+def schedule_delta(schedule_id: str, delta: ScheduleDelta):
+    with _SCHEDULES_LOCK:
+        base = _SCHEDULES.get(schedule_id)
+    if base is None:
+        return JSONResponse(status_code=404, content={"detail": f"schedule_id 없음: {schedule_id}"})
+
+    removed = set(delta.removeCourses)
+    courses = [c for c in base["courses"] if c.id not in removed]
+    extra = {}
+    for u in delta.unavailable:
+        extra.setdefault(u.instructor_id, []).append((u.day.upper(), u.block))
+    instructors = [Instructor(i.id, i.name, (i.unavailable or []) + extra.get(i.id, [])) for i in base["instructors"]]
+
+    prev_room = {(a["course_id"], a["session_index"]): a["room_id"] for a in base["assignments"]}
+    pins = [{"course_id": m.course_id, "session_index": m.session_index, "day": m.day.upper(), "block": m.block,
+             "room_id": m.room_id or prev_room.get((m.course_id, m.session_index))}
+            for m in delta.moves]
+
+    request = replace(base["request"], time_limit=delta.timeLimit)
+    try:
+        res = resolve(courses, base["rooms"], instructors, request, base["assignments"], pins, mode=delta.mode)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
+    sid = _remember(courses, base["rooms"], instructors, base["request"], res["assignments"])
+    return {"message":"재배정 완료(증분)","schedule_id":sid,"base_id":schedule_id,
+            "status":res["status"],"mode":res["mode"],"changed":res["changed"],
+            "stats":res["stats"],"schedule":res["assignments"]}
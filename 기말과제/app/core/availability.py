@@ -0,0 +1,204 @@
+# 강의실 가용성 엔진 (솔버 그리디와 /v1/rooms 가 같이 쓴다)
+# 방을 정원 오름차순으로 세워 비트 i = i번째 방으로 두고
+#  - 전역 블록 t(= 요일 순번 × 하루 교시 수 + 교시 - 1)마다 "쓰이는 방" 비트마스크를 구간 OR 세그먼트 트리에 보관
+#    → "t 부터 K 블록 동안 쓰이는 방" = 구간 OR 한 번 (O(log T)), 배치/해제도 블록마다 O(log T)
+#  - 정원 ≥ N 인 방 = 정원 정렬에서 이분 탐색한 위치부터의 비트 (O(log R)), 태그별 방 = 미리 만든 마스크
+# 빈 방 = 후보 마스크 & ~구간 OR. 가장 작은 비트 = 들어가는 방 중 가장 작은 방(best fit).
+# 솔버의 세 엔진은 다른 곳에서 이미 쓰는 방(Request.occupied)과 정원/태그 후보를 모두 이 구조로 판단한다.
+import bisect
+import datetime
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+DAY_START = os.getenv("ROOM_DAY_START", "09:00")   # 1교시 시작 (실제 시각 ↔ 교시 변환)
+WEEKDAYS = ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"]
+
+def _day_start_minutes() -> int:
+    h, m = (int(x) for x in DAY_START.split(":"))
+    return h * 60 + m
+
+class _OrTree:
+    # 구간 OR 세그먼트 트리 (잎 = 블록별 방 비트마스크)
+    def __init__(self, n: int):
+        self.size = 1 << max(1, (max(n, 1) - 1).bit_length())
+        self.t = [0] * (2 * self.size)
+
+    def get(self, i: int) -> int:
+        return self.t[i + self.size]
+
+    def set(self, i: int, v: int):
+        i += self.size
+        self.t[i] = v
+        i >>= 1
+        while i:
+            self.t[i] = self.t[2 * i] | self.t[2 * i + 1]
+            i >>= 1
+
+    def query(self, lo: int, hi: int) -> int:
+        # [lo, hi) 의 OR
+        t, res = self.t, 0
+        lo += self.size
+        hi += self.size
+        while lo < hi:
+            if lo & 1:
+                res |= t[lo]
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                res |= t[hi]
+            lo >>= 1
+            hi >>= 1
+        return res
+
+class RoomAvailability:
+    def __init__(self, rooms: List, grid):
+        self.grid = grid
+        self.rooms = sorted(rooms, key=lambda r: r.capacity)
+        self.caps = [r.capacity for r in self.rooms]
+        self.index = {r.id: i for i, r in enumerate(self.rooms)}
+        self.all = (1 << len(self.rooms)) - 1
+        self.tags: Dict[str, int] = {}
+        for i, r in enumerate(self.rooms):
+            for tag in r.tags or []:
+                self.tags[tag] = self.tags.get(tag, 0) | (1 << i)
+        self.T = grid.blocks_per_day
+        self.tree = _OrTree(len(grid.days) * self.T)
+
+    @classmethod
+    def from_assignments(cls, rooms: List, grid, assignments: Iterable[dict]) -> "RoomAvailability":
+        av = cls(rooms, grid)
+        for a in assignments:
+            if a.get("room_id") in av.index and a.get("day") in grid.days:
+                av.occupy(a["room_id"], a["day"], a["block"], a.get("duration_blocks", 1))
+        return av
+
+    # ---------- 시간축 ----------
+    def t_of(self, day: str, block: int) -> int:
+        return self.grid.days.index(day) * self.T + block - 1
+
+    def _span(self, t: int, duration: int):
+        # 하루를 넘기지 않게 자른다
+        day_end = (t // self.T + 1) * self.T
+        return t, min(t + max(duration, 1), day_end)
+
+    # ---------- 배치 ----------
+    def occupy_t(self, idx: int, t: int, duration: int = 1):
+        lo, hi = self._span(t, duration)
+        for k in range(lo, hi):
+            self.tree.set(k, self.tree.get(k) | (1 << idx))
+
+    def release_t(self, idx: int, t: int, duration: int = 1):
+        lo, hi = self._span(t, duration)
+        for k in range(lo, hi):
+            self.tree.set(k, self.tree.get(k) & ~(1 << idx))
+
+    def occupy(self, room_id: str, day: str, block: int, duration: int = 1):
+        self.occupy_t(self.index[room_id], self.t_of(day, block), duration)
+
+    def release(self, room_id: str, day: str, block: int, duration: int = 1):
+        self.release_t(self.index[room_id], self.t_of(day, block), duration)
+
+    # ---------- 조회 ----------
+    def candidates(self, min_capacity: int = 0, tags: Iterable[str] = ()) -> int:
+        mask = self.all & ~((1 << bisect.bisect_left(self.caps, min_capacity)) - 1)
+        for tag in tags:
+            mask &= self.tags.get(tag, 0)
+        return mask
+
+    def has(self, mask: int, room_id: str) -> bool:
+        return bool(mask >> self.index[room_id] & 1)
+
+    def rooms_of(self, mask: int) -> List:
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(self.rooms[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+    def busy_t(self, t: int, duration: int = 1) -> int:
+        return self.tree.query(*self._span(t, duration))
+
+    def free_mask_t(self, t: int, duration: int = 1, eligible: Optional[int] = None) -> int:
+        return (self.all if eligible is None else eligible) & ~self.busy_t(t, duration)
+
+    def used_mask(self) -> int:
+        # 한 번이라도 쓰이는 방 (루트 = 전체 구간 OR)
+        return self.tree.t[1]
+
+    def busy_spans(self, room_id: str) -> List[Tuple[int, int]]:
+        # 이 방이 쓰이는 [시작 t, 길이) 목록 (연속 블록은 하루 안에서 합친다)
+        bit = 1 << self.index[room_id]
+        out: List[Tuple[int, int]] = []
+        for t in range(len(self.grid.days) * self.T):
+            if not self.tree.get(t) & bit:
+                continue
+            if out and out[-1][0] + out[-1][1] == t and t % self.T:
+                out[-1] = (out[-1][0], out[-1][1] + 1)
+            else:
+                out.append((t, 1))
+        return out
+
+    def free_rooms(self, day: str, block: int, duration: int = 1, min_capacity: int = 0,
+                   tags: Iterable[str] = ()) -> List:
+        return self.rooms_of(self.free_mask_t(self.t_of(day, block), duration, self.candidates(min_capacity, tags)))
+
+    def best_fit(self, day: str, block: int, duration: int = 1, min_capacity: int = 0, tags: Iterable[str] = ()):
+        mask = self.free_mask_t(self.t_of(day, block), duration, self.candidates(min_capacity, tags))
+        return self.rooms[(mask & -mask).bit_length() - 1] if mask else None
+
+    # ---------- 실제 시각 ----------
+    def block_at(self, when: datetime.datetime) -> int:
+        # 그 시각이 속한 교시 (시간표 밖이면 1 미만이나 blocks_per_day 초과)
+        return (when.hour * 60 + when.minute - _day_start_minutes()) // self.grid.block_minutes + 1
+
+    def busy_at(self, when: datetime.datetime, minutes: int = 0) -> Set[str]:
+        # when 부터 minutes 분 동안(0 이면 그 순간) 시간표상 쓰이는 방 id
+        day = WEEKDAYS[when.weekday()]
+        if day not in self.grid.days:
+            return set()
+        bm = self.grid.block_minutes
+        off = when.hour * 60 + when.minute - _day_start_minutes()
+        lo, hi = max(off, 0), min(off + max(minutes, 1), self.T * bm)
+        if lo >= hi:
+            return set()
+        first = lo // bm
+        mask = self.busy_t(self.t_of(day, first + 1), -(-hi // bm) - first)
+        return {r.id for r in self.rooms_of(mask)}
+
+    def next_change_at(self, when: datetime.datetime) -> Optional[datetime.datetime]:
+        # 그날 안에서 다음 교시 경계 (시간표상 방 상태는 경계에서만 바뀐다). 없으면 None
+        if WEEKDAYS[when.weekday()] not in self.grid.days:
+            return None
+        bm = self.grid.block_minutes
+        off = when.hour * 60 + when.minute - _day_start_minutes()
+        if off >= self.T * bm:
+            return None
+        nxt = 0 if off < 0 else (off // bm + 1) * bm
+        midnight = datetime.datetime.combine(when.date(), datetime.time())
+        return midnight + datetime.timedelta(minutes=_day_start_minutes() + nxt)
+
+class AvailabilityRegistry:
+    # 가장 최근에 배정한 시간표의 가용성 (없으면 기본 강의실, 빈 시간표)
+    def __init__(self):
+        self.av: Optional[RoomAvailability] = None
+        self.published: Optional[RoomAvailability] = None   # 실제로 배정한 시간표가 있을 때만
+        self.lock = threading.Lock()
+
+    def publish(self, rooms: List, grid, assignments: Iterable[dict]) -> RoomAvailability:
+        av = RoomAvailability.from_assignments(rooms, grid, assignments)
+        with self.lock:
+            self.av = self.published = av
+        return av
+
+    def current(self) -> RoomAvailability:
+        if self.av is None:
+            from .scheduler import DEFAULT_ROOMS, Grid
+            with self.lock:
+                if self.av is None:
+                    self.av = RoomAvailability(DEFAULT_ROOMS, Grid(days=["MON", "TUE", "WED", "THU", "FRI"],
+                                                                   blocks_per_day=9))
+        return self.av
+
+room_availability = AvailabilityRegistry()
@@ -0,0 +1,213 @@
+# 대형 시간표 분할 풀이
+# 1) 강사를 공유하는 과목끼리 묶은 연결요소를 학과 순서대로 모아 파티션을 만들고 (작은 학과는 이웃 학과와 합친다)
+# 2) 강의실을 파티션마다 겹치지 않게 나눠 준 뒤(정원 큰 방부터, 그 방에 들어갈 수요가 가장 많이 남은 파티션에)
+# 3) 파티션을 프로세스 풀에서 독립적으로 풀고 결과를 이어 붙인다.
+# 방이 모자라거나 풀리지 않은 파티션만, 다른 파티션이 쓰는 방·시간을 막아 둔 채(Request.occupied) 전체 방으로 다시 푼다(repair).
+# 파티션 풀이와 repair 는 하나의 마감(time_limit)을 나눠 쓰고, repair 도 못 풀면 그리디로 채운다.
+# 방을 나눠 준 것 자체가 제약이므로 파티션이 모두 최적이어도 전체 결과는 FEASIBLE 이다.
+# 고정/힌트가 있는 요청(증분 재배정)은 파티션·방 배분을 가로지르므로 나누지 않고 PART_ENGINE 으로 한 번에 푼다.
+# 대안 해(pool_size > 1)는 파티션 해를 조합해야 해서 지원하지 않는다 (check_request 가 거절).
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from typing import Callable, List, Dict, Optional
+import os
+import time
+
+from ortools.sat.python import cp_model
+
+from .scheduler import Course, Room, Instructor, Request, _morning_bonus, greedy, solve
+
+PART_ENGINE = "interval"
+MIN_PART_SESSIONS = 200  # 파티션 목표 크기 (세션 수) — 작은 연결요소·학과는 이 정도까지 합친다
+REPAIR_SHARE = 0.2       # repair 몫으로 남겨 두는 시간 비율
+
+# ---------- 파티션 ----------
+def _components(courses: List[Course], instructors: List[Instructor]) -> List[List[Course]]:
+    # 같은 강사를 쓰는 과목 = 같은 연결요소 (강사 목록에 없는 강사는 제약이 없으므로 연결하지 않음)
+    known = {i.id for i in instructors}
+    parent = list(range(len(courses)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    first_of: Dict[str, int] = {}
+    for idx, c in enumerate(courses):
+        if c.instructor_id not in known:
+            continue
+        j = first_of.setdefault(c.instructor_id, idx)
+        parent[find(idx)] = find(j)
+
+    groups: Dict[int, List[Course]] = defaultdict(list)
+    for idx, c in enumerate(courses):
+        groups[find(idx)].append(c)
+    return list(groups.values())
+
+def partition(courses: List[Course], instructors: List[Instructor], target: int = MIN_PART_SESSIONS) -> List[List[Course]]:
+    comps = _components(courses, instructors)
+    # 학과별로 모은 뒤 큰 연결요소부터 target 세션 수까지 채운다.
+    # 학과가 끝나도 끊지 않으므로 작은 학과는 다음 학과와 한 파티션이 된다
+    by_dept: Dict[str, List[List[Course]]] = defaultdict(list)
+    for comp in comps:
+        depts = sorted({c.department for c in comp})
+        by_dept[depts[0] if depts else ""].append(comp)
+    parts: List[List[Course]] = []
+    cur: List[Course] = []
+    for dept in sorted(by_dept):
+        for comp in sorted(by_dept[dept], key=lambda g: -sum(c.sessions_per_week for c in g)):
+            if cur and sum(c.sessions_per_week for c in cur) + sum(c.sessions_per_week for c in comp) > target:
+                parts.append(cur)
+                cur = []
+            cur.extend(comp)
+    if cur:
+        parts.append(cur)
+    return parts
+
+def allocate_rooms(parts: List[List[Course]], rooms: List[Room], slots_per_room: int):
+    # 반환: (파티션별 방 목록, 방이 모자란 파티션 인덱스 집합)
+    # unmet[p] = 아직 방을 못 받은 세션들의 (정원, 블록 수)
+    unmet = [sorted(((c.size, c.duration_blocks) for c in part for _ in range(c.sessions_per_week)), reverse=True)
+             for part in parts]
+    alloc: List[List[Room]] = [[] for _ in parts]
+    for r in sorted(rooms, key=lambda r: -r.capacity):
+        fit = [sum(b for size, b in u if size <= r.capacity) for u in unmet]
+        p = max(range(len(parts)), key=lambda i: fit[i]) if parts else None
+        if p is None or fit[p] == 0:
+            # 남은 수요가 없으면 방이 가장 적은 파티션에 여유분으로
+            p = min(range(len(parts)), key=lambda i: len(alloc[i])) if parts else None
+            if p is None:
+                break
+        alloc[p].append(r)
+        supply, rest = slots_per_room, []
+        for size, b in unmet[p]:
+            if size <= r.capacity and b <= supply:
+                supply -= b
+            else:
+                rest.append((size, b))
+        unmet[p] = rest
+    short = {i for i, u in enumerate(unmet) if u}
+    return alloc, short
+
+# ---------- 풀이 ----------
+def _solve_part(args):
+    courses, rooms, instructors, req = args
+    return solve(courses, rooms, instructors, req)
+
+def solve_decomposed(courses: List[Course], rooms: List[Room], instructors: List[Instructor], req: Request,
+                     on_solution: Optional[Callable[[dict], None]] = None):
+    # on_solution: 파티션 하나가 풀릴 때마다 지금까지의 {"objective"(합), "elapsed", "assignments"} 로 호출
+    t0 = time.perf_counter()
+    if req.fixed or req.hint:
+        res = solve(courses, rooms, instructors, replace(req, engine=PART_ENGINE), on_solution)
+        res["stats"]["decomposed"] = False
+        return res
+    deadline = t0 + req.time_limit
+    # 시드가 있으면 벽시계로 남은 시간을 재서 나누면 재현이 깨지므로 time_limit 의 고정 몫으로 나눈다
+    seeded = req.seed is not None
+
+    def remaining() -> float:
+        return max(0.0, deadline - time.perf_counter())
+
+    grid = req.grid
+    parts = partition(courses, instructors, MIN_PART_SESSIONS)
+    alloc, short = allocate_rooms(parts, rooms, len(grid.days) * grid.blocks_per_day)
+    sub_req = replace(req, engine=PART_ENGINE, workers=1, pool_size=1)
+
+    # 방이 모자란 파티션은 어차피 못 푸니 바로 repair 로 넘긴다
+    todo = [i for i in range(len(parts)) if i not in short]
+    n_proc = max(1, min(len(todo), req.workers if req.workers > 0 else (os.cpu_count() or 1)))
+    # 마감까지 남은 시간에서 repair 몫을 뺀 만큼을 파티션에 나눠 준다 (프로세스 수만큼은 동시에 돈다)
+    part_budget = (req.time_limit if seeded else remaining()) * (1 - REPAIR_SHARE)
+    part_limit = part_budget * n_proc / max(1, len(todo))
+    jobs = []
+    for i in todo:
+        ids = {c.instructor_id for c in parts[i]}
+        jobs.append((parts[i], alloc[i], [x for x in instructors if x.id in ids], replace(sub_req, time_limit=part_limit)))
+    build_seconds = time.perf_counter() - t0
+
+    ok = (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    t1 = time.perf_counter()
+    results: Dict[int, dict] = {}
+    assignments, failed, objective = [], sorted(short), 0.0
+
+    def report():
+        if on_solution is not None:
+            on_solution({"objective": objective, "elapsed": round(time.perf_counter() - t1, 3),
+                         "assignments": list(assignments)})
+
+    def done(i: int, res: dict):
+        nonlocal objective
+        results[i] = res
+        if res["status"] not in ok:
+            failed.append(i)
+            return
+        assignments.extend(res["assignments"])
+        objective += res.get("objective", 0.0)
+        report()
+
+    if n_proc > 1:
+        with ProcessPoolExecutor(max_workers=n_proc) as ex:
+            futures = {ex.submit(_solve_part, j): i for i, j in zip(todo, jobs)}
+            for f in as_completed(futures):
+                done(futures[f], f.result())
+    else:
+        # 한 프로세스면 앞 파티션이 일찍 끝난 만큼 뒤 파티션이 더 쓴다 (시드가 있으면 고정 몫 그대로)
+        part_end = time.perf_counter() + part_budget
+        for k, (i, (sub, sub_rooms, sub_inst, r)) in enumerate(zip(todo, jobs)):
+            if not seeded:
+                r = replace(r, time_limit=max(0.0, part_end - time.perf_counter()) / (len(todo) - k))
+            done(i, _solve_part((sub, sub_rooms, sub_inst, r)))
+
+    # repair: 실패한 파티션의 과목만, 다른 파티션이 쓰는 방·시간을 막고 전체 방으로 마감까지 남은 시간 안에 다시 푼다
+    # (파티션은 강사를 공유하지 않으므로 강사 쪽은 막을 게 없다)
+    status, unassigned, fallback = cp_model.FEASIBLE, [], None
+    failed.sort()
+    if failed:
+        sub = [c for i in failed for c in parts[i]]
+        ids = {c.instructor_id for c in sub}
+        sub_inst = [x for x in instructors if x.id in ids]
+        repair_req = replace(sub_req, workers=req.workers, occupied=(req.occupied or []) + assignments,
+                             time_limit=req.time_limit * REPAIR_SHARE if seeded else remaining())
+        repair = solve(sub, rooms, sub_inst, repair_req)
+        results[-1] = repair
+        if repair["status"] in ok:
+            assignments.extend(repair["assignments"])
+            objective += repair.get("objective", 0.0)
+            report()
+        elif not assignments and repair["status"] == cp_model.INFEASIBLE:
+            # 고정한 것이 없으면 repair 가 곧 전체 문제이므로 불가능 증명도 그대로
+            status = repair["status"]
+        else:
+            # 다른 파티션 결과를 막아 둔 채로 시간 안에 못 풀었을 뿐이다 — 빈 시간표 대신 그리디로 채운다
+            fill = greedy(sub, rooms, sub_inst, repair_req)
+            assignments.extend(fill["assignments"])
+            objective += _morning_bonus(fill["assignments"], req)
+            status, unassigned, fallback = fill["status"], fill["unassigned"], "greedy"
+    solve_seconds = time.perf_counter() - t1
+
+    out = {
+        "status": int(status),
+        "assignments": assignments,
+        "engine": "decomposed",
+        "stats": {
+            "build_seconds": round(build_seconds, 4),
+            "solve_seconds": round(solve_seconds, 4),
+            "num_vars": sum(r["stats"]["num_vars"] for r in results.values()),
+            "num_constraints": sum(r["stats"]["num_constraints"] for r in results.values()),
+            "workers": n_proc,
+            "seed": req.seed,
+            "partitions": [len(p) for p in parts],
+            "room_short": sorted(short),
+            "repaired": failed,
+        },
+    }
+    if fallback:
+        out["unassigned"] = unassigned
+        out["stats"]["fallback"] = fallback
+        out["stats"]["unassigned"] = len(unassigned)
+    if assignments and any("objective" in r for r in results.values()):
+        out["objective"] = objective
+    return out
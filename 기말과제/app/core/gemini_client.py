@@ -1,25 +1,349 @@
-import os, json, re
-import google.generativeai as genai
+import os, json, re, hashlib, sqlite3, threading, time, asyncio
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional
 from dotenv import load_dotenv
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-MODEL=os.getenv("GEMINI_MODEL","gemini-1.5-flash")
 
-def _model(): return genai.GenerativeModel(MODEL)
-def _gen(prompt): return (_model().generate_content(prompt).text or "").strip()
+# ---------- 백엔드 ----------
+# GEMINI_BACKEND=gemini (기본) | fake (네트워크 없이 결정적인 응답 — 테스트/오프라인 개발용)
+# gemini 인데 라이브러리가 없으면 import 가 실패하고, main.py 의 대체 함수가 쓰인다 (예전과 같음)
+BACKEND = os.getenv("GEMINI_BACKEND", "gemini").lower()
+MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "4"))
+# 캐시 파일은 저장소 밖(기본: 기말과제/.cache, .gitignore 대상)에 둔다
+APP_CACHE_DIR = os.getenv("APP_CACHE_DIR", str(Path(__file__).resolve().parents[2] / ".cache"))
+CACHE_PATH = os.getenv("GEMINI_CACHE_PATH", os.path.join(APP_CACHE_DIR, "gemini_cache.sqlite"))
+CACHE_TTL = float(os.getenv("GEMINI_CACHE_TTL", str(24 * 3600)))
+CACHE_SIZE = int(os.getenv("GEMINI_CACHE_SIZE", "2000"))
+CACHE_ENABLED = os.getenv("GEMINI_CACHE", "1").lower() not in ("0", "false", "no", "off")
+STREAM_WINDOW = int(os.getenv("GEMINI_STREAM_WINDOW", "200"))  # TTFT 통계에 남길 최근 스트리밍 요청 수
 
-def summarize_text_ko(text:str)->str:
-    return _gen(f"아래 텍스트를 한국어로 핵심 5줄 이내로 요약:\n{text}")
+if BACKEND == "gemini":
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-def rank_courses_ko(prefs:str, courses:list, topk:int=5):
-    import json as _j
-    p = f"""선호: {prefs}
+class LLMBackend(ABC):
+    # 백엔드 인터페이스: generate = 전체 응답 한 번에, stream = 조각(토큰)이 나오는 대로.
+    # stream 을 따로 구현하지 않은 백엔드는 전체 응답을 한 조각으로 흘린다.
+    name = "base"
+    model_name = ""
+
+    @abstractmethod
+    def generate(self, prompt: str) -> str:
+        ...
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        yield self.generate(prompt)
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+
+    def __init__(self, model: str = MODEL):
+        self.model_name = model
+        self.model = genai.GenerativeModel(model)  # 한 번 만들어 재사용
+
+    def generate(self, prompt: str) -> str:
+        return (self.model.generate_content(prompt).text or "").strip()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self.model.generate_content(prompt, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:  # 안전 필터 등으로 내용 없는 조각
+                continue
+            if text:
+                yield text
+
+class FakeBackend(LLMBackend):
+    # 프롬프트만 보고 정해진 답을 만든다. latency 로 느린 호출을 흉내 낼 수 있다 (FAKE_GEMINI_LATENCY 초)
+    # stream 은 첫 조각 전에 latency, 조각(단어) 사이마다 token_latency 를 쉰다 (FAKE_GEMINI_TOKEN_LATENCY 초)
+    name = "fake"
+
+    def __init__(self, latency: float = float(os.getenv("FAKE_GEMINI_LATENCY", "0")),
+                 token_latency: float = float(os.getenv("FAKE_GEMINI_TOKEN_LATENCY", "0"))):
+        self.model_name = "fake"
+        self.latency = latency
+        self.token_latency = token_latency
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(prompt)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        for i, piece in enumerate(re.findall(r"\S+\s*|\s+", self._answer(prompt))):
+            if i and self.token_latency:
+                time.sleep(self.token_latency)
+            yield piece
+
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        m = re.search(r"상위 (\d+)개.*?데이터:\n(\[.*\])", prompt, re.S)
+        if m:
+            items = json.loads(m.group(2))[:int(m.group(1))]
+            keep = ("교과목코드", "교과목명", "개설학과", "강좌담당교수")
+            return json.dumps([{**{k: c.get(k, "") for k in keep}, "이유": "fake"} for c in items], ensure_ascii=False)
+        body = prompt.split("\n", 1)[-1]
+        return "\n".join(line.strip() for line in body.splitlines() if line.strip())[:500]
+
+BACKENDS = {"gemini": GeminiBackend, "fake": FakeBackend}
+
+def make_backend(name: str = BACKEND) -> LLMBackend:
+    return BACKENDS.get(name, GeminiBackend)()
+
+# ---------- 응답 캐시 (SQLite, TTL, 개수 제한) ----------
+class PromptCache:
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL, size: int = CACHE_SIZE):
+        self.path, self.ttl, self.size = path, ttl, size
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")     # 적중 때마다 쓰는 used_at 갱신이 fsync 를 기다리지 않게
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS gemini_cache (key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                          "created_at REAL NOT NULL, used_at REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS gemini_cache_used ON gemini_cache (used_at)")
+        self.conn.commit()
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT response, created_at FROM gemini_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self.conn.execute("DELETE FROM gemini_cache WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE gemini_cache SET used_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self.lock:
+            self.conn.execute("INSERT INTO gemini_cache (key, response, created_at, used_at) VALUES (?, ?, ?, ?) "
+                              "ON CONFLICT (key) DO UPDATE SET response = excluded.response, "
+                              "created_at = excluded.created_at, used_at = excluded.used_at",
+                              (key, response, now, now))
+            # 오래 안 쓴 것부터 개수 제한까지 지운다
+            self.conn.execute("DELETE FROM gemini_cache WHERE key IN (SELECT key FROM gemini_cache "
+                              "ORDER BY used_at DESC LIMIT -1 OFFSET ?)", (self.size,))
+            self.conn.commit()
+
+    def info(self) -> dict:
+        with self.lock:
+            n = self.conn.execute("SELECT COUNT(*) FROM gemini_cache").fetchone()[0]
+        return {"path": self.path, "entries": n, "ttl": self.ttl, "size": self.size}
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(round(q * (len(values) - 1))))], 3)
+
+_END = object()
+
+# ---------- 클라이언트: 캐시 → 같은 프롬프트 합치기 → 동시 호출 제한 ----------
+# 캐시(SQLite) 조회/저장은 async 경로에서 asyncio.to_thread 로 (이벤트 루프에서 잠금·디스크 I/O 를 기다리지 않게).
+# 같은 프롬프트 호출은 태스크 하나로 나가고 모든 요청이 shield 로 기다린다 → 먼저 온 요청이 취소돼도 나머지는 결과를 받는다.
+class GeminiClient:
+    def __init__(self, backend=None, cache: Optional[PromptCache] = None, concurrency: int = CONCURRENCY):
+        self.backend = backend or make_backend()
+        self.cache = cache
+        self.concurrency = concurrency
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._sem_loop = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"calls": 0, "cache_hits": 0, "coalesced": 0, "errors": 0}
+        self.streams: deque = deque(maxlen=STREAM_WINDOW)  # 스트리밍 요청별 기록 (ttft_ms, total_ms, ...)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem, self._sem_loop = asyncio.Semaphore(self.concurrency), loop
+        return self._sem
+
+    def _cached(self, key: str) -> Optional[str]:
+        hit = self.cache.get(key) if self.cache else None
+        if hit is not None:
+            self.stats["cache_hits"] += 1
+        return hit
+
+    async def _acached(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._cached, key) if self.cache else None
+
+    def _call(self, prompt: str, key: str) -> str:
+        self.stats["calls"] += 1
+        try:
+            text = self.backend.generate(prompt)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        if self.cache and text:
+            self.cache.put(key, text)
+        return text
+
+    async def _fetch(self, prompt: str, key: str) -> str:
+        async with self._semaphore():
+            return await asyncio.to_thread(self._call, prompt, key)
+
+    def _settled(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # 기다리는 쪽이 없어도 경고가 나지 않게
+
+    async def agenerate(self, prompt: str) -> str:
+        key = PromptCache.key(self.backend.model_name, prompt)
+        hit = await self._acached(key)
+        if hit is not None:
+            return hit
+        task = self._inflight.get(key)
+        if task is not None:  # 같은 프롬프트가 이미 나가 있으면 그 결과를 같이 받는다
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.get_running_loop().create_task(self._fetch(prompt, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._settled(key, t))
+        # 기다리던 요청이 취소돼도 shield 바깥만 취소된다 (호출은 끝까지 가고 결과는 캐시에 남는다)
+        return await asyncio.shield(task)
+
+    async def _pump(self, prompt: str) -> AsyncIterator[str]:
+        # 백엔드의 동기 stream 을 스레드에서 돌리고, 조각을 큐로 받아 이벤트 루프 쪽에서 내보낸다
+        loop = asyncio.get_running_loop()
+        q: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def run():
+            try:
+                for piece in self.backend.stream(prompt):
+                    if stop.is_set():  # 받는 쪽이 끊겼으면 더 받지 않는다
+                        break
+                    loop.call_soon_threadsafe(q.put_nowait, piece)
+                loop.call_soon_threadsafe(q.put_nowait, _END)
+            except Exception as e:
+                loop.call_soon_threadsafe(q.put_nowait, e)
+
+        self.stats["calls"] += 1
+        loop.run_in_executor(None, run)
+        try:
+            while True:
+                item = await q.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+    async def astream(self, prompt: str, metrics: Optional[dict] = None) -> AsyncIterator[str]:
+        # 조각이 나오는 대로 내보낸다. 캐시 적중이면 저장된 응답을 한 조각으로.
+        # 끝까지 받은 응답은 캐시에 넣어 generate/agenerate 와 공유한다.
+        # metrics 를 넘기면 이 요청의 기록(ttft_ms, total_ms, chunks, chars, status)을 채워 준다.
+        rec = metrics if metrics is not None else {}
+        rec.update(status="ok", cached=False, ttft_ms=None, total_ms=None, chunks=0, chars=0)
+        t0 = time.perf_counter()
+        key = PromptCache.key(self.backend.model_name, prompt)
+
+        def emitted(piece: str):
+            if rec["ttft_ms"] is None:
+                rec["ttft_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            rec["chunks"] += 1
+            rec["chars"] += len(piece)
+
+        try:
+            hit = await self._acached(key)
+            if hit is not None:
+                rec["cached"] = True
+                emitted(hit)
+                yield hit
+                return
+            parts: List[str] = []
+            async with self._semaphore():
+                async for piece in self._pump(prompt):
+                    emitted(piece)
+                    parts.append(piece)
+                    yield piece
+            text = "".join(parts).strip()
+            if self.cache and text:
+                await asyncio.to_thread(self.cache.put, key, text)
+        except (GeneratorExit, asyncio.CancelledError):
+            rec["status"] = "aborted"
+            raise
+        except Exception:
+            rec["status"] = "error"
+            self.stats["errors"] += 1
+            raise
+        finally:
+            rec["total_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            self.streams.append(dict(rec))
+
+    def stream_info(self) -> dict:
+        recs = list(self.streams)
+        live = [r for r in recs if not r["cached"] and r["ttft_ms"] is not None]
+        return {"requests": len(recs), "cached": sum(r["cached"] for r in recs),
+                "errors": sum(r["status"] == "error" for r in recs),
+                "ttft_ms_p50": _percentile([r["ttft_ms"] for r in live], 0.5),
+                "ttft_ms_p95": _percentile([r["ttft_ms"] for r in live], 0.95),
+                "total_ms_p50": _percentile([r["total_ms"] for r in live], 0.5)}
+
+    async def abatch(self, prompts: List[str]) -> List[str]:
+        return list(await asyncio.gather(*(self.agenerate(p) for p in prompts)))
+
+    def generate(self, prompt: str) -> str:
+        # 동기 호출용 (캐시만 공유)
+        key = PromptCache.key(self.backend.model_name, prompt)
+        hit = self._cached(key)
+        return hit if hit is not None else self._call(prompt, key)
+
+    def info(self) -> dict:
+        return {"backend": self.backend.name, "model": self.backend.model_name, "concurrency": self.concurrency,
+                **self.stats, "inflight": len(self._inflight), "stream": self.stream_info(),
+                "cache": self.cache.info() if self.cache else None}
+
+client = GeminiClient(cache=PromptCache() if CACHE_ENABLED else None)
+
+# ---------- 프롬프트 ----------
+def _summary_prompt(text: str) -> str:
+    return f"아래 텍스트를 한국어로 핵심 5줄 이내로 요약:\n{text}"
+
+def _rank_prompt(prefs: str, courses: list, topk: int) -> str:
+    return f"""선호: {prefs}
 아래 JSON 과목 리스트에서 상위 {topk}개를 고르고 이유를 써.
 반드시 JSON 배열로만 출력: [{{"교과목코드":str,"교과목명":str,"개설학과":str,"강좌담당교수":str,"이유":str}}]
 데이터:
-{_j.dumps(courses, ensure_ascii=False)}"""
-    txt=_gen(p)
-    m=re.search(r'(\[.*\])', txt, re.S)
+{json.dumps(courses, ensure_ascii=False)}"""
+
+def _parse_rank(txt: str):
+    m = re.search(r'(\[.*\])', txt, re.S)
     if not m: return {"raw": txt}
-    try: return _j.loads(m.group(1))
-    except: return {"raw": txt}
+    try: return json.loads(m.group(1))
+    except ValueError: return {"raw": txt}
+
+def summarize_text_ko(text: str) -> str:
+    return client.generate(_summary_prompt(text))
+
+def rank_courses_ko(prefs: str, courses: list, topk: int = 5):
+    return _parse_rank(client.generate(_rank_prompt(prefs, courses, topk)))
+
+async def asummarize_text_ko(text: str) -> str:
+    return await client.agenerate(_summary_prompt(text))
+
+async def arank_courses_ko(prefs: str, courses: list, topk: int = 5):
+    return _parse_rank(await client.agenerate(_rank_prompt(prefs, courses, topk)))
+
+def astream_summary_ko(text: str, metrics: Optional[dict] = None) -> AsyncIterator[str]:
+    return client.astream(_summary_prompt(text), metrics)
@@ -0,0 +1,116 @@
+# 비동기 시간표 배정 작업
+# POST 로 작업을 넣으면 job_id 를 바로 돌려주고, 풀이는 프로세스 풀에서 돈다.
+# 자식 프로세스의 CP-SAT 콜백이 개선 해를 Manager 큐로 보내면 수집 스레드가 job 의 events 에 쌓는다.
+# 같은 문제(지문)가 solve_cache 에 있으면 풀지 않고 바로 끝난 작업으로 돌려준다.
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from typing import Callable, Optional
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+
+from .scheduler import solve
+from .solve_cache import solve_cache, fingerprint, cacheable
+
+JOB_WORKERS = int(os.getenv("SCHEDULE_JOB_WORKERS", "2"))
+MAX_JOBS = 200
+
+def _run(job_id: str, courses, rooms, instructors, req, queue):
+    # 풀에서 실제로 꺼내져 돌기 시작했음을 먼저 알린다 (그 전까지 job 은 queued)
+    queue.put((job_id, "started", None))
+
+    def progress(ev):
+        queue.put((job_id, "progress", ev))
+    try:
+        res = solve(courses, rooms, instructors, req, on_solution=progress)
+        queue.put((job_id, "done", res))
+    except Exception as e:
+        queue.put((job_id, "error", {"detail": str(e)}))
+
+class JobManager:
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self.lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue = None
+
+    # 프로세스 풀/큐는 첫 작업 때 만든다 (import 만으로 프로세스를 띄우지 않도록)
+    def _ensure_started(self):
+        if self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        self._queue = mp.Manager().Queue()
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self):
+        while True:
+            try:
+                job_id, kind, payload = self._queue.get()
+            except (EOFError, OSError):  # 종료 중 Manager 가 먼저 내려간 경우
+                return
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if job is None:
+                    continue
+                if kind == "started":
+                    job["status"] = "running"
+                    continue
+                if kind == "progress":
+                    job["events"].append({"event": "progress", "data": payload})
+                    continue
+                job["finished_at"] = time.time()
+                if kind == "error":
+                    job["status"] = "error"
+                    job["result"] = payload
+                    job["events"].append({"event": "error", "data": payload})
+                    continue
+            self._finish(job, payload)
+
+    def _finish(self, job: dict, result: dict):
+        # on_done(result) 가 돌려준 dict(예: schedule_id)는 job 과 done 이벤트에 같이 싣는다
+        extra = (job["on_done"](result) if job.get("on_done") else None) or {}
+        if not job["cached"] and cacheable(result):
+            solve_cache.put(job["key"], result)
+        with self.lock:
+            job["extra"] = extra
+            job["result"] = result
+            job["status"] = "done"
+            job["events"].append({"event": "done", "data": {"status": result["status"], **extra, "result": result}})
+
+    def submit(self, courses, rooms, instructors, req,
+               on_done: Optional[Callable[[dict], Optional[dict]]] = None) -> dict:
+        job_id = uuid.uuid4().hex[:12]
+        key = fingerprint(courses, rooms, instructors, req)
+        job = {"id": job_id, "status": "queued", "key": key, "events": [], "extra": {},
+               "result": None, "on_done": on_done, "created_at": time.time(), "cached": False}
+        with self.lock:
+            self.jobs[job_id] = job
+            while len(self.jobs) > MAX_JOBS:
+                self.jobs.popitem(last=False)
+        cached = solve_cache.get(key)
+        if cached is not None:
+            job.update(cached=True, finished_at=time.time())
+            self._finish(job, cached)
+            return job
+
+        self._ensure_started()
+        self._pool.submit(_run, job_id, courses, rooms, instructors, req, self._queue)
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.jobs.get(job_id)
+
+    def snapshot(self, job: dict) -> dict:
+        with self.lock:
+            out = {"job_id": job["id"], "status": job["status"], "cached": job["cached"],
+                   "progress": [{"objective": e["data"]["objective"], "elapsed": e["data"]["elapsed"]}
+                                for e in job["events"] if e["event"] == "progress"],
+                   **job["extra"]}
+            if job["result"] is not None:
+                out["result"] = job["result"]
+        return out
+
+jobs = JobManager()
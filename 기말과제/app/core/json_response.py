@@ -0,0 +1,65 @@
+# 빠른 JSON 응답 (orjson)
+# 목록 응답(100행 /search, /courses, 추천 후보)은 직렬화가 지연의 꽤 큰 몫이라 orjson 으로 바로 bytes 를 만든다.
+#  - NaN / ±Inf → null (표준 json 은 NaN 을 그대로 써서 브라우저 JSON.parse 가 깨진다)
+#  - numpy 스칼라/배열, pandas Timestamp, Decimal, date 등 df.to_dict 에서 새어 나오는 타입 처리
+# orjson 이 없으면(또는 JSON_RESPONSE=std) 같은 규칙으로 표준 json 을 쓴다.
+from decimal import Decimal
+from typing import Any
+import datetime as dt
+import json
+import math
+import os
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+USE_ORJSON = orjson is not None and os.getenv("JSON_RESPONSE", "orjson").lower() != "std"
+
+def _default(o: Any):
+    # orjson / json 이 모르는 타입
+    if hasattr(o, "isoformat"):          # pandas.Timestamp, datetime, date, time
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return float(o)
+    if hasattr(o, "tolist"):             # numpy 배열
+        return o.tolist()
+    if hasattr(o, "item"):               # numpy 스칼라 (orjson 옵션 밖의 것들)
+        return _clean(o.item())
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    return str(o)
+
+def _clean(o: Any):
+    # 표준 json 경로용: NaN/Inf → None, numpy 등은 파이썬 값으로
+    if isinstance(o, float):
+        return o if math.isfinite(o) else None
+    if isinstance(o, (str, int, bool)) or o is None:
+        return o
+    if isinstance(o, dict):
+        return {(k if isinstance(k, str) else str(k)): _clean(v) for k, v in o.items()}
+    if isinstance(o, (list, tuple)):
+        return [_clean(v) for v in o]
+    return _clean(_default(o))
+
+if USE_ORJSON:
+    _OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(content: Any) -> bytes:
+        # orjson 은 NaN/Inf 를 null 로 쓴다
+        return orjson.dumps(content, default=_default, option=_OPTS)
+else:
+    def dumps(content: Any) -> bytes:
+        return json.dumps(_clean(content), ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    # 핸들러가 이 클래스를 직접 돌려주면 FastAPI 의 jsonable_encoder 단계도 건너뛴다
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def json_backend() -> str:
+    return "orjson" if USE_ORJSON else "json"
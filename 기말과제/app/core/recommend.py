@@ -0,0 +1,142 @@
+# 과목 추천 1단계: 로컬 후보 검색 (BM25)
+# 교과목명/개설학과/영역구분을 문자 bigram + 어절 토큰으로 색인해 두고, 선호 문장과 가까운 상위 K개만 LLM 에 넘긴다.
+# 색인은 시작 시 한 번 만들고, courses 테이블이 재적재되면(catalog generation 변경) 새로 만들어 통째로 바꾼다.
+# 과목 벡터(db/course_vectors.py, 문자 n-gram TF-IDF 코사인)가 있으면 BM25 와 순위를 합쳐 후보를 고르고,
+# LLM 을 쓸 수 없을 때는 벡터 유사도만으로 바로 추천한다 (recommend_local).
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+import math
+import os
+import re
+import threading
+
+import numpy as np
+
+from ..db.catalog import RefreshCheck
+from ..db.course_vectors import CourseVectors, ensure_course_vectors, load_course_vectors, load_docs
+
+# 필드별 가중치 (과목명이 가장 중요)
+FIELDS = {"교과목명": 2.0, "개설학과": 1.0, "영역구분": 1.0}
+CANDIDATES = int(os.getenv("RECOMMEND_CANDIDATES", "30"))
+K1, B = 1.2, 0.75
+RRF_K = 60  # 순위 합치기 (reciprocal rank fusion) 상수
+# 로컬 추천 결과 필드 (LLM 응답 형식과 같게)
+RESULT_FIELDS = ("교과목코드", "교과목명", "개설학과", "강좌담당교수")
+
+_WORD = re.compile(r"[0-9A-Za-z가-힣]+")
+
+def tokenize(s: str) -> List[str]:
+    # 어절(소문자) + 한글/영문 문자 bigram. 형태소 분석기 없이도 "인공지능" ↔ "인공지능개론" 이 맞도록
+    out = []
+    for w in _WORD.findall(str(s or "").lower()):
+        out.append(w)
+        out.extend(w[i:i + 2] for i in range(len(w) - 1))
+    return out
+
+class BM25Index:
+    def __init__(self, docs: List[dict]):
+        self.docs = docs
+        self.postings: Dict[str, List[tuple]] = defaultdict(list)  # term -> [(doc, 가중 tf)]
+        lengths = []
+        for i, d in enumerate(docs):
+            tf: Counter = Counter()
+            for f, w in FIELDS.items():
+                for t in tokenize(d.get(f, "")):
+                    tf[t] += w
+            lengths.append(sum(tf.values()))
+            for t, n in tf.items():
+                self.postings[t].append((i, n))
+        self.avgdl = (sum(lengths) / len(lengths)) if lengths else 1.0
+        self.norm = [K1 * (1 - B + B * l / self.avgdl) for l in lengths]
+        n = len(docs)
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self.postings.items()}
+
+    def search(self, query: str, k: int = CANDIDATES) -> List[dict]:
+        scores: Dict[int, float] = defaultdict(float)
+        for t in set(tokenize(query)):
+            idf = self.idf.get(t)
+            if idf is None:
+                continue
+            for i, tf in self.postings[t]:
+                scores[i] += idf * tf * (K1 + 1) / (tf + self.norm[i])
+        top = sorted(scores.items(), key=lambda x: (-x[1], x[0]))[:k]
+        return [self.docs[i] for i, _ in top]
+
+def _doc_key(d: dict) -> tuple:
+    # BM25 쪽(DB 에서 읽음)과 벡터 쪽(json 에서 읽음) 문서를 같은 것으로 맞추는 키
+    return tuple(str(v) for v in d.values())
+
+def fuse(*rankings: List[dict], k: int = CANDIDATES) -> List[dict]:
+    # 여러 순위 목록을 1/(RRF_K + 순위) 합으로 합친다 (점수 척도가 달라도 된다)
+    scores: Dict[tuple, float] = defaultdict(float)
+    docs: Dict[tuple, dict] = {}
+    for ranking in rankings:
+        for rank, d in enumerate(ranking):
+            key = _doc_key(d)
+            scores[key] += 1.0 / (RRF_K + rank + 1)
+            docs.setdefault(key, d)
+    return [docs[key] for key, _ in sorted(scores.items(), key=lambda x: -x[1])[:k]]
+
+def _reason(d: dict, prefs: str, score: Optional[float]) -> str:
+    words = [w for w in _WORD.findall(prefs.lower()) if len(w) >= 2]
+    hit = [f for f in ("교과목명", "영역구분", "강의유형구분") if any(w in str(d.get(f, "")).lower() for w in words)]
+    sim = f"유사도 {score:.2f}" if score is not None else "키워드 일치"
+    return f"{'/'.join(hit)} 이(가) 선호와 겹침 ({sim})" if hit else f"선호와 비슷한 과목 ({sim})"
+
+class Recommender:
+    def __init__(self):
+        self.index: Optional[BM25Index] = None
+        self.vectors: Optional[CourseVectors] = None
+        self.generation: Optional[int] = None
+        self.refresh_check = RefreshCheck()
+        self.lock = threading.Lock()
+
+    def refresh(self, engine, force: bool = False):
+        # 세대 번호가 바뀌었을 때만 다시 만든다. 만드는 동안에는 이전 색인으로 계속 응답
+        if not force and self.index is not None and self.refresh_check.recent():
+            return
+        gen = self.refresh_check.read(engine)
+        if not force and self.index is not None and gen == self.generation:
+            return
+        with self.lock:
+            if not force and self.index is not None and gen == self.generation:
+                return
+            index = BM25Index(load_docs(engine))
+            self.index, self.vectors, self.generation = index, self._load_vectors(engine, gen), gen
+
+    @staticmethod
+    def _load_vectors(engine, gen: int) -> Optional[CourseVectors]:
+        # 적재 때 써 둔 파일을 mmap 으로 연다. 없거나 다른 세대 것이면(적재 스크립트 밖에서 바뀐 DB) 여기서 새로 쓴다
+        try:
+            ensure_course_vectors(engine, gen)
+            return load_course_vectors()
+        except Exception as e:
+            print(">>> course vectors skipped:", e)
+            return None
+
+    def candidates(self, engine, prefs: str, k: int = CANDIDATES) -> List[dict]:
+        self.refresh(engine)
+        hits = self.index.search(prefs, k)
+        if self.vectors is not None:
+            hits = fuse(hits, [d for d, _ in self.vectors.search(prefs, k)], k=k)
+        # 겹치는 게 하나도 없으면 LLM 이 고를 수 있도록 앞쪽 K개
+        return hits or self.index.docs[:k]
+
+    def recommend_local(self, engine, prefs: str, topk: int = 5) -> List[dict]:
+        # LLM 없이: 벡터 코사인 상위 topk (벡터 파일이 없으면 BM25). 형식은 LLM 응답과 같고 score 가 붙는다
+        self.refresh(engine)
+        if self.vectors is not None:
+            hits = self.vectors.search(prefs, topk)
+        else:
+            hits = [(d, None) for d in self.index.search(prefs, topk)]
+        hits = hits or [(d, 0.0) for d in self.index.docs[:topk]]
+        return [{**{k: d.get(k, "") for k in RESULT_FIELDS}, "이유": _reason(d, prefs, s),
+                 "score": None if s is None else round(s, 4)} for d, s in hits]
+
+    def info(self) -> dict:
+        v = self.vectors
+        return {"generation": self.generation, "docs": len(self.index.docs) if self.index else 0,
+                "vectors": {"generation": v.generation, "rows": v.matrix.shape[0], "dim": v.matrix.shape[1],
+                            "mmap": isinstance(v.matrix, np.memmap)} if v is not None else None}
+
+recommender = Recommender()
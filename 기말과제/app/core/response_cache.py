@@ -0,0 +1,149 @@
+# 카탈로그 응답 캐시 + ETag 조건부 GET
+# /courses, /search 응답은 courses 테이블이 재적재될 때만 바뀐다. 그래서
+#  - 키 = (세대 번호, 경로, 정규화된 쿼리) 로 응답 본문을 메모리 LRU 에 보관하고
+#  - ETag = "세대-본문해시" 를 붙여서 If-None-Match 가 같으면 304 로 본문 없이 돌려준다.
+#  - Cache-Control 로 브라우저/리버스 프록시가 max-age 동안 재사용, 이후엔 ETag 로 재검증.
+# 세대가 바뀌면 키가 달라지므로 이전 항목은 자연히 안 맞고 LRU 에서 밀려난다.
+# 순수 ASGI 미들웨어라 대상이 아닌 경로(SSE 등)는 손대지 않고 그대로 통과시킨다.
+# CORS 미들웨어보다 안쪽에 등록해야 캐시에서 바로 돌려주는 응답(200/304)에도 CORS 헤더가 붙는다.
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, Optional
+import hashlib
+import os
+import threading
+
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CACHE_ENTRIES = int(os.getenv("CATALOG_CACHE_ENTRIES", "512"))
+CACHE_MAX_BYTES = int(os.getenv("CATALOG_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "60"))
+SKIP_PARAMS = ("stream",)  # 스트리밍 응답은 캐시하지 않는다
+# 원래 응답 헤더는 모두 보관하되, 본문·검증자에 따라 다시 붙이는 것만 뺀다
+DROP_HEADERS = (b"content-length", b"etag", b"cache-control")
+# 304 에는 본문 관련 헤더 없이 검증자/캐시 정책만 (RFC 9110 15.4.5)
+NOT_MODIFIED_HEADERS = (b"vary", b"content-location", b"expires")
+
+def normalize_query(request: Request) -> tuple:
+    items = []
+    for k, v in request.query_params.multi_items():
+        if k == "q":
+            v = " ".join(v.split())
+        items.append((k, v))
+    return tuple(sorted(items))
+
+def make_etag(generation: int, body: bytes) -> str:
+    return f'"{generation}-{hashlib.sha1(body).hexdigest()[:16]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+class ResponseCache:
+    def __init__(self, entries: int = CACHE_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.entries = entries
+        self.max_bytes = max_bytes
+        self.items: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (etag, body, 원래 응답 헤더 [(이름, 값)] bytes 쌍)
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "stores": 0, "evictions": 0}
+
+    def get(self, key: tuple):
+        with self.lock:
+            hit = self.items.get(key)
+            if hit is not None:
+                self.items.move_to_end(key)
+            return hit
+
+    def put(self, key: tuple, etag: str, body: bytes, headers: list):
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[1])
+            self.items[key] = (etag, body, headers)
+            self.bytes += len(body)
+            self.stats["stores"] += 1
+            while self.items and (len(self.items) > self.entries or self.bytes > self.max_bytes):
+                _, (_, b, _) = self.items.popitem(last=False)
+                self.bytes -= len(b)
+                self.stats["evictions"] += 1
+
+    def count(self, name: str):
+        with self.lock:
+            self.stats[name] += 1
+
+    def info(self) -> dict:
+        with self.lock:
+            return {**self.stats, "size": len(self.items), "bytes": self.bytes, "max_age": MAX_AGE}
+
+response_cache = ResponseCache()
+
+class CatalogCacheMiddleware:
+    def __init__(self, app: ASGIApp, paths: Iterable[str], generation: Callable[[], Awaitable[int]],
+                 cache: ResponseCache = response_cache):
+        self.app = app
+        self.paths = set(paths)
+        self.generation = generation
+        self.cache = cache
+
+    @staticmethod
+    def _validators(etag: str) -> list:
+        return [(b"etag", etag.encode("latin-1")),
+                (b"cache-control", f"public, max-age={MAX_AGE}, must-revalidate".encode("latin-1"))]
+
+    async def _send_cached(self, send: Send, status: int, etag: str, headers: list, body: bytes = b""):
+        if status == 304:
+            headers = [(k, v) for k, v in headers if k.lower() in NOT_MODIFIED_HEADERS]
+        else:
+            headers = headers + [(b"content-length", str(len(body)).encode("latin-1"))]
+        await send({"type": "http.response.start", "status": status, "headers": headers + self._validators(etag)})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+        request = Request(scope)
+        if any(p in request.query_params for p in SKIP_PARAMS):
+            return await self.app(scope, receive, send)
+
+        gen = await self.generation()
+        key = (gen, scope["path"], normalize_query(request))
+        inm = request.headers.get("if-none-match")
+        hit = self.cache.get(key)
+        if hit is not None:
+            etag, body, headers = hit
+            if etag_matches(inm, etag):
+                self.cache.count("not_modified")
+                return await self._send_cached(send, 304, etag, headers)
+            self.cache.count("hits")
+            return await self._send_cached(send, 200, etag, headers, body)
+
+        self.cache.count("misses")
+        start: Optional[Message] = None
+        chunks: list = []
+
+        async def capture(message: Message):
+            # 200 이면 본문을 모아 두었다가 한 번에, 그 밖의 상태는 그대로 흘려보낸다
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                if message["status"] != 200:
+                    await send(message)
+                return
+            if start is None or start["status"] != 200 or message["type"] != "http.response.body":
+                return await send(message)
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            etag = make_etag(gen, body)
+            headers = [(k, v) for k, v in start["headers"] if k.lower() not in DROP_HEADERS]
+            self.cache.put(key, etag, body, headers)
+            if etag_matches(inm, etag):
+                self.cache.count("not_modified")
+                return await self._send_cached(send, 304, etag, headers)
+            await self._send_cached(send, 200, etag, headers, body)
+
+        await self.app(scope, receive, capture)
@@ -0,0 +1,87 @@
+# 강의실 상태 변화 방송 (SSE)
+# 탭마다 60초 폴링하던 /v1/rooms/empty 대신, 서버가 점유 색인에서 다음 경계 시각(어떤 방이 비거나 차는 시각)을
+# 미리 계산해 두고 그때만 깨어나 빈 방 목록을 다시 구한다. 바뀐 게 있으면 모든 구독자에게 한 번에 보낸다.
+# 작업(asyncio task)은 구독자가 있을 때만 하나 돈다. 사용 기록 파일이 바뀌는 경우를 위해 RECHECK_SECONDS 마다도 깨어난다.
+# 색인 갱신(CSV 읽기·파싱)이 끼는 계산은 asyncio.to_thread 로 돌려 이벤트 루프를 막지 않는다.
+import asyncio
+import datetime
+import threading
+from typing import List, Optional, Set
+
+from .room_monitor import RoomMonitor, room_monitor
+
+RECHECK_SECONDS = 30.0
+QUEUE_SIZE = 8
+
+def _snapshot(empty: List[str], prev: Optional[List[str]], when: datetime.datetime,
+              next_at: Optional[datetime.datetime]) -> dict:
+    before = set(prev or [])
+    now = set(empty)
+    return {
+        "timestamp": when.isoformat(timespec="seconds"),
+        "empty_rooms": empty,
+        "freed": sorted(now - before) if prev is not None else [],
+        "occupied": sorted(before - now) if prev is not None else [],
+        "next_change": next_at.isoformat(timespec="seconds") if next_at else None,
+    }
+
+class RoomBroadcaster:
+    def __init__(self, monitor: RoomMonitor = room_monitor):
+        self.monitor = monitor
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.last: Optional[dict] = None
+        self.task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.lock = threading.Lock()   # compute 는 워커 스레드에서 돈다
+
+    def next_boundary(self, when: datetime.datetime) -> datetime.datetime:
+        # 오늘 남은 경계가 없으면 자정 (요일이 바뀌면 시간표도 바뀐다)
+        nxt = self.monitor.next_boundary(when)
+        return nxt or datetime.datetime.combine(when.date(), datetime.time()) + datetime.timedelta(days=1)
+
+    def compute(self, when: Optional[datetime.datetime] = None, force: bool = False) -> Optional[dict]:
+        # 현재 상태를 구하고, 직전 방송과 다르면 새 스냅숏(아니면 None)
+        when = when or datetime.datetime.now()
+        with self.lock:
+            empty = self.monitor.empty_rooms(when)
+            prev = self.last["empty_rooms"] if self.last else None
+            if prev == empty and not force:
+                return None
+            self.last = _snapshot(empty, prev, when, self.next_boundary(when))
+            return self.last
+
+    def publish(self, snap: dict):
+        for q in list(self.subscribers):
+            if q.full():
+                q.get_nowait()  # 느린 구독자는 오래된 것을 버리고 최신 상태만
+            q.put_nowait(snap)
+        self.sent += 1
+
+    async def _run(self):
+        while self.subscribers:
+            now = datetime.datetime.now()
+            wait = (await asyncio.to_thread(self.next_boundary, now) - now).total_seconds()
+            await asyncio.sleep(max(0.05, min(wait, RECHECK_SECONDS)))
+            snap = await asyncio.to_thread(self.compute)
+            if snap is not None:
+                self.publish(snap)
+        self.task = None
+
+    async def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        if self.task is None or self.task.done():
+            await asyncio.to_thread(self.compute, None, True)  # 쉬는 동안 지난 상태일 수 있으니 새로
+        q.put_nowait(self.last)  # 접속하자마자 현재 상태
+        self.subscribers.add(q)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._run())
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        self.subscribers.discard(q)
+
+    def info(self) -> dict:
+        return {"subscribers": len(self.subscribers), "broadcasts": self.sent,
+                "next_change": self.last["next_change"] if self.last else None}
+
+room_events = RoomBroadcaster()
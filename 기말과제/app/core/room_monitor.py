@@ -1,16 +1,201 @@
 # backend/core/room_monitor.py
-import pandas as pd
+# 강의실 사용 기록(CSV) → 점유 색인
+# 요청마다 CSV 를 다시 읽고 시각을 문자열로 비교하던 것을, 한 번 만든 색인으로 답한다.
+#  - 강의실 → 요일(0=월 … 6=일) → 겹치지 않게 합친 [시작, 끝) 구간 (자정부터 분 단위, 시작 순 정렬)
+#  - "지금 빈 방", "T 시각부터 D분 동안 빈 방" = 방마다 이분 탐색 한 번
+#  - 파일 mtime 이 바뀔 때만 다시 만든다
+# 요일 컬럼(day/요일)이 없으면 timestamp 의 요일, 그것도 없으면 매일 같은 시간표로 본다.
+# 솔버로 배정한 시간표가 있으면(availability.room_availability) 그 시간표에서 쓰이는 방도 빈 방에서 뺀다.
+import bisect
+import csv
 import datetime
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
 
-def load_usage_data(path="backend/db/courses_data.csv"):
-    df = pd.read_csv(path)
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-    return df
-
-def get_current_empty_rooms(df):
-    now = datetime.datetime.now().time()
-    current_df = df[df["time_start"] <= str(now)]
-    current_df = current_df[current_df["time_end"] >= str(now)]
-    empty_rooms = df["room"].unique().tolist()
-    used_rooms = current_df["room"].unique().tolist()
-    return [r for r in empty_rooms if r not in used_rooms]
+from .availability import AvailabilityRegistry, room_availability
+from ..db.catalog import RefreshCheck
+
+USAGE_PATH = os.getenv("ROOM_USAGE_CSV", str(Path(__file__).resolve().parents[1] / "db" / "courses_data.csv"))
+REFRESH_CHECK_SECONDS = 1.0
+DAY_MINUTES = 24 * 60
+DAY_NAMES = ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"]
+_DAY_ALIASES = {**{d: i for i, d in enumerate(DAY_NAMES)}, **{d: i for i, d in enumerate("월화수목금토일")}}
+
+ROOM_COLS = ("room", "강의실", "호실")
+START_COLS = ("time_start", "start", "시작")
+END_COLS = ("time_end", "end", "종료")
+DAY_COLS = ("day", "weekday", "요일")
+TS_COLS = ("timestamp",)
+
+Intervals = Tuple[List[int], List[int]]   # (시작 분 목록, 끝 분 목록)
+
+# ---------- 파싱 ----------
+def to_minutes(s) -> Optional[int]:
+    # "9:00", "09:00:00", "2024-03-04 09:00" → 540
+    s = str(s or "").strip()
+    if not s:
+        return None
+    if " " in s or "T" in s:
+        s = s.replace("T", " ").split(" ")[-1]
+    try:
+        parts = [int(float(p)) for p in s.split(":")[:2]]
+    except ValueError:
+        return None
+    h, m = (parts + [0])[:2]
+    return h * 60 + m if 0 <= h <= 24 and 0 <= m < 60 else None
+
+def parse_day(s) -> Optional[int]:
+    s = str(s or "").strip()
+    if not s:
+        return None
+    if s.isdigit():
+        return int(s) % 7
+    return _DAY_ALIASES.get(s[:3].upper(), _DAY_ALIASES.get(s[:1]))
+
+def _parse_ts_day(s) -> Optional[int]:
+    try:
+        return datetime.datetime.fromisoformat(str(s).strip()).weekday()
+    except ValueError:
+        return None
+
+def _col(header, names) -> Optional[str]:
+    return next((n for n in names if n in header), None)
+
+def _merge(spans: List[Tuple[int, int]]) -> Intervals:
+    starts, ends = [], []
+    for s, e in sorted(spans):
+        if starts and s <= ends[-1]:
+            ends[-1] = max(ends[-1], e)
+        else:
+            starts.append(s)
+            ends.append(e)
+    return starts, ends
+
+# ---------- 색인 ----------
+class OccupancyIndex:
+    def __init__(self, busy: Dict[str, Dict[int, Intervals]], rooms: Iterable[str]):
+        self.busy = busy
+        self.rooms = sorted(rooms)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> "OccupancyIndex":
+        rows = list(rows)
+        header = set(rows[0]) if rows else set()
+        rc, sc, ec = _col(header, ROOM_COLS), _col(header, START_COLS), _col(header, END_COLS)
+        dc, tc = _col(header, DAY_COLS), _col(header, TS_COLS)
+        if not (rc and sc and ec):
+            return cls({}, [])
+        spans: Dict[str, Dict[int, List[Tuple[int, int]]]] = {}
+        rooms = set()
+        for r in rows:
+            room = str(r.get(rc) or "").strip()
+            if not room:
+                continue
+            rooms.add(room)
+            s, e = to_minutes(r.get(sc)), to_minutes(r.get(ec))
+            if s is None or e is None:
+                continue
+            if e <= s:
+                e = DAY_MINUTES  # 자정을 넘기는 기록은 그날 끝까지
+            day = parse_day(r.get(dc)) if dc else None
+            if day is None and tc:
+                day = _parse_ts_day(r.get(tc))
+            for d in ([day] if day is not None else range(7)):
+                spans.setdefault(room, {}).setdefault(d, []).append((s, e))
+        busy = {room: {d: _merge(v) for d, v in days.items()} for room, days in spans.items()}
+        return cls(busy, rooms)
+
+    def is_free(self, room: str, day: int, minute: int, duration: int = 0) -> bool:
+        # [minute, minute + duration) 동안 (duration=0 이면 그 순간) 사용 구간과 겹치지 않는가
+        starts, ends = self.busy.get(room, {}).get(day, ((), ()))
+        i = bisect.bisect_right(starts, minute) - 1
+        if i >= 0 and ends[i] > minute:
+            return False
+        return i + 1 >= len(starts) or starts[i + 1] >= minute + max(duration, 1)
+
+    def empty_at(self, day: int, minute: int, duration: int = 0) -> List[str]:
+        return [r for r in self.rooms if self.is_free(r, day, minute, duration)]
+
+    def next_change(self, room: str, day: int, minute: int) -> Optional[int]:
+        # 그날 안에서 이 방의 상태(빈/사용)가 다음에 바뀌는 시각(분). 없으면 None
+        starts, ends = self.busy.get(room, {}).get(day, ((), ()))
+        i = bisect.bisect_right(starts, minute) - 1
+        if i >= 0 and ends[i] > minute:
+            return ends[i] if ends[i] < DAY_MINUTES else None
+        return starts[i + 1] if i + 1 < len(starts) else None
+
+    def next_boundary(self, day: int, minute: int) -> Optional[int]:
+        # 어느 방이든 상태가 바뀌는 가장 가까운 시각(분, 그날 안)
+        times = [t for t in (self.next_change(r, day, minute) for r in self.busy) if t is not None]
+        return min(times) if times else None
+
+def read_usage_rows(path: str) -> List[dict]:
+    for enc in ("utf-8-sig", "cp949"):
+        try:
+            with open(path, encoding=enc, newline="") as f:
+                return [{(k or "").strip(): v for k, v in row.items()} for row in csv.DictReader(f)]
+        except UnicodeDecodeError:
+            continue
+    return []
+
+def load_usage_index(path: str = USAGE_PATH) -> OccupancyIndex:
+    return OccupancyIndex.from_rows(read_usage_rows(path))
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+class RoomMonitor:
+    def __init__(self, path: str = USAGE_PATH, timetable: Optional[AvailabilityRegistry] = room_availability):
+        self.path = path
+        self.timetable = timetable
+        self.index: Optional[OccupancyIndex] = None
+        self.mtime: Optional[float] = None
+        self.loaded_at: Optional[float] = None
+        self.refresh_check = RefreshCheck(REFRESH_CHECK_SECONDS, _mtime)  # 세대 번호 대신 파일 수정 시각
+        self.lock = threading.Lock()
+
+    def current(self) -> OccupancyIndex:
+        if self.index is not None and self.refresh_check.recent():
+            return self.index
+        mtime = self.refresh_check.read(self.path)
+        if self.index is None or mtime != self.mtime:
+            with self.lock:
+                if self.index is None or mtime != self.mtime:
+                    self.index = load_usage_index(self.path) if mtime is not None else OccupancyIndex({}, [])
+                    self.mtime, self.loaded_at = mtime, time.time()
+        return self.index
+
+    def empty_rooms(self, when: Optional[datetime.datetime] = None, duration: int = 0) -> List[str]:
+        when = when or datetime.datetime.now()
+        idx = self.current()
+        day, minute = when.weekday(), when.hour * 60 + when.minute
+        av = self.timetable.published if self.timetable is not None else None
+        if av is None:
+            return idx.empty_at(day, minute, duration)
+        busy = av.busy_at(when, duration)
+        return [r for r in sorted(set(idx.rooms) | set(av.index))
+                if r not in busy and idx.is_free(r, day, minute, duration)]
+
+    def next_boundary(self, when: datetime.datetime) -> Optional[datetime.datetime]:
+        # 그날 안에서 어느 방이든 상태가 바뀌는 가장 가까운 시각 (사용 기록 + 배정 시간표). 없으면 None
+        t = self.current().next_boundary(when.weekday(), when.hour * 60 + when.minute)
+        times = [datetime.datetime.combine(when.date(), datetime.time()) + datetime.timedelta(minutes=t)] \
+            if t is not None and t < DAY_MINUTES else []
+        av = self.timetable.published if self.timetable is not None else None
+        nxt = av.next_change_at(when) if av is not None else None
+        if nxt is not None:
+            times.append(nxt)
+        return min(times) if times else None
+
+    def info(self) -> dict:
+        idx = self.index
+        return {"path": self.path, "rooms": len(idx.rooms) if idx else 0, "mtime": self.mtime,
+                "loaded_at": self.loaded_at}
+
+room_monitor = RoomMonitor()
@@ -1,171 +1,791 @@
-from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional
-from ortools.sat.python import cp_model
-import random
-
-# ---------- 데이터 모델 ----------
-@dataclass
-class Course:
-    id: str
-    name: str
-    size: int = 30
-    sessions_per_week: int = 1
-    duration_blocks: int = 1
-    instructor_id: str = "inst-unknown"
-
-@dataclass
-class Room:
-    id: str
-    name: str
-    capacity: int = 40
-    tags: Optional[List[str]] = None
-
-@dataclass
-class Instructor:
-    id: str
-    name: str
-    unavailable: Optional[List[Tuple[str, int]]] = None  # (DAY, BLOCK)
-
-@dataclass
-class Grid:
-    days: List[str]
-    blocks_per_day: int
-    block_minutes: int = 50
-
-    def slots(self):
-        return [(d, b) for d in self.days for b in range(1, self.blocks_per_day + 1)]
-
-    def is_evening(self, block: int) -> bool:
-        # 마지막 2교시를 저녁으로 간주
-        return block >= max(1, self.blocks_per_day - 2)
-
-@dataclass
-class Hard:
-    no_friday_evening: bool = False
-
-@dataclass
-class Soft:
-    # “같은 요일 압축 선호”는 완전 제거. 오전 선호만.
-    prefer_morning: bool = False
-    weight: int = 1
-
-@dataclass
-class Request:
-    grid: Grid
-    hard: Hard
-    soft: Soft
-    randomize: bool = True  # 매 실행 랜덤 탐색
-
-# ---------- 솔버 ----------
-def solve(courses: List[Course], rooms: List[Room], instructors: List[Instructor], req: Request):
-    model = cp_model.CpModel()
-    grid = req.grid
-
-    # 슬롯/방 순서를 섞어서 매 실행 해가 달라지도록
-    days = list(grid.days)
-    blocks = list(range(1, grid.blocks_per_day + 1))
-    slots = [(d, b) for d in days for b in blocks]
-    rooms_order = rooms[:]
-    if req.randomize:
-        random.shuffle(days)
-        random.shuffle(blocks)
-        slots = [(d, b) for d in days for b in blocks]
-        random.shuffle(slots)
-        random.shuffle(rooms_order)
-
-    inst_by_id = {i.id: i for i in instructors}
-
-    # 결정변수 X[c, s, day, block, room] ∈ {0,1}
-    X: Dict[tuple, cp_model.IntVar] = {}
-    for c in courses:
-        for s in range(c.sessions_per_week):
-            for (d, b) in slots:
-                if b + c.duration_blocks - 1 > grid.blocks_per_day:
-                    continue
-                for r in rooms_order:
-                    if r.capacity < c.size:
-                        continue
-                    X[(c.id, s, d, b, r.id)] = model.NewBoolVar(f"x_{c.id}_{s}_{d}_{b}_{r.id}")
-
-    # 1) 각 세션은 정확히 1자리
-    for c in courses:
-        for s in range(c.sessions_per_week):
-            model.Add(sum(X.get((c.id, s, d, b, r.id), 0) for (d, b) in slots for r in rooms_order) == 1)
-
-    # 2) 같은 방·같은 시간 시작 ≤ 1
-    for r in rooms_order:
-        for d, b in slots:
-            starts = [X[(c.id, s, d, b, r.id)]
-                      for c in courses
-                      for s in range(c.sessions_per_week)
-                      if (c.id, s, d, b, r.id) in X]
-            if starts:
-                model.Add(sum(starts) <= 1)
-
-    # 3) 강사 중복 금지
-    for inst in instructors:
-        for d, b in slots:
-            vars_same = []
-            for c in courses:
-                if c.instructor_id != inst.id:
-                    continue
-                for s in range(c.sessions_per_week):
-                    for r in rooms_order:
-                        v = X.get((c.id, s, d, b, r.id))
-                        if v is not None:
-                            vars_same.append(v)
-            if vars_same:
-                model.Add(sum(vars_same) <= 1)
-
-    # 4) 강사 불가 시간
-    for c in courses:
-        unav = inst_by_id.get(c.instructor_id).unavailable if inst_by_id.get(c.instructor_id) else None
-        if not unav:
-            continue
-        for (ud, ub) in unav:
-            for s in range(c.sessions_per_week):
-                for r in rooms_order:
-                    v = X.get((c.id, s, ud, ub, r.id))
-                    if v is not None:
-                        model.Add(v == 0)
-
-    # 5) 금요일 저녁 금지 (옵션)
-    if req.hard.no_friday_evening:
-        for c in courses:
-            for s in range(c.sessions_per_week):
-                for r in rooms_order:
-                    for b in range(1, grid.blocks_per_day + 1):
-                        if grid.is_evening(b):
-                            v = X.get((c.id, s, "FRI", b, r.id))
-                            if v is not None:
-                                model.Add(v == 0)
-
-    # 6) 소프트: 오전 선호만 (compact 없음)
-    penalties = []
-    if req.soft.prefer_morning:
-        for key, var in X.items():
-            _, _, _, b, _ = key
-            if b <= 3:
-                penalties.append(var * (-req.soft.weight))  # 보너스(음수 벌점)
-    if penalties:
-        model.Minimize(sum(penalties))
-
-    # 풀이
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 10.0
-    if req.randomize:
-        solver.parameters.random_seed = random.randint(1, 1_000_000)
-
-    status = solver.Solve(model)
-    result = []
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        for (c_id, s, d, b, r_id), var in X.items():
-            if solver.Value(var) == 1:
-                result.append({
-                    "course_id": c_id,
-                    "session_index": s,
-                    "day": d,
-                    "block": b,
-                    "room_id": r_id
-                })
-    return {"status": int(status), "assignments": result}
+from dataclasses import dataclass, field, replace
+from collections import defaultdict
+from typing import List, Dict, Tuple, Optional, Callable
+from ortools.sat.python import cp_model
+import bisect
+import heapq
+import os
+import random
+import time
+
+from .availability import RoomAvailability
+
+# ---------- 데이터 모델 ----------
+@dataclass
+class Course:
+    id: str
+    name: str
+    size: int = 30
+    sessions_per_week: int = 1
+    duration_blocks: int = 1
+    instructor_id: str = "inst-unknown"
+    department: str = ""
+
+@dataclass
+class Room:
+    id: str
+    name: str
+    capacity: int = 40
+    tags: Optional[List[str]] = None
+
+@dataclass
+class Instructor:
+    id: str
+    name: str
+    unavailable: Optional[List[Tuple[str, int]]] = None  # (DAY, BLOCK)
+
+@dataclass
+class Grid:
+    days: List[str]
+    blocks_per_day: int
+    block_minutes: int = 50
+
+    def slots(self):
+        return [(d, b) for d in self.days for b in range(1, self.blocks_per_day + 1)]
+
+    def is_evening(self, block: int) -> bool:
+        # 마지막 2교시를 저녁으로 간주
+        return block >= max(1, self.blocks_per_day - 2)
+
+@dataclass
+class Hard:
+    no_friday_evening: bool = False
+
+@dataclass
+class Soft:
+    # “같은 요일 압축 선호”는 완전 제거. 오전 선호만.
+    prefer_morning: bool = False
+    weight: int = 1
+
+@dataclass
+class Request:
+    grid: Grid
+    hard: Hard
+    soft: Soft
+    randomize: bool = True  # 매 실행 랜덤 탐색
+    engine: str = "dense"   # "dense": 슬롯×방 BoolVar / "interval": 선택적 구간 + NoOverlap / "decomposed": 분할 풀이
+    time_limit: float = 10.0
+    # 증분 재배정용: 이전 배정(assignment dict 목록)
+    hint: Optional[List[dict]] = None    # AddHint 로만 사용
+    fixed: Optional[List[dict]] = None   # 그대로 고정
+    keep_weight: int = 0                 # hint 와 달라진 세션 1개당 벌점 (0이면 벌점 없음)
+    occupied: Optional[List[dict]] = None  # 이 풀이 밖에서 이미 쓰는 방 (assignment dict — 방·시간만 막는다)
+    # 병렬/재현성/대안 해
+    workers: int = 0                     # CP-SAT 탐색 워커 수 (0 = CPU 개수)
+    seed: Optional[int] = None           # 지정하면 섞기·탐색 모두 이 시드로 고정 (결과 재현)
+    pool_size: int = 1                   # 서로 다른 해를 최대 몇 개까지 모을지
+    warm_start: bool = False             # hint 가 없으면 그리디 결과를 힌트로 사용
+
+ENGINES = ("dense", "interval", "decomposed")
+# 시드를 줬을 때는 결정적 시간으로만 끊는다 (벽시계로 끊으면 같은 시드라도 결과가 달라진다).
+# 요청 1초당 결정적 시간 예산 = 계수 × (1000 / 변수 수) ** 지수. 같은 입력이면 변수 수도 같으니 재현성은 그대로다.
+# 1 CPU, warm start, 4초 풀이에서 잰 결정적 시간/벽시계 비율:
+#   interval  278 변수 0.109, 1174 변수 0.018, 3694 변수 0.0018  → 변수 수의 1.5제곱에 반비례로 맞춤
+#   dense    6868 변수 0.21, 134k 변수 0.14 (1.4M 변수는 4초 안에 presolve 도 못 끝냄) → 거의 일정
+# 벽시계는 time_limit × SEEDED_WALL_FACTOR 의 안전선으로만 두고, 거기에 걸리면 stats.deterministic=False 로 알린다.
+# SOLVER_DTIME_PER_SECOND 를 주면 엔진·크기와 상관없이 그 값을 쓴다.
+DTIME_PER_SECOND = {"dense": (0.1, 0.0), "interval": (0.016, 1.5)}
+if os.getenv("SOLVER_DTIME_PER_SECOND"):
+    DTIME_PER_SECOND = dict.fromkeys(DTIME_PER_SECOND, (float(os.environ["SOLVER_DTIME_PER_SECOND"]), 0.0))
+SEEDED_WALL_FACTOR = 3.0
+# 대안 해(pool_size > 1)를 목적함수와 함께 찾을 때, 같은 품질의 다른 해를 열거하는 데 남겨 두는 시간 비율
+POOL_SHARE = 0.3
+
+# 빌더가 돌려주는 모델 핸들
+@dataclass
+class _Built:
+    decode: Callable                        # solver -> assignments
+    place: Callable                         # assignment dict -> 해당 배치를 뜻하는 리터럴 (불가능하면 None)
+    hint: Callable                          # assignment dict -> None (AddHint)
+    objective: list = field(default_factory=list)
+
+# ---------- CSV 행 → 모델 ----------
+# 강의실 정보가 없는 데이터용 기본 강의실
+DEFAULT_ROOMS = [
+    Room("R101", "101호", 30), Room("R102", "102호", 30),
+    Room("R201", "201호", 45), Room("R202", "202호", 45),
+    Room("L301", "301호(실습실)", 60, ["lab"]),
+]
+
+def _int(x, default=0) -> int:
+    try:
+        return int(float(str(x).strip()))
+    except (TypeError, ValueError):
+        return default
+
+def problem_from_rows(rows: List[dict]) -> Tuple[List[Course], List[Room], List[Instructor]]:
+    # rows: code, name, professor, dept, size, credits, kind, room (api/schedule.load_courses 형식)
+    # 실습은 학점만큼 연속 블록 1회, 그 외는 학점만큼 1블록 세션
+    courses, seen = [], defaultdict(int)
+    for row in rows:
+        code = str(row.get("code") or row.get("name") or f"C{len(courses) + 1}")
+        seen[code] += 1
+        cid = code if seen[code] == 1 else f"{code}-{seen[code]}"
+        credits = max(1, _int(row.get("credits"), 1))
+        lab = "실습" in str(row.get("kind") or "")
+        courses.append(Course(
+            id=cid,
+            name=str(row.get("name") or cid),
+            size=_int(row.get("size"), 30) or 30,
+            sessions_per_week=1 if lab else credits,
+            duration_blocks=credits if lab else 1,
+            instructor_id=str(row.get("professor") or "inst-unknown"),
+            department=str(row.get("dept") or ""),
+        ))
+
+    room_ids = sorted({str(r.get("room")) for r in rows if r.get("room")})
+    if room_ids:
+        cap = max([c.size for c in courses] + [40])
+        rooms = [Room(r, r, cap) for r in room_ids]
+    else:
+        rooms = list(DEFAULT_ROOMS)
+
+    instructors = [Instructor(i, i) for i in sorted({c.instructor_id for c in courses})]
+    return courses, rooms, instructors
+
+# ---------- 공통 유틸 ----------
+def _unavailable(inst_by_id: Dict[str, Instructor], c: Course) -> set:
+    inst = inst_by_id.get(c.instructor_id)
+    return set(inst.unavailable or []) if inst else set()
+
+def _start_ok(c: Course, d: str, b: int, grid: Grid, unav: set, hard: Hard) -> bool:
+    # 시작 블록만이 아니라 수업이 차지하는 모든 블록(b ~ b+duration-1)을 검사
+    last = b + c.duration_blocks - 1
+    if last > grid.blocks_per_day:
+        return False
+    for k in range(b, last + 1):
+        if (d, k) in unav:
+            return False
+        if hard.no_friday_evening and d == "FRI" and grid.is_evening(k):
+            return False
+    return True
+
+def _key(a: dict) -> tuple:
+    return (a["course_id"], a["session_index"])
+
+def _rng(req: Request) -> random.Random:
+    return random.Random(req.seed) if req.seed is not None else random.Random()
+
+# 탐색 중 찾은 해를 목적값 기준 상위 N개(중복 제거)로 모은다. on_solution 이 있으면 새 해마다 알려 준다.
+class _PoolCallback(cp_model.CpSolverSolutionCallback):
+    def __init__(self, decode: Callable, size: int, has_objective: bool, stop_when_full: bool = False,
+                 on_solution: Optional[Callable[[dict], None]] = None):
+        super().__init__()
+        self.decode = decode
+        self.size = size
+        self.has_objective = has_objective
+        self.fixed_objective = 0.0  # has_objective=False 일 때 기록할 목적값
+        self.stop_when_full = stop_when_full
+        self.on_solution = on_solution
+        self.seen = set()
+        self.pool: list = []  # (objective, assignments)
+
+    def on_solution_callback(self):
+        assignments = self.decode(self)
+        sig = frozenset((a["course_id"], a["session_index"], a["day"], a["block"], a["room_id"]) for a in assignments)
+        if sig in self.seen:
+            return
+        self.seen.add(sig)
+        obj = self.ObjectiveValue() if self.has_objective else self.fixed_objective
+        if self.on_solution is not None:
+            self.on_solution({"objective": obj, "elapsed": round(self.WallTime(), 3), "assignments": assignments})
+        self.pool.append((obj, assignments))
+        self.pool.sort(key=lambda x: x[0])
+        del self.pool[self.size:]
+        if self.stop_when_full and len(self.pool) >= self.size:
+            self.StopSearch()
+
+def _wall_limit(seconds: float, seed: Optional[int]) -> float:
+    return max(0.0, seconds) * (SEEDED_WALL_FACTOR if seed is not None else 1.0)
+
+def _dtime_limit(seconds: float, engine: str, num_vars: int) -> float:
+    coef, exp = DTIME_PER_SECOND.get(engine, DTIME_PER_SECOND["interval"])
+    return max(0.0, seconds) * coef * (1000 / max(num_vars, 1)) ** exp
+
+def _set_limits(solver: cp_model.CpSolver, seconds: float, seed: Optional[int], engine: str, num_vars: int):
+    # 시드가 없으면 벽시계 한도(요청한 시간)로, 있으면 결정적 시간 한도로 끊는다 (벽시계는 안전선)
+    solver.parameters.max_time_in_seconds = _wall_limit(seconds, seed)
+    if seed is not None:
+        solver.parameters.random_seed = seed
+        solver.parameters.max_deterministic_time = _dtime_limit(seconds, engine, num_vars)
+
+def _stopped_by(solver: cp_model.CpSolver, status) -> str:
+    # 탐색을 끝낸 이유: completed(증명 끝) / deterministic_time / time_limit(벽시계 — 재현 보장 X) / stopped(콜백)
+    if status in (cp_model.OPTIMAL, cp_model.INFEASIBLE):
+        return "completed"
+    p = solver.parameters
+    if p.max_deterministic_time < float("inf") and solver.deterministic_time >= p.max_deterministic_time * 0.999:
+        return "deterministic_time"
+    if solver.wall_time >= p.max_time_in_seconds * 0.99:
+        return "time_limit"
+    return "stopped"
+
+def check_request(req: Request):
+    # 풀기 전에 거절할 조합 (API 는 400 으로 돌려준다)
+    if req.engine not in ENGINES:
+        raise ValueError(f"unknown engine: {req.engine}")
+    if req.engine == "decomposed" and req.pool_size > 1:
+        raise ValueError("decomposed 엔진은 대안 해(pool_size > 1)를 지원하지 않습니다")
+
+# ---------- 솔버 ----------
+def solve(courses: List[Course], rooms: List[Room], instructors: List[Instructor], req: Request,
+          on_solution: Optional[Callable[[dict], None]] = None):
+    # on_solution: 탐색 중 개선 해를 찾을 때마다 {"objective", "elapsed", "assignments"} 로 호출 (진행 상황 스트리밍용)
+    check_request(req)
+    if req.engine == "decomposed":
+        from .decompose import solve_decomposed  # decompose 가 이 모듈을 import 하므로 지연 import
+        return solve_decomposed(courses, rooms, instructors, req, on_solution)
+    t0 = time.perf_counter()
+    model = cp_model.CpModel()
+    build = _build_interval if req.engine == "interval" else _build_dense
+    built = build(model, courses, rooms, instructors, req)
+
+    # 증분: 고정 / 힌트 / 변경 벌점
+    objective = list(built.objective)
+    for a in req.fixed or []:
+        lit = built.place(a)
+        if lit is None:
+            model.AddBoolOr([])  # 고정 배치 자체가 불가능 → INFEASIBLE
+        else:
+            model.Add(lit == 1)
+    for a in req.hint or []:
+        built.hint(a)
+        if req.keep_weight:
+            lit = built.place(a)
+            if lit is not None:
+                objective.append(req.keep_weight * (1 - lit))
+    warm = None
+    if req.warm_start and not req.hint:
+        warm = greedy(courses, rooms, instructors, req)
+        for a in warm["assignments"]:
+            built.hint(a)
+    if objective:
+        model.Minimize(sum(objective))
+    build_seconds = time.perf_counter() - t0
+    proto = model.Proto()
+    num_vars, num_constraints = len(proto.variables), len(proto.constraints)
+
+    # 풀이 (대안 해 열거까지 합쳐 벽시계 time_limit 안에서 끝난다 — 시드가 있으면 결정적 시간 한도로 끊고 벽시계는 안전선)
+    workers = req.workers if req.workers > 0 else (os.cpu_count() or 1)
+    fill_pool = req.pool_size > 1 and bool(objective)
+    main_limit = req.time_limit * (1 - POOL_SHARE) if fill_pool else req.time_limit
+    solver = cp_model.CpSolver()
+    _set_limits(solver, main_limit, req.seed, req.engine, num_vars)
+    solver.parameters.num_workers = workers
+    if req.seed is not None:
+        # 같은 시드면 같은 결과: 워커를 결정적으로 교차 실행하고 결정적 시간으로 끊는다
+        solver.parameters.interleave_search = workers > 1
+    elif req.randomize:
+        solver.parameters.random_seed = random.randint(1, 1_000_000)
+    if num_vars > 2000:
+        # 큰 모델은 presolve probing 비용이 풀이보다 크다 (interval 1000 세션 ≈ 4300 변수에서 probing 만 3초,
+        # 5초 한도면 presolve 뒤 바로 멈춰 힌트도 못 쓴다)
+        solver.parameters.cp_model_probing_level = 0
+
+    pool_cb = None
+    if req.pool_size > 1 or on_solution is not None:
+        pool_cb = _PoolCallback(built.decode, req.pool_size, bool(objective),
+                                stop_when_full=req.pool_size > 1 and not objective, on_solution=on_solution)
+        if req.pool_size > 1 and not objective:
+            # 목적함수가 없으면 해 열거로 바로 N개를 모은다 (단일 워커에서만 지원)
+            solver.parameters.enumerate_all_solutions = True
+            solver.parameters.num_workers = 1
+            solver.parameters.interleave_search = False
+
+    t1 = time.perf_counter()
+    deadline = t1 + _wall_limit(req.time_limit, req.seed)
+    status = solver.Solve(model, pool_cb)
+    ok = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    stops = [_stopped_by(solver, status)]
+
+    # 목적함수가 있으면 개선 해만 콜백에 오므로, 모자란 만큼 최적값과 같은 품질의 다른 해를 열거한다.
+    # 남겨 둔 몫(POOL_SHARE) + 본 풀이가 일찍 끝나 남은 시간을 쓴다. 결정적 시간은 남겨 둔 몫만큼으로 고정
+    if fill_pool and ok and len(pool_cb.pool) < req.pool_size and deadline - time.perf_counter() > 0.05:
+        best = solver.ObjectiveValue()
+        model.Add(sum(objective) <= round(best))
+        model.ClearObjective()
+        model.ClearHints()
+        pool_cb.has_objective = False
+        pool_cb.fixed_objective = best
+        pool_cb.stop_when_full = True
+        extra = cp_model.CpSolver()
+        extra.parameters.enumerate_all_solutions = True
+        extra.parameters.num_workers = 1
+        _set_limits(extra, req.time_limit * POOL_SHARE, req.seed, req.engine, num_vars)
+        extra.parameters.max_time_in_seconds = deadline - time.perf_counter()
+        stops.append(_stopped_by(extra, extra.Solve(model, pool_cb)))
+    solve_seconds = time.perf_counter() - t1
+
+    result = []
+    if ok:
+        result = built.decode(solver)
+    elif warm is not None and warm["status"] == cp_model.FEASIBLE and status != cp_model.INFEASIBLE:
+        # 시간 안에 해를 못 찾았어도 그리디가 전부 배치했으면 그 결과를 돌려준다 (빈 시간표 대신)
+        status, result = cp_model.FEASIBLE, warm["assignments"]
+    out = {
+        "status": int(status),
+        "assignments": result,
+        "engine": req.engine,
+        "stats": {
+            "build_seconds": round(build_seconds, 4),
+            "solve_seconds": round(solve_seconds, 4),
+            "num_vars": num_vars,
+            "num_constraints": num_constraints,
+            "workers": workers,
+            "seed": req.seed,
+            "stopped_by": stops[0],
+            # 벽시계 한도에 걸린 풀이가 하나라도 있으면 같은 시드라도 결과가 달라질 수 있다
+            "deterministic": req.seed is not None and "time_limit" not in stops,
+        },
+    }
+    if ok and objective:
+        out["objective"] = solver.ObjectiveValue()
+    elif result:
+        out["stats"]["fallback"] = "greedy"
+        if objective:
+            out["objective"] = float(_morning_bonus(result, req))
+    if req.pool_size > 1:
+        out["pool"] = [{"objective": obj, "assignments": a} for obj, a in pool_cb.pool]
+        # 요청한 만큼 못 모았으면 알 수 있도록 (같은 품질의 해가 더 없거나 시간이 모자람)
+        out["stats"]["pool_requested"] = req.pool_size
+        out["stats"]["pool_found"] = len(pool_cb.pool)
+    return out
+
+# ---------- 그리디 (즉시 미리보기 / CP-SAT 힌트) ----------
+# 세션을 "배치 선택지가 적은 것, 긴 것, 큰 것" 순으로 한 번 정렬(DSATUR 의 포화도 대신 초기 선택지 수)하고
+# 첫 번째로 맞는 (시각, 방)에 넣는다. 점유는 비트마스크(int)로 관리:
+#   avail          : 전역 블록별 쓰이는 방들 (비트 i = 정원 오름차순 i번째 방, availability.RoomAvailability — /v1/rooms 와 같은 구조,
+#                    req.occupied 로 이미 쓰이는 방을 미리 채운다)
+#   inst_mask[id]  : 강사가 묶인 전역 블록들
+# 방은 들어가는 것 중 가장 작은 방(가장 낮은 비트)부터(best fit). 실패한 세션은 unassigned 로 돌려준다.
+def greedy(courses: List[Course], rooms: List[Room], instructors: List[Instructor], req: Request):
+    t0 = time.perf_counter()
+    grid = req.grid
+    T = grid.blocks_per_day
+    inst_by_id = {i.id: i for i in instructors}
+    avail = RoomAvailability.from_assignments(rooms, grid, req.occupied or [])
+    rooms_sorted, caps = avail.rooms, avail.caps
+    inst_mask: Dict[str, int] = defaultdict(int)
+    day_load = [0] * len(grid.days)
+
+    sessions = []
+    for c in courses:
+        unav = _unavailable(inst_by_id, c)
+        starts = [(di, b) for di, d in enumerate(grid.days) for b in range(1, T + 1)
+                  if _start_ok(c, d, b, grid, unav, req.hard)]
+        lo = bisect.bisect_left(caps, c.size)
+        eligible = avail.candidates(c.size)
+        for s in range(c.sessions_per_week):
+            sessions.append((len(starts) * (len(caps) - lo), -c.duration_blocks, -c.size, c.id, s, c, starts, eligible))
+    sessions.sort(key=lambda x: x[:5])
+
+    assignments, unassigned = [], []
+    for *_, c_id, s, c, starts, eligible in sessions:
+        dur = c.duration_blocks
+        span = (1 << dur) - 1
+        inst_key = c.instructor_id if c.instructor_id in inst_by_id else None
+        if req.soft.prefer_morning:
+            order = sorted(starts, key=lambda x: (x[1] > 3, day_load[x[0]], x[1]))
+        else:
+            order = sorted(starts, key=lambda x: (day_load[x[0]], x[1]))
+        placed = None
+        for di, b in order:
+            t = di * T + b - 1
+            if inst_key is not None and inst_mask[inst_key] & (span << t):
+                continue
+            free = avail.free_mask_t(t, dur, eligible)
+            if free:
+                placed = (di, b, t, (free & -free).bit_length() - 1)
+                break
+        if placed is None:
+            unassigned.append({"course_id": c_id, "session_index": s})
+            continue
+        di, b, t, idx = placed
+        avail.occupy_t(idx, t, dur)
+        if inst_key is not None:
+            inst_mask[inst_key] |= span << t
+        day_load[di] += dur
+        r = rooms_sorted[idx]
+        assignments.append({
+            "course_id": c_id,
+            "session_index": s,
+            "day": grid.days[di],
+            "block": b,
+            "duration_blocks": c.duration_blocks,
+            "room_id": r.id
+        })
+
+    elapsed = time.perf_counter() - t0
+    return {
+        # 다 못 넣었다고 문제가 불가능하다는 증명은 아니다 → INFEASIBLE 이 아니라 UNKNOWN + unassigned
+        "status": int(cp_model.FEASIBLE if not unassigned else cp_model.UNKNOWN),
+        "assignments": assignments,
+        "unassigned": unassigned,
+        "engine": "greedy",
+        "stats": {"build_seconds": 0.0, "solve_seconds": round(elapsed, 4), "unassigned": len(unassigned)},
+    }
+
+def _morning_bonus(assignments: List[dict], req: Request) -> int:
+    # 두 모델의 목적값과 같은 기준 (시작 교시 ≤ 3 인 세션마다 -weight)
+    if not req.soft.prefer_morning:
+        return 0
+    return -req.soft.weight * sum(1 for a in assignments if a["block"] <= 3)
+
+def greedy_schedule(items: List[dict], days: List[str], periods_per_day: int, prefer_morning: bool = True) -> List[dict]:
+    # api/schedule.py 용: CSV 행 그대로 받아 배정 목록만 돌려준다
+    courses, rooms, instructors = problem_from_rows(items)
+    req = Request(
+        grid=Grid(days=[d.upper() for d in days], blocks_per_day=periods_per_day),
+        hard=Hard(),
+        soft=Soft(prefer_morning=prefer_morning),
+    )
+    return greedy(courses, rooms, instructors, req)["assignments"]
+
+# ---------- 증분 재배정 ----------
+# previous: 이전 결과의 assignments, pins: 사용자가 직접 옮긴 세션(그 자리에 고정).
+# mode="fix"   : 건드리지 않은 세션은 이전 자리에 고정하고 핀과 겹치는 세션만 다시 배정
+# mode="penalize": 전부 풀어 두되 이전 자리와 달라지면 keep_weight 만큼 벌점
+# fix 가 불가능하면(예: 강사 불가 시간이 바뀌어 연쇄 이동 필요) penalize 로 한 번 더 푼다.
+def resolve(courses: List[Course], rooms: List[Room], instructors: List[Instructor], req: Request,
+            previous: List[dict], pins: Optional[List[dict]] = None, mode: str = "fix", keep_weight: int = 10):
+    grid = req.grid
+    T = grid.blocks_per_day
+    course_by_id = {c.id: c for c in courses}
+    room_by_id = {r.id: r for r in rooms}
+    inst_by_id = {i.id: i for i in instructors}
+    pins = list(pins or [])
+    pinned = {_key(a) for a in pins}
+
+    def span(a):
+        c = course_by_id[a["course_id"]]
+        t = grid.days.index(a["day"]) * T + (a["block"] - 1)
+        return c, t, t + c.duration_blocks
+
+    def still_ok(a):
+        c = course_by_id.get(a["course_id"])
+        r = room_by_id.get(a["room_id"])
+        if c is None or r is None or a["session_index"] >= c.sessions_per_week or a["day"] not in grid.days:
+            return False
+        return r.capacity >= c.size and _start_ok(c, a["day"], a["block"], grid, _unavailable(inst_by_id, c), req.hard)
+
+    bad = [a for a in pins if not still_ok(a)]
+    if bad:
+        raise ValueError(f"고정할 수 없는 배치: {bad}")
+    prev = [a for a in previous if _key(a) not in pinned and still_ok(a)]
+
+    # 핀과 같은 방/같은 강사로 시간이 겹치는 기존 세션은 고정 대상에서 뺀다
+    freed = set()
+    for p in pins:
+        pc, ps, pe = span(p)
+        for a in prev:
+            c, s, e = span(a)
+            if s < pe and ps < e and (a["room_id"] == p["room_id"] or c.instructor_id == pc.instructor_id):
+                freed.add(_key(a))
+    kept = [a for a in prev if _key(a) not in freed]
+
+    base = replace(req, randomize=False, hint=prev + pins, keep_weight=keep_weight)
+    used = mode
+    res = solve(courses, rooms, instructors, replace(base, fixed=pins + (kept if mode == "fix" else [])))
+    if mode == "fix" and res["status"] not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        used = "penalize"
+        res = solve(courses, rooms, instructors, replace(base, fixed=pins))
+
+    before = {_key(a): (a["day"], a["block"], a["room_id"]) for a in previous}
+    res["mode"] = used
+    res["changed"] = sum(1 for a in res["assignments"]
+                         if before.get(_key(a)) != (a["day"], a["block"], a["room_id"]))
+    return res
+
+# ---------- dense 모델: X[c, s, day, block, room] ----------
+def _build_dense(model: cp_model.CpModel, courses: List[Course], rooms: List[Room],
+                 instructors: List[Instructor], req: Request):
+    grid = req.grid
+
+    # 슬롯/방 순서를 섞어서 매 실행 해가 달라지도록
+    days = list(grid.days)
+    blocks = list(range(1, grid.blocks_per_day + 1))
+    slots = [(d, b) for d in days for b in blocks]
+    rooms_order = rooms[:]
+    if req.randomize:
+        rng = _rng(req)
+        rng.shuffle(days)
+        rng.shuffle(blocks)
+        slots = [(d, b) for d in days for b in blocks]
+        rng.shuffle(slots)
+        rng.shuffle(rooms_order)
+
+    inst_by_id = {i.id: i for i in instructors}
+    T = grid.blocks_per_day
+    day_idx = {d: i for i, d in enumerate(grid.days)}
+    avail = RoomAvailability.from_assignments(rooms, grid, req.occupied or [])
+
+    # 결정변수 X[c, s, day, block, room] ∈ {0,1}
+    # 생성하면서 세션/방-슬롯/강사-슬롯 인덱스를 한 번에 만든다 (제약마다 전체 재탐색 X)
+    # 강사 불가 시간·금요일 저녁, 정원 미달 방, 이미 쓰이는 방(occupied)은 변수를 아예 만들지 않는 것으로 처리
+    X: Dict[tuple, cp_model.IntVar] = {}
+    by_session: Dict[tuple, list] = defaultdict(list)
+    by_room_slot: Dict[tuple, list] = defaultdict(list)
+    by_inst_slot: Dict[tuple, list] = defaultdict(list)
+    for c in courses:
+        unav = _unavailable(inst_by_id, c)
+        eligible = avail.candidates(c.size)
+        rooms_ok = [r for r in rooms_order if avail.has(eligible, r.id)]
+        inst_key = c.instructor_id if c.instructor_id in inst_by_id else None
+        for s in range(c.sessions_per_week):
+            by_session[(c.id, s)] = []  # 배정 가능한 자리가 없어도 1) 제약은 걸리도록
+            for (d, b) in slots:
+                if not _start_ok(c, d, b, grid, unav, req.hard):
+                    continue
+                free = avail.free_mask_t(day_idx[d] * T + (b - 1), c.duration_blocks, eligible)
+                for r in rooms_ok:
+                    if not avail.has(free, r.id):
+                        continue
+                    v = model.NewBoolVar(f"x_{c.id}_{s}_{d}_{b}_{r.id}")
+                    X[(c.id, s, d, b, r.id)] = v
+                    by_session[(c.id, s)].append(v)
+                    by_room_slot[(r.id, d, b)].append(v)
+                    if inst_key is not None:
+                        by_inst_slot[(inst_key, d, b)].append(v)
+
+    # 1) 각 세션은 정확히 1자리
+    for vs in by_session.values():
+        model.AddExactlyOne(vs)
+
+    # 2) 점유 구간 (여러 교시 수업 포함)
+    # 세션마다 시작 t = Σ (day_idx*T + block-1)·X, 방마다 presence = Σ X 로 구간을 만들고
+    # 방별·강사별 NoOverlap을 건다. 변수/제약 수는 세션×방에 비례 (duration을 곱하지 않음).
+    room_intervals: Dict[str, list] = defaultdict(list)
+    inst_intervals: Dict[str, list] = defaultdict(list)
+    session_room: Dict[tuple, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
+    session_terms: Dict[tuple, list] = defaultdict(list)
+    for (c_id, s, d, b, r_id), v in X.items():
+        t = day_idx[d] * T + (b - 1)
+        session_room[(c_id, s)][r_id].append(v)
+        session_terms[(c_id, s)].append((t, v))
+    for c in courses:
+        for s in range(c.sessions_per_week):
+            terms = session_terms.get((c.id, s))
+            if not terms:
+                continue
+            start = model.NewIntVarFromDomain(
+                cp_model.Domain.FromValues(sorted({t for t, _ in terms})), f"t_{c.id}_{s}")
+            model.Add(start == sum(t * v for t, v in terms))
+            if c.instructor_id in inst_by_id:
+                inst_intervals[c.instructor_id].append(
+                    model.NewFixedSizeIntervalVar(start, c.duration_blocks, f"iv_{c.id}_{s}"))
+            for r_id, vs in session_room[(c.id, s)].items():
+                p = model.NewBoolVar(f"p_{c.id}_{s}_{r_id}")
+                model.Add(p == sum(vs))
+                room_intervals[r_id].append(
+                    model.NewOptionalFixedSizeIntervalVar(start, c.duration_blocks, p, f"ov_{c.id}_{s}_{r_id}"))
+    for ivs in room_intervals.values():
+        if len(ivs) > 1:
+            model.AddNoOverlap(ivs)
+    for ivs in inst_intervals.values():
+        if len(ivs) > 1:
+            model.AddNoOverlap(ivs)
+
+    # 3) 같은 방·같은 강사의 시작 슬롯 중복 ≤ 1 (2에 포함되지만 전파를 돕는 보조 제약)
+    for vs in by_room_slot.values():
+        if len(vs) > 1:
+            model.AddAtMostOne(vs)
+    for vs in by_inst_slot.values():
+        if len(vs) > 1:
+            model.AddAtMostOne(vs)
+
+    # 4) 소프트: 오전 선호만 (compact 없음)
+    penalties = []
+    if req.soft.prefer_morning:
+        for key, var in X.items():
+            _, _, _, b, _ = key
+            if b <= 3:
+                penalties.append(var * (-req.soft.weight))  # 보너스(음수 벌점)
+
+    duration = {c.id: c.duration_blocks for c in courses}
+
+    def decode(solver: cp_model.CpSolver):
+        result = []
+        for (c_id, s, d, b, r_id), var in X.items():
+            if solver.Value(var) == 1:
+                result.append({
+                    "course_id": c_id,
+                    "session_index": s,
+                    "day": d,
+                    "block": b,
+                    "duration_blocks": duration[c_id],
+                    "room_id": r_id
+                })
+        return result
+
+    def place(a: dict):
+        return X.get((a["course_id"], a["session_index"], a["day"], a["block"], a["room_id"]))
+
+    def hint(a: dict):
+        v = place(a)
+        if v is not None:
+            model.AddHint(v, 1)
+
+    return _Built(decode, place, hint, penalties)
+
+# ---------- interval 모델: 세션당 시작 변수 1개 + 방 유형별 선택적 구간 ----------
+# 시간축은 요일을 이어 붙인 전역 블록 번호 t = day_idx * blocks_per_day + (block - 1).
+# 시작 도메인에서 요일 경계를 넘는 값을 빼므로 구간이 하루를 넘지 않는다.
+# 같은 (정원, 태그) 방들은 서로 바꿔도 되므로 방 유형 단위로 Cumulative(용량 = 방 개수)를 걸고,
+# 실제 방 번호는 풀이 후 유형별 구간 그래프 색칠(시작 시각 순 그리디, 최적)로 정한다.
+# 이미 쓰이는 시간이 있는 방(occupied)은 바꿔 쓸 수 없으므로 방 하나짜리 유형으로 떼어 내고,
+# 그 시간을 고정 구간으로 NoOverlap 에 넣는다.
+def _room_types(rooms: List[Room], single=frozenset()) -> Dict[tuple, List[Room]]:
+    types: Dict[tuple, List[Room]] = defaultdict(list)
+    for r in rooms:
+        key = (r.capacity, tuple(sorted(r.tags or [])))
+        types[key + ((r.id,) if r.id in single else ())].append(r)
+    return types
+
+def _color_rooms(placed: list, type_rooms: List[Room], prefer: Dict[tuple, str]) -> Dict[tuple, str]:
+    # placed: [(start, duration, key)] → {key: room_id}
+    # prefer: 이전 배정의 방 — 비어 있으면 그 방을 유지
+    idx_of = {r.id: i for i, r in enumerate(type_rooms)}
+    free = set(range(len(type_rooms)))
+    busy: list = []  # (end, room_idx)
+    out = {}
+    for start, dur, key in sorted(placed):
+        while busy and busy[0][0] <= start:
+            free.add(heapq.heappop(busy)[1])
+        idx = idx_of.get(prefer.get(key))
+        if idx not in free:
+            idx = min(free)
+        free.remove(idx)
+        out[key] = type_rooms[idx].id
+        heapq.heappush(busy, (start + dur, idx))
+    return out
+
+def _build_interval(model: cp_model.CpModel, courses: List[Course], rooms: List[Room],
+                    instructors: List[Instructor], req: Request):
+    grid = req.grid
+    T = grid.blocks_per_day
+    inst_by_id = {i.id: i for i in instructors}
+    avail = RoomAvailability.from_assignments(rooms, grid, req.occupied or [])
+    busy = {r.id for r in avail.rooms_of(avail.used_mask())}
+    types = _room_types(rooms, frozenset(busy))
+    type_of_room = {r.id: k for k, rs in types.items() for r in rs}
+
+    type_intervals: Dict[tuple, list] = defaultdict(list)
+    inst_intervals: Dict[str, list] = defaultdict(list)
+    sessions = []  # (course_id, s, duration, start, {type_key: presence})
+    start_domain: Dict[tuple, set] = {}
+    bonus = []
+    am: Dict[tuple, tuple] = {}  # (course_id, s) -> (오전 보너스 리터럴, 오전 시작 값들)
+    for c in courses:
+        unav = _unavailable(inst_by_id, c)
+        eligible = avail.candidates(c.size)
+        types_ok = sorted(k for k, rs in types.items() if avail.has(eligible, rs[0].id))  # 작은 방 유형부터
+        starts = [di * T + (b - 1)
+                  for di, d in enumerate(grid.days)
+                  for b in range(1, T + 1)
+                  if _start_ok(c, d, b, grid, unav, req.hard)]
+        for s in range(c.sessions_per_week):
+            if not starts or not types_ok:
+                model.AddBoolOr([])  # 배정 불가 → INFEASIBLE
+                continue
+            start = model.NewIntVarFromDomain(cp_model.Domain.FromValues(starts), f"t_{c.id}_{s}")
+            if c.instructor_id in inst_by_id:
+                inst_intervals[c.instructor_id].append(
+                    model.NewFixedSizeIntervalVar(start, c.duration_blocks, f"iv_{c.id}_{s}"))
+            presence = {}
+            for k in types_ok:
+                p = model.NewBoolVar(f"p_{c.id}_{s}_{len(presence)}")
+                presence[k] = p
+                type_intervals[k].append(
+                    model.NewOptionalFixedSizeIntervalVar(start, c.duration_blocks, p, f"ov_{c.id}_{s}_{len(presence)}"))
+            model.AddExactlyOne(presence.values())
+            sessions.append((c.id, s, c.duration_blocks, start, presence))
+            start_domain[(c.id, s)] = set(starts)
+
+            if req.soft.prefer_morning:
+                morning = [t for t in starts if t % T + 1 <= 3]
+                if morning:
+                    m = model.NewBoolVar(f"am_{c.id}_{s}")
+                    model.AddLinearExpressionInDomain(start, cp_model.Domain.FromValues(morning)).OnlyEnforceIf(m)
+                    bonus.append(m)
+                    am[(c.id, s)] = (m, frozenset(morning))
+
+    for k, rs in types.items():
+        if rs[0].id in busy and type_intervals.get(k):
+            type_intervals[k] += [model.NewFixedSizeIntervalVar(t, d, f"busy_{rs[0].id}_{t}")
+                                  for t, d in avail.busy_spans(rs[0].id)]
+    for k, ivs in type_intervals.items():
+        n = len(types[k])
+        if n == 1:
+            model.AddNoOverlap(ivs)
+        elif len(ivs) > n:
+            model.AddCumulative(ivs, [1] * len(ivs), n)
+    for ivs in inst_intervals.values():
+        if len(ivs) > 1:
+            model.AddNoOverlap(ivs)
+
+    # 탐색 전략은 CP-SAT 기본값에 맡긴다. 세션마다 전략을 거는 것(수천 개)도, 시작 변수 전체에 전략 하나를 거는 것도
+    # bench_scheduler(1000 세션) 에서 도움이 되지 않았다 — 큰 입력은 그리디 warm start 로 첫 해를 잡는다.
+
+    by_key = {(c_id, s): (start, presence) for c_id, s, _, start, presence in sessions}
+    prefer = {_key(a): a["room_id"] for a in (req.hint or []) + (req.fixed or [])}
+
+    def decode(solver: cp_model.CpSolver):
+        placed: Dict[tuple, list] = defaultdict(list)
+        for c_id, s, dur, start, presence in sessions:
+            k = next(k for k, p in presence.items() if solver.Value(p) == 1)
+            placed[k].append((solver.Value(start), dur, (c_id, s)))
+        room_of = {}
+        for k, items in placed.items():
+            room_of.update(_color_rooms(items, types[k], prefer))
+        result = []
+        for c_id, s, dur, start, _ in sessions:
+            t = solver.Value(start)
+            result.append({
+                "course_id": c_id,
+                "session_index": s,
+                "day": grid.days[t // T],
+                "block": t % T + 1,
+                "duration_blocks": dur,
+                "room_id": room_of[(c_id, s)]
+            })
+        return result
+
+    def _target(a: dict):
+        entry = by_key.get(_key(a))
+        k = type_of_room.get(a["room_id"])
+        if entry is None or a["day"] not in grid.days:
+            return None
+        t = grid.days.index(a["day"]) * T + (a["block"] - 1)
+        start, presence = entry
+        if t not in start_domain[_key(a)] or k not in presence:
+            return None
+        return start, t, presence[k]
+
+    lits: Dict[tuple, cp_model.IntVar] = {}
+
+    def place(a: dict):
+        # 방 번호는 색칠 단계에서 정해지므로 (시작 시각, 방 유형)까지만 고정
+        tgt = _target(a)
+        if tgt is None:
+            return None
+        start, t, p = tgt
+        key = (_key(a), t, p.Index())
+        if key not in lits:
+            lit = model.NewBoolVar(f"keep_{a['course_id']}_{a['session_index']}")
+            model.Add(start == t).OnlyEnforceIf(lit)
+            model.AddImplication(lit, p)
+            lits[key] = lit
+        return lits[key]
+
+    def hint(a: dict):
+        tgt = _target(a)
+        if tgt is not None:
+            start, t, p = tgt
+            model.AddHint(start, t)
+            for q in by_key[_key(a)][1].values():  # 나머지 유형은 0 으로 — 힌트가 완전해야 바로 채택된다
+                model.AddHint(q, q is p)
+            if _key(a) in am:  # 오전 보너스도 (빠지면 힌트가 불완전해 presolve 뒤 바로 못 쓴다)
+                m, morning = am[_key(a)]
+                model.AddHint(m, t in morning)
+
+    return _Built(decode, place, hint, [-req.soft.weight * m for m in bonus])
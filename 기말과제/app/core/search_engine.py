@@ -0,0 +1,139 @@
+# 과목 검색어 자동완성 (메모리 색인)
+# 후보 = 교과목명 / 강좌담당교수 / 개설학과 의 서로 다른 값. DB 를 거치지 않고 메모리에서만 찾는다.
+#  - 자모 접두 트라이: "인공지느"(입력 중) → ㅇㅣㄴㄱㅗㅇㅈㅣㄴㅡ 가 "인공지능" 의 자모 접두이므로 바로 맞는다.
+#    각 노드에 (빈도순) 상위 후보 id 를 미리 달아 두어 조회는 입력 길이만큼만 내려가면 끝난다.
+#  - 문자 n-gram(1~3) 역색인: 접두가 아닌 중간 일치("지능" → "인공지능")용, 포스팅 교집합 후 부분 문자열 확인.
+# 색인은 통째로 새로 만든 뒤 참조만 바꾼다(읽는 쪽은 잠금 없음). courses 재적재 시 세대 번호로 감지.
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+import re
+import threading
+
+from sqlalchemy import text
+
+from ..db.catalog import RefreshCheck
+
+SUGGEST_FIELDS = ("교과목명", "강좌담당교수", "개설학과")
+NODE_TOP = 10                # 트라이 노드마다 달아 둘 후보 수
+MAX_NGRAM = 3
+
+# ---------- 자모 분해 ----------
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = ["ㅏ", "ㅐ", "ㅑ", "ㅒ", "ㅓ", "ㅔ", "ㅕ", "ㅖ", "ㅗ", "ㅗㅏ", "ㅗㅐ", "ㅗㅣ", "ㅛ", "ㅜ", "ㅜㅓ", "ㅜㅔ",
+         "ㅜㅣ", "ㅠ", "ㅡ", "ㅡㅣ", "ㅣ"]
+_JONG = ["", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ", "ㄹㅍ", "ㄹㅎ",
+         "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+# 낱자로 입력된 겹모음/겹받침 (호환 자모)도 같은 형태로
+_COMPAT = {"ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+           "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+           "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ"}
+
+def to_jamo(s: str) -> str:
+    out = []
+    for ch in s.lower():
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(_CHO[code // 588] + _JUNG[(code % 588) // 28] + _JONG[code % 28])
+        elif not ch.isspace():
+            out.append(_COMPAT.get(ch, ch))
+    return "".join(out)
+
+def _norm(s: str) -> str:
+    return re.sub(r"\s+", "", s.lower())
+
+def _grams(s: str):
+    for n in range(1, MAX_NGRAM + 1):
+        for i in range(len(s) - n + 1):
+            yield s[i:i + n]
+
+# ---------- 색인 ----------
+class SuggestIndex:
+    def __init__(self, entries: List[dict]):
+        # entries: {"text", "field", "count"} — 빈도 높은 순으로 정렬해 id 가 곧 순위가 되게 한다
+        self.entries = sorted(entries, key=lambda e: (-e["count"], len(e["text"]), e["text"]))
+        self.norm = [_norm(e["text"]) for e in self.entries]
+        self.trie: dict = {}
+        self.grams: Dict[str, List[int]] = defaultdict(list)
+        for i, e in enumerate(self.entries):
+            # 전체 문자열과 각 어절의 시작을 트라이에 (id 오름차순 = 순위순으로 들어간다)
+            words = e["text"].split()
+            for k in range(len(words)):
+                self._insert(to_jamo(" ".join(words[k:])), i)
+            for g in set(_grams(self.norm[i])):
+                self.grams[g].append(i)
+
+    def _insert(self, key: str, i: int):
+        node = self.trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+            top = node.setdefault("", [])
+            if len(top) < NODE_TOP and (not top or top[-1] != i):
+                top.append(i)
+
+    def prefix(self, q: str) -> List[int]:
+        node = self.trie
+        for ch in to_jamo(q):
+            node = node.get(ch)
+            if node is None:
+                return []
+        return node.get("", [])
+
+    def infix(self, q: str, limit: int) -> List[int]:
+        qn = _norm(q)
+        if not qn:
+            return []
+        keys = [qn[i:i + MAX_NGRAM] for i in range(max(1, len(qn) - MAX_NGRAM + 1))]
+        lists = [self.grams.get(k) for k in keys]
+        if any(p is None for p in lists):
+            return []
+        lists.sort(key=len)
+        rest = [set(p) for p in lists[1:]]
+        out = []
+        for i in lists[0]:  # 가장 짧은 포스팅 기준, id 순 = 순위 순
+            if all(i in s for s in rest) and qn in self.norm[i]:
+                out.append(i)
+                if len(out) >= limit:
+                    break
+        return out
+
+    def suggest(self, q: str, limit: int = 10) -> List[dict]:
+        q = (q or "").strip()
+        if not q:
+            return []
+        ids = list(dict.fromkeys(self.prefix(q)[:limit] + self.infix(q, limit)))[:limit]
+        return [self.entries[i] for i in ids]
+
+def load_entries(engine) -> List[dict]:
+    counts: Counter = Counter()
+    with engine.connect() as c:
+        for row in c.execute(text("SELECT * FROM courses")).mappings():
+            for f in SUGGEST_FIELDS:
+                v = row.get(f)
+                if v is not None and str(v).strip():
+                    counts[(str(v).strip(), f)] += 1
+    return [{"text": t, "field": f, "count": n} for (t, f), n in counts.items()]
+
+class SearchEngine:
+    def __init__(self):
+        self.index: Optional[SuggestIndex] = None
+        self.generation: Optional[int] = None
+        self.refresh_check = RefreshCheck()
+        self.lock = threading.Lock()
+
+    def refresh(self, engine, force: bool = False):
+        if not force and self.index is not None and self.refresh_check.recent():
+            return
+        gen = self.refresh_check.read(engine)
+        if not force and self.index is not None and gen == self.generation:
+            return
+        with self.lock:
+            if not force and self.index is not None and gen == self.generation:
+                return
+            index = SuggestIndex(load_entries(engine))
+            self.index, self.generation = index, gen  # 참조 교체 = 원자적 교체
+
+    def suggest(self, engine, q: str, limit: int = 10) -> List[dict]:
+        self.refresh(engine)
+        return self.index.suggest(q, limit)
+
+search_engine = SearchEngine()
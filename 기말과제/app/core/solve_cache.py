@@ -0,0 +1,185 @@
+# 시간표 풀이 결과 캐시
+# 키 = 문제 지문(과목/강의실/강사/제약을 정규화해 해시). 같은 문제면 솔버를 다시 돌리지 않는다.
+# 1차: 메모리 LRU + TTL, 2차(선택, SCHEDULE_CACHE_DISK=1): SCHEDULE_CACHE_URL(기본 DATABASE_URL) 의 schedule_cache 테이블.
+# 기본 DB 는 저장소에 들어 있는 courses.db 라서 2차는 기본으로 끈다 (세대 번호를 읽는 데만 DB 를 쓴다).
+# courses 테이블이 재적재되면(catalog generation 증가) 이전 세대 항목은 모두 버린다.
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import List, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+from ortools.sat.python import cp_model
+from sqlalchemy import create_engine, text
+
+from .scheduler import Course, Room, Instructor, Request, solve
+from ..db.catalog import RefreshCheck, get_generation
+
+DEFAULT_DB = Path(__file__).resolve().parents[2] / "courses.db"
+CACHE_URL = os.getenv("SCHEDULE_CACHE_URL", os.getenv("DATABASE_URL") or f"sqlite:///{DEFAULT_DB.as_posix()}")
+CACHE_TTL = float(os.getenv("SCHEDULE_CACHE_TTL", "3600"))
+CACHE_SIZE = int(os.getenv("SCHEDULE_CACHE_SIZE", "128"))
+CACHE_DISK = os.getenv("SCHEDULE_CACHE_DISK", "0") == "1"
+GENERATION_CHECK_SECONDS = 1.0  # 세대 번호는 최대 이 간격으로만 DB 에서 다시 읽는다
+
+# 시간 제한에 걸려 끝난 결과(UNKNOWN 등)는 다시 풀면 달라질 수 있으므로 저장하지 않는다
+_CACHEABLE = (cp_model.OPTIMAL, cp_model.FEASIBLE, cp_model.INFEASIBLE)
+
+# 결과에 영향이 없는 필드 (스레드 수는 seed 가 없으면 어차피 비결정적이고, 있으면 결정적이다)
+_IGNORED_REQUEST_FIELDS = ("workers",)
+
+def fingerprint(courses: List[Course], rooms: List[Room], instructors: List[Instructor], req: Request) -> str:
+    r = asdict(req)
+    for k in _IGNORED_REQUEST_FIELDS:
+        r.pop(k, None)
+    body = {
+        "courses": sorted((asdict(c) for c in courses), key=lambda c: c["id"]),
+        "rooms": sorted((asdict(x) for x in rooms), key=lambda x: x["id"]),
+        "instructors": sorted(({"id": i.id, "unavailable": sorted(map(list, i.unavailable or []))} for i in instructors),
+                              key=lambda i: i["id"]),
+        "request": r,
+    }
+    raw = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class SolveCache:
+    def __init__(self, url: Optional[str] = CACHE_URL, ttl: float = CACHE_TTL, size: int = CACHE_SIZE, disk: bool = CACHE_DISK):
+        self.ttl = ttl
+        self.size = size
+        self.engine = create_engine(url, pool_pre_ping=True) if url else None
+        self.disk = disk and self.engine is not None
+        self.mem: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (저장 시각, 결과)
+        self.lock = threading.Lock()
+        self.generation: Optional[int] = None
+        self.refresh_check = RefreshCheck(GENERATION_CHECK_SECONDS,
+                                          lambda e: get_generation(e) if e is not None else 0)
+        self._table_ready = False
+        self.stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0,
+                      "evictions": 0, "expired": 0, "invalidations": 0}
+
+    # ---------- 세대 ----------
+    def _sync_generation(self):
+        if self.generation is not None and self.refresh_check.recent():
+            return
+        gen = self.refresh_check.read(self.engine)
+        if self.generation is not None and gen != self.generation:
+            self.mem.clear()
+            self.stats["invalidations"] += 1
+            if self.disk:
+                self._disk_purge(gen)
+        self.generation = gen
+
+    # ---------- 디스크 계층 ----------
+    def _ensure_table(self, conn):
+        if self._table_ready:
+            return
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schedule_cache ("
+            "key VARCHAR(64) PRIMARY KEY, generation INTEGER NOT NULL, created_at REAL NOT NULL, result TEXT NOT NULL)"
+        ))
+        self._table_ready = True
+
+    def _disk_get(self, key: str):
+        try:
+            with self.engine.begin() as conn:
+                self._ensure_table(conn)
+                row = conn.execute(text("SELECT generation, created_at, result FROM schedule_cache WHERE key = :k"),
+                                   {"k": key}).first()
+        except Exception:
+            return None
+        if row is None or row[0] != self.generation or time.time() - row[1] > self.ttl:
+            return None
+        return row[1], json.loads(row[2])
+
+    def _disk_put(self, key: str, created_at: float, result: dict):
+        try:
+            with self.engine.begin() as conn:
+                self._ensure_table(conn)
+                conn.execute(text(
+                    "INSERT INTO schedule_cache (key, generation, created_at, result) VALUES (:k, :g, :t, :r) "
+                    "ON CONFLICT (key) DO UPDATE SET generation = :g, created_at = :t, result = :r"
+                ), {"k": key, "g": self.generation, "t": created_at, "r": json.dumps(result, ensure_ascii=False)})
+        except Exception:
+            pass  # 디스크 계층은 보조 수단: 실패해도 메모리 캐시로 계속 동작
+
+    def _disk_purge(self, gen: int):
+        try:
+            with self.engine.begin() as conn:
+                self._ensure_table(conn)
+                conn.execute(text("DELETE FROM schedule_cache WHERE generation <> :g OR created_at < :t"),
+                             {"g": gen, "t": time.time() - self.ttl})
+        except Exception:
+            pass
+
+    # ---------- 공개 API ----------
+    def get(self, key: str) -> Optional[dict]:
+        with self.lock:
+            self._sync_generation()
+            hit = self.mem.get(key)
+            if hit is not None:
+                if time.time() - hit[0] <= self.ttl:
+                    self.mem.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return hit[1]
+                del self.mem[key]
+                self.stats["expired"] += 1
+            if self.disk:
+                hit = self._disk_get(key)
+                if hit is not None:
+                    self._remember(key, *hit)
+                    self.stats["hits"] += 1
+                    self.stats["disk_hits"] += 1
+                    return hit[1]
+            self.stats["misses"] += 1
+            return None
+
+    def _remember(self, key: str, created_at: float, result: dict):
+        self.mem[key] = (created_at, result)
+        self.mem.move_to_end(key)
+        while len(self.mem) > self.size:
+            self.mem.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def put(self, key: str, result: dict):
+        with self.lock:
+            self._sync_generation()
+            now = time.time()
+            self._remember(key, now, result)
+            self.stats["stores"] += 1
+            if self.disk:
+                self._disk_put(key, now, result)
+
+    def clear(self):
+        with self.lock:
+            self.mem.clear()
+            if self.disk:
+                self._disk_purge(-1)
+
+    def info(self) -> dict:
+        with self.lock:
+            total = self.stats["hits"] + self.stats["misses"]
+            return {**self.stats, "hit_rate": round(self.stats["hits"] / total, 4) if total else 0.0,
+                    "size": len(self.mem), "max_size": self.size, "ttl_seconds": self.ttl,
+                    "disk": self.disk, "generation": self.generation}
+
+solve_cache = SolveCache()
+
+def cacheable(result: dict) -> bool:
+    return result.get("status") in _CACHEABLE
+
+def cached_solve(courses: List[Course], rooms: List[Room], instructors: List[Instructor], req: Request,
+                 cache: SolveCache = solve_cache):
+    # 반환: (결과, 캐시 적중 여부)
+    key = fingerprint(courses, rooms, instructors, req)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit, True
+    res = solve(courses, rooms, instructors, req)
+    if cacheable(res):
+        cache.put(key, res)
+    return res, False
@@ -0,0 +1,39 @@
+# 비동기 DB 접근 (DB_ASYNC=1 일 때만 사용)
+# 같은 DATABASE_URL 을 async 드라이버(aiosqlite / asyncpg)로 바꿔 AsyncEngine 을 만든다.
+# 풀 크기는 동기 엔진과 같은 환경 변수로 조정한다 (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE).
+import os
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgresql+psycopg": "postgresql+asyncpg",
+}
+
+def db_async_enabled() -> bool:
+    return os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes", "on")
+
+def pool_options(url: str) -> dict:
+    # 요청 동시성에 맞춰 풀을 키운다. SQLite 메모리 DB 는 풀 옵션을 받지 않으므로 제외
+    if url.startswith("sqlite") and ":memory:" in url:
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme and scheme not in ASYNC_DRIVERS:
+        return url  # 이미 async 드라이버가 지정된 경우
+    driver = ASYNC_DRIVERS.get(scheme)
+    if driver is None:
+        raise ValueError(f"async 드라이버를 모르는 DB 입니다: {scheme}")
+    return f"{driver}{sep}{rest}"
+
+def create_async_db_engine(url: str):
+    # 드라이버가 없는 환경에서도 동기 모드는 그대로 쓸 수 있게 여기서만 import
+    from sqlalchemy.ext.asyncio import create_async_engine
+    return create_async_engine(to_async_url(url), pool_pre_ping=True, **pool_options(url))
@@ -0,0 +1,80 @@
+# 과목 테이블 세대(generation) 번호
+# courses 테이블을 다시 적재할 때마다 1씩 올려서, 그 테이블을 바탕으로 만든 캐시들이 무효화 여부를 판단한다.
+# 세대마다 무엇이 바뀌었는지(추가/수정/삭제 건수)는 catalog_log 에 남긴다. 바뀐 게 없는 적재는 세대를 올리지 않는다.
+# 캐시들은 RefreshCheck 로 세대 번호를 최대 몇 초에 한 번만 읽는다.
+import time
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import inspect, text
+
+META_TABLE = "catalog_meta"
+LOG_TABLE = "catalog_log"
+GENERATION_KEY = "courses_generation"
+REFRESH_CHECK_SECONDS = 5.0  # 캐시가 세대 번호를 다시 읽는 기본 간격
+
+def _ensure_meta(conn):
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key VARCHAR(64) PRIMARY KEY, value INTEGER NOT NULL)"))
+
+def get_generation(engine) -> int:
+    try:
+        with engine.connect() as conn:
+            v = conn.execute(text(f"SELECT value FROM {META_TABLE} WHERE key = :k"), {"k": GENERATION_KEY}).scalar()
+    except Exception:
+        return 0  # 메타 테이블이 아직 없음 = 한 번도 적재 기록이 없음
+    return int(v or 0)
+
+def read_generation(conn) -> int:
+    # 열린 트랜잭션 안에서 (실패로 트랜잭션을 깨지 않도록 테이블 유무를 먼저 본다)
+    if not inspect(conn).has_table(META_TABLE):
+        return 0
+    v = conn.execute(text(f"SELECT value FROM {META_TABLE} WHERE key = :k"), {"k": GENERATION_KEY}).scalar()
+    return int(v or 0)
+
+def increment_generation(conn) -> int:
+    # 열린 트랜잭션 안에서 (적재와 같은 트랜잭션으로 묶을 때)
+    _ensure_meta(conn)
+    conn.execute(text(
+        f"INSERT INTO {META_TABLE} (key, value) VALUES (:k, 1) "
+        f"ON CONFLICT (key) DO UPDATE SET value = {META_TABLE}.value + 1"
+    ), {"k": GENERATION_KEY})
+    return int(conn.execute(text(f"SELECT value FROM {META_TABLE} WHERE key = :k"), {"k": GENERATION_KEY}).scalar())
+
+class RefreshCheck:
+    # 원본이 바뀌었는지 확인(probe)하는 데 비용이 드는 캐시용: 확인은 최대 interval 초에 한 번.
+    # 호출하는 쪽: if 가진 게 있고 check.recent(): 그대로 / 아니면 v = check.read(...) 를 가진 것의 값과 비교
+    def __init__(self, interval: float = REFRESH_CHECK_SECONDS, probe: Callable[..., Any] = get_generation):
+        self.interval = interval
+        self.probe = probe  # 기본은 세대 번호 (read(engine))
+        self.checked_at: Optional[float] = None
+
+    def recent(self) -> bool:
+        return self.checked_at is not None and time.monotonic() - self.checked_at < self.interval
+
+    def mark(self):
+        self.checked_at = time.monotonic()
+
+    def read(self, *args) -> Any:
+        self.mark()
+        return self.probe(*args)
+
+def record_ingest(conn, generation: int, mode: str, stats: dict):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {LOG_TABLE} (generation INTEGER PRIMARY KEY, mode VARCHAR(16) NOT NULL, "
+        f"inserted INTEGER NOT NULL, updated INTEGER NOT NULL, deleted INTEGER NOT NULL, total INTEGER NOT NULL, "
+        f"created_at VARCHAR(32) NOT NULL)"))
+    conn.execute(text(
+        f"INSERT INTO {LOG_TABLE} (generation, mode, inserted, updated, deleted, total, created_at) "
+        f"VALUES (:g, :m, :i, :u, :d, :t, :c)"
+    ), {"g": generation, "m": mode, "i": stats.get("inserted", 0), "u": stats.get("updated", 0),
+        "d": stats.get("deleted", 0), "t": stats.get("total", 0), "c": time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+def changes_since(engine, generation: int = 0, limit: int = 100) -> List[dict]:
+    # 구독하는 쪽(캐시/클라이언트)은 마지막으로 본 세대를 넘겨 그 뒤의 적재 기록만 받는다
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                f"SELECT generation, mode, inserted, updated, deleted, total, created_at FROM {LOG_TABLE} "
+                f"WHERE generation > :g ORDER BY generation LIMIT :n"), {"g": int(generation), "n": int(limit)})
+            return [dict(r) for r in rows.mappings()]
+    except Exception:
+        return []  # 로그 테이블이 아직 없음
@@ -0,0 +1,209 @@
+# 과목 벡터 색인 (LLM 없이 쓰는 로컬 유사도 추천)
+# 교과목명/영역구분/강의유형구분의 문자 n-gram(2·3글자)을 해시로 DIM 칸에 모아 TF-IDF 벡터를 만들고,
+# 행마다 L2 정규화한 (과목 수 × DIM) float32 행렬로 저장한다 → 코사인 유사도 = 행렬 · 질의 벡터 한 번.
+# 파일(.npy)은 적재(ingest) 직후 세대 번호를 이름에 넣어 새로 쓰고, 메타(json)를 마지막에 바꿔 끼운다.
+# 서버는 np.load(mmap_mode="r") 로 열기 때문에 워커가 여럿이어도 OS 페이지 캐시의 한 벌을 같이 본다.
+# 과목 정보도 메타에 싣지 않고 JSON Lines 파일(+ 행 시작 위치 .npy)로 따로 두어 mmap 으로 열고, 결과 행만 그때 디코드한다.
+# 파일은 기본적으로 APP_CACHE_DIR(기말과제/.cache, .gitignore 대상)에 둔다.
+# ingest_csv.py 가 app/db 에서 바로 import 하므로 상대 import 를 쓰지 않는다.
+import glob
+import json
+import os
+import re
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+# 필드별 가중치 (과목명이 가장 중요)
+VECTOR_FIELDS = {"교과목명": 2.0, "영역구분": 1.0, "강의유형구분": 1.0}
+# 추천 결과/LLM 후보에 같이 싣는 필드
+KEEP = ("교과목코드", "교과목명", "개설학과", "영역구분", "강좌담당교수", "개설학년", "교과목학점", "강의유형구분")
+NGRAMS = (2, 3)
+DIM = int(os.getenv("COURSE_VECTOR_DIM", "4096"))
+APP_CACHE_DIR = os.getenv("APP_CACHE_DIR", str(Path(__file__).resolve().parents[2] / ".cache"))
+VECTOR_DIR = os.getenv("COURSE_VECTOR_DIR", APP_CACHE_DIR)
+BASENAME = "course_vectors"
+
+_WORD = re.compile(r"[0-9A-Za-z가-힣]+")
+
+# ---------- 특징 ----------
+def char_ngrams(s: str) -> List[str]:
+    # 어절 앞뒤에 공백을 붙여 n-gram 을 뽑는다 ("딥러닝" → " 딥", "딥러", …, " 딥러", …). 한 글자 어절도 특징이 생긴다
+    out = []
+    for w in _WORD.findall(str(s or "").lower()):
+        w = f" {w} "
+        for n in NGRAMS:
+            out.extend(w[i:i + n] for i in range(len(w) - n + 1))
+    return out
+
+def _bucket(gram: str, dim: int) -> int:
+    # 프로세스마다 값이 바뀌는 hash() 대신 crc32 (워커/재시작 사이에 같은 칸)
+    return zlib.crc32(gram.encode("utf-8")) % dim
+
+def hashed_counts(fields: Dict[str, str], dim: int = DIM) -> Dict[int, float]:
+    counts: Dict[int, float] = {}
+    for f, w in VECTOR_FIELDS.items():
+        for g in char_ngrams(fields.get(f, "")):
+            b = _bucket(g, dim)
+            counts[b] = counts.get(b, 0.0) + w
+    return counts
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    np.divide(m, norms, out=m, where=norms > 0)
+    return m
+
+def build_matrix(docs: List[dict], dim: int = DIM) -> Tuple[np.ndarray, np.ndarray]:
+    # (행렬, idf). tf 는 log(1 + 가중 빈도), idf 는 smooth idf
+    rows, cols, vals = [], [], []
+    for i, d in enumerate(docs):
+        for b, c in hashed_counts(d, dim).items():
+            rows.append(i)
+            cols.append(b)
+            vals.append(c)
+    tf = np.zeros((len(docs), dim), dtype=np.float32)
+    if rows:
+        tf[np.array(rows), np.array(cols)] = np.array(vals, dtype=np.float32)
+    df = np.count_nonzero(tf, axis=0)
+    idf = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+    m = np.log1p(tf, out=tf)
+    m *= idf
+    return np.ascontiguousarray(_normalize(m)), idf
+
+def query_vector(query: str, idf: np.ndarray) -> np.ndarray:
+    # 질의는 필드 구분 없이 모든 필드 가중치 1 로
+    q = np.zeros(idf.shape[0], dtype=np.float32)
+    for g in char_ngrams(query):
+        q[_bucket(g, idf.shape[0])] += 1.0
+    q = np.log1p(q, out=q)
+    q *= idf
+    return _normalize(q)
+
+def top_k(matrix: np.ndarray, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    # 코사인 상위 k (점수 내림차순, 같은 점수면 앞 행). argpartition 으로 전체 정렬을 피한다
+    scores = matrix @ q
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    idx = np.argpartition(-scores, k - 1)[:k] if k < scores.shape[0] else np.arange(scores.shape[0])
+    idx = idx[np.lexsort((idx, -scores[idx]))]
+    return idx, scores[idx]
+
+# ---------- 문서 ----------
+def load_docs(engine) -> List[dict]:
+    # 필요한 필드만 남긴다. 같은 분반 정보가 여러 번 있으면 하나만
+    docs, seen = [], set()
+    with engine.connect() as c:
+        for row in c.execute(text("SELECT * FROM courses")).mappings():
+            d = {k: ("" if row.get(k) is None else row.get(k)) for k in KEEP if k in row}
+            sig = tuple(d.values())
+            if sig in seen:
+                continue
+            seen.add(sig)
+            docs.append(d)
+    return docs
+
+# ---------- 파일 ----------
+class CourseVectors:
+    def __init__(self, matrix: np.ndarray, idf: np.ndarray, docs: np.ndarray, offsets: np.ndarray,
+                 generation: int):
+        # docs: JSON Lines 바이트(mmap), offsets: 행 i 의 [시작, 끝) = offsets[i], offsets[i + 1]
+        self.matrix, self.idf, self.docs, self.offsets, self.generation = matrix, idf, docs, offsets, generation
+
+    def doc(self, i: int) -> dict:
+        return json.loads(self.docs[int(self.offsets[i]):int(self.offsets[i + 1])].tobytes())
+
+    def search(self, query: str, k: int) -> List[Tuple[dict, float]]:
+        idx, scores = top_k(self.matrix, query_vector(query, self.idf), k)
+        return [(self.doc(i), float(s)) for i, s in zip(idx.tolist(), scores.tolist()) if s > 0]
+
+def _meta_path(directory: str) -> str:
+    return os.path.join(directory, f"{BASENAME}.json")
+
+def _source(engine) -> str:
+    # 어느 DB 에서 만든 파일인지 (비밀번호는 가린다)
+    return engine.url.render_as_string(hide_password=True)
+
+def _save_bytes(path: str, data: bytes):
+    # 임시 파일에 쓰고 이름을 바꾼다 (열어 둔 mmap 은 이전 파일을 계속 본다)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _save_npy(path: str, arr: np.ndarray):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+def read_meta(directory: str = VECTOR_DIR) -> Optional[dict]:
+    try:
+        with open(_meta_path(directory), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_course_vectors(engine, generation: int, directory: str = VECTOR_DIR, dim: int = DIM) -> dict:
+    t0 = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    docs = load_docs(engine)
+    matrix, idf = build_matrix(docs, dim)
+    lines = [(json.dumps(d, ensure_ascii=False, default=str) + "\n").encode("utf-8") for d in docs]
+    offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in lines], out=offsets[1:])
+    name = f"{BASENAME}-g{generation}"
+    _save_npy(os.path.join(directory, f"{name}.npy"), matrix)
+    _save_npy(os.path.join(directory, f"{name}.idf.npy"), idf)
+    _save_bytes(os.path.join(directory, f"{name}.docs.jsonl"), b"".join(lines))
+    _save_npy(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+    meta = {"generation": generation, "source": _source(engine), "dim": dim, "rows": len(docs),
+            "fields": list(VECTOR_FIELDS), "matrix": f"{name}.npy", "idf": f"{name}.idf.npy",
+            "docs": f"{name}.docs.jsonl", "offsets": f"{name}.offsets.npy",
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "build_ms": round((time.perf_counter() - t0) * 1000, 3)}
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, default=str)
+    os.replace(tmp, _meta_path(directory))
+    # 이전 세대 파일 정리 (리눅스에서는 열어 둔 mmap 이 있어도 지울 수 있다)
+    keep = {meta["matrix"], meta["idf"], meta["docs"], meta["offsets"]}
+    for old in glob.glob(os.path.join(directory, f"{BASENAME}-g*")):
+        if os.path.basename(old) not in keep:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return meta
+
+def ensure_course_vectors(engine, generation: int, directory: str = VECTOR_DIR) -> dict:
+    # 파일이 이 DB·이 세대 것이면 그대로, 아니면 새로 쓴다
+    meta = read_meta(directory)
+    if meta is not None and meta.get("generation") == generation and meta.get("source") == _source(engine) and \
+            all(os.path.exists(os.path.join(directory, str(meta.get(f)))) for f in ("matrix", "idf", "docs", "offsets")):
+        return meta
+    return write_course_vectors(engine, generation, directory)
+
+def load_course_vectors(directory: str = VECTOR_DIR) -> Optional[CourseVectors]:
+    meta = read_meta(directory)
+    if meta is None:
+        return None
+    try:
+        matrix = np.load(os.path.join(directory, meta["matrix"]), mmap_mode="r")
+        idf = np.load(os.path.join(directory, meta["idf"]))
+        offsets = np.load(os.path.join(directory, meta["offsets"]), mmap_mode="r")
+        docs_path = os.path.join(directory, meta["docs"])
+        # 길이 0 인 파일은 mmap 할 수 없다
+        docs = np.memmap(docs_path, dtype=np.uint8, mode="r") if os.path.getsize(docs_path) \
+            else np.empty(0, dtype=np.uint8)
+    except (OSError, ValueError, KeyError):
+        return None
+    if matrix.shape != (meta["rows"], meta["dim"]) or offsets.shape != (meta["rows"] + 1,) or \
+            int(offsets[-1]) != docs.shape[0]:
+        return None
+    return CourseVectors(matrix, idf, docs, offsets, meta["generation"])
@@ -1,24 +1,364 @@
+# courses CSV 적재 (청크 단위 · 타입 지정 · 원자적 교체)
+# 1) CSV 를 CHUNK_ROWS 행씩 읽어서 값을 정리/형 변환 (정수 컬럼에 숫자가 아닌 값이 있으면 줄 번호와 함께 중단)
+# 2) 타입이 정해진 임시 테이블(courses__new)에 넣는다: PostgreSQL = COPY, SQLite = executemany
+# 3) 같은 트랜잭션 안에서 courses 를 courses__new 로 바꾸고 검색/커서 색인과 세대 번호까지 갱신한 뒤 커밋
+#    → 읽는 쪽은 이전 테이블 또는 새 테이블만 본다 (빈 테이블·반쯤 쓴 테이블을 보지 않음)
+# --mode delta (기본): CSV 를 청크 단위로 임시 테이블(courses__delta)에 넣으면서 행 내용 해시만 메모리에 두고,
+#   저장된 행의 해시(서버 쪽 커서로 훑음)와 비교해서 바뀐 행만 INSERT/UPDATE/DELETE (검색 색인도 변경분만).
+#   행은 대리 키 _row_id 로 찾는다 — UPDATE 해도 바뀌지 않으므로 커서가 적재 뒤에도 이어진다.
+#   바뀐 게 없으면 세대를 올리지 않는다. 처음 적재하거나 컬럼이 바뀌었거나 _row_id 가 없으면 replace 로 진행.
+# --mode replace: 새 테이블로 통째 교체
+# --mode upsert: CSV 에 나온 교과목코드의 행만 CSV 것으로 바꾼다 (delta 와 같은 방식, 비교 대상만 그 코드들).
+#   교과목코드 하나에 분반 여러 개가 있으므로 코드 단위로 (기존 분반 ↔ CSV 분반). 컬럼이 다르면 새 테이블로 교체.
+# 적재 결과(추가/수정/삭제 건수)는 세대 번호와 함께 catalog_log 에 남는다.
+# 커밋 뒤에는 그 세대의 과목 벡터 파일(course_vectors.py, 오프라인 추천용)을 다시 쓴다.
+import argparse
+import codecs
+import csv
+import hashlib
+import io
+import json
 import os
-import pandas as pd
-from sqlalchemy import create_engine
+import time
+from collections import defaultdict
 from dotenv import load_dotenv
+from sqlalchemy import bindparam, create_engine, inspect, text
+from catalog import increment_generation, read_generation, record_ingest
+from search_index import create_search_index, has_search_index, resolve_search_fields, sync_search_index
+from pagination import ROW_ID, create_key_index, resolve_key_column, row_id_ddl
+from course_vectors import ensure_course_vectors
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 CSV_PATH = os.getenv("CSV_PATH", "courses_data.csv")
-engine = create_engine(DATABASE_URL)
+CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "5000"))
 
-def read_csv_smart(path):
+TABLE = "courses"
+STAGE = "courses__new"
+DELTA_STAGE = "courses__delta"
+SID = "_sid"
+UPSERT_KEY = "교과목코드"
+# 형이 정해진 컬럼 (나머지는 첫 청크를 보고 INTEGER / TEXT 추정)
+COLUMN_TYPES = {
+    "개설학년": "INTEGER",
+    "수강인원": "INTEGER",
+    "수업주수": "INTEGER",
+    "교과목학점": "INTEGER",
+    "교과목코드": "TEXT",
+}
+
+class IngestError(ValueError):
+    pass
+
+# ---------- CSV 읽기 ----------
+def detect_encoding(path: str) -> str:
+    # 파일 전체를 조금씩 UTF-8 로 디코딩해 보고 실패하면 cp949 (한글 윈도우 엑셀 저장본)
+    dec = codecs.getincrementaldecoder("utf-8-sig")()
     try:
-        return pd.read_csv(path, encoding="utf-8")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                dec.decode(block)
+            dec.decode(b"", final=True)
+        return "utf-8-sig"
     except UnicodeDecodeError:
-        return pd.read_csv(path, encoding="cp949")
+        return "cp949"
+
+def read_chunks(path: str, chunk_rows: int = CHUNK_ROWS):
+    # 반환: (헤더, 청크 생성기). 청크 = [(줄 번호, [값...]), ...]
+    f = open(path, encoding=detect_encoding(path), newline="")
+    reader = csv.reader(f)
+    header = [c.strip() for c in next(reader)]
+
+    def chunks():
+        with f:
+            buf = []
+            for row in reader:
+                if not any(v.strip() for v in row):
+                    continue  # 빈 줄
+                buf.append((reader.line_num, row))
+                if len(buf) >= chunk_rows:
+                    yield buf
+                    buf = []
+            if buf:
+                yield buf
+    return header, chunks()
+
+# ---------- 타입 ----------
+def _to_int(v: str):
+    v = v.replace(",", "")
+    try:
+        return int(v)
+    except ValueError:
+        f = float(v)
+        if not f.is_integer():
+            raise ValueError(v)
+        return int(f)
+
+def infer_types(header, first_chunk) -> dict:
+    types = {}
+    for i, col in enumerate(header):
+        if col in COLUMN_TYPES:
+            types[col] = COLUMN_TYPES[col]
+            continue
+        vals = [row[i].strip() for _, row in first_chunk if i < len(row) and row[i].strip()]
+        try:
+            for v in vals:
+                _to_int(v)
+            types[col] = "INTEGER" if vals else "TEXT"
+        except ValueError:
+            types[col] = "TEXT"
+    return types
+
+def clean_chunk(header, types: dict, chunk) -> list:
+    # 공백 정리, 빈 값 → NULL, 정수 컬럼 강제 (어긋나면 IngestError → 트랜잭션 롤백, 기존 테이블 유지)
+    ints = [types[c] == "INTEGER" for c in header]
+    out = []
+    for line, row in chunk:
+        if len(row) != len(header):
+            raise IngestError(f"{line}행: 컬럼 수가 헤더({len(header)})와 다릅니다 ({len(row)})")
+        vals = []
+        for col, v, is_int in zip(header, row, ints):
+            v = v.strip()
+            if not v:
+                vals.append(None)
+            elif is_int:
+                try:
+                    vals.append(_to_int(v))
+                except ValueError:
+                    raise IngestError(f"{line}행 '{col}': 정수가 아닙니다 ({v!r})")
+            else:
+                vals.append(v)
+        out.append(tuple(vals))
+    return out
+
+# ---------- 적재 ----------
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _insert_sqlite(conn, table, header, rows):
+    marks = ", ".join("?" for _ in header)
+    conn.exec_driver_sql(f"INSERT INTO {table} ({', '.join(map(_q, header))}) VALUES ({marks})", rows)
+
+def _insert_postgres(conn, table, header, rows):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)   # None → 빈 칸 → COPY csv 에서 NULL
+    buf.seek(0)
+    sql = f"COPY {table} ({', '.join(map(_q, header))}) FROM STDIN WITH (FORMAT csv)"
+    cur = conn.connection.cursor()
+    try:
+        if hasattr(cur, "copy_expert"):   # psycopg2
+            cur.copy_expert(sql, buf)
+        else:                             # psycopg 3
+            with cur.copy(sql) as cp:
+                cp.write(buf.getvalue())
+    finally:
+        cur.close()
+
+def row_hash(values) -> bytes:
+    # 행 내용 해시 (형 변환을 마친 값 기준 — DB 에서 읽은 행과 CSV 행을 같은 방식으로 비교)
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+
+def _stored_types(conn) -> dict:
+    # 저장된 컬럼 → 형 (대리 키 _row_id 포함)
+    insp = inspect(conn)
+    if not insp.has_table(TABLE):
+        return {}
+    return {c["name"]: str(c["type"]).upper() for c in insp.get_columns(TABLE)}
+
+def diff_rows(stored, incoming, by_code: bool = True):
+    # stored = [(rid, 해시, 교과목코드)], incoming = [(sid, 해시, 교과목코드)] — 값 대신 해시만 들고 비교한다.
+    # 같은 내용의 행이 여러 개일 수 있어 해시별 개수로 맞춘다.
+    # 반환: (삭제 [rid], 수정 [(rid, sid)], 추가 [sid], 그대로 건수)
+    pending = defaultdict(list)
+    for sid, h, code in incoming:
+        pending[h].append((sid, code))
+    removed, unchanged = [], 0
+    for rid, h, code in stored:
+        bucket = pending.get(h)
+        if bucket:
+            bucket.pop()
+            unchanged += 1
+        else:
+            removed.append((rid, code))
+    added = [x for bucket in pending.values() for x in bucket]
+
+    # 같은 교과목코드끼리 짝지어지는 삭제/추가는 수정(UPDATE)으로 — _row_id 와 커서가 그대로 유지된다
+    updated = []
+    if by_code:
+        new_by_code = defaultdict(list)
+        for sid, code in added:
+            new_by_code[code].append(sid)
+        still_removed = []
+        for rid, code in removed:
+            cands = new_by_code.get(code) if code is not None else None
+            if cands:
+                updated.append((rid, cands.pop()))
+            else:
+                still_removed.append((rid, code))
+        removed = still_removed
+        added = [(sid, code) for code, sids in new_by_code.items() for sid in sids]
+    return [rid for rid, _ in removed], updated, sorted(sid for sid, _ in added), unchanged
+
+def _stage_incoming(conn, dialect, header, types, chunks) -> list:
+    # CSV 행을 청크 단위로 임시 테이블(courses__delta, _sid = CSV 순번)에 넣고 (sid, 해시, 코드)만 메모리에 남긴다
+    insert = _insert_postgres if dialect == "postgresql" else _insert_sqlite
+    k = header.index(UPSERT_KEY) if UPSERT_KEY in header else None
+    ddl = ", ".join([f"{_q(SID)} BIGINT PRIMARY KEY"] + [f"{_q(c)} {types[c]}" for c in header])
+    conn.execute(text(f"DROP TABLE IF EXISTS {DELTA_STAGE}"))
+    conn.execute(text(f"CREATE TABLE {DELTA_STAGE} ({ddl})"))
+    incoming = []
+    for chunk in chunks:
+        rows = []
+        for vals in clean_chunk(header, types, chunk):
+            sid = len(incoming) + 1
+            incoming.append((sid, row_hash(vals), None if k is None else vals[k]))
+            rows.append((sid,) + vals)
+        insert(conn, DELTA_STAGE, [SID] + header, rows)
+    return incoming
+
+def _stored_digests(conn, header, where: str = "") -> list:
+    # 저장된 행을 서버 쪽 커서로 훑으며 (rid, 해시, 코드)만 남긴다
+    k = header.index(UPSERT_KEY) if UPSERT_KEY in header else None
+    sql = f"SELECT {_q(ROW_ID)}, {', '.join(map(_q, header))} FROM {TABLE} {where}"
+    result = conn.execution_options(stream_results=True, yield_per=CHUNK_ROWS).execute(text(sql))
+    return [(r[0], row_hash(r[1:]), None if k is None else r[1 + k]) for r in result]
+
+def _old_values(conn, fields, rids) -> list:
+    # 검색 색인에서 지울 옛 값 (바뀌는 행만 조금씩 읽는다)
+    names = [f for f, _ in fields]
+    stmt = text(f"SELECT {_q(ROW_ID)}, {', '.join(map(_q, names))} FROM {TABLE} WHERE {_q(ROW_ID)} IN :rids") \
+        .bindparams(bindparam("rids", expanding=True))
+    out = []
+    for i in range(0, len(rids), CHUNK_ROWS):
+        out.extend((r[0], dict(zip(names, r[1:]))) for r in conn.execute(stmt, {"rids": rids[i:i + CHUNK_ROWS]}))
+    return out
+
+def _apply_delta(conn, dialect, header, types, chunks, mode: str = "delta") -> dict:
+    # mode="upsert": CSV 에 나온 교과목코드의 저장 행만 비교 대상 (나머지 행은 그대로 둔다)
+    rid = _q(ROW_ID)
+    cols = ", ".join(map(_q, header))
+    incoming = _stage_incoming(conn, dialect, header, types, chunks)
+    where = ""
+    if mode == "upsert":
+        where = f"WHERE {_q(UPSERT_KEY)} IN (SELECT {_q(UPSERT_KEY)} FROM {DELTA_STAGE})"
+    stored = _stored_digests(conn, header, where)
+    removed, updated, added, unchanged = diff_rows(stored, incoming, UPSERT_KEY in header)
+    total = conn.execute(text(f"SELECT COUNT(*) FROM {TABLE}")).scalar()
+    stats = {"mode": mode, "rows": len(incoming), "inserted": len(added), "updated": len(updated),
+             "deleted": len(removed), "unchanged": unchanged + total - len(stored)}
+    if not (removed or updated or added):
+        # 바뀐 게 없으면 세대도 그대로 → 검색/추천/시간표 캐시가 계속 유효
+        conn.execute(text(f"DROP TABLE {DELTA_STAGE}"))
+        stats["generation"] = read_generation(conn)
+        stats["total"] = total
+        return stats
+
+    fields = resolve_search_fields(set(header))
+    indexed = has_search_index(conn, dialect)
+    old_values = _old_values(conn, fields, removed + [r for r, _ in updated]) if indexed and fields else []
+    if removed:
+        conn.execute(text(f"DELETE FROM {TABLE} WHERE {rid} = :rid"), [{"rid": r} for r in removed])
+    if updated:
+        conn.execute(text(f"UPDATE {TABLE} SET ({cols}) = (SELECT {cols} FROM {DELTA_STAGE} WHERE {_q(SID)} = :sid) "
+                          f"WHERE {rid} = :rid"), [{"rid": r, "sid": s} for r, s in updated])
+    max_rid = conn.execute(text(f"SELECT COALESCE(MAX({rid}), 0) FROM {TABLE}")).scalar()
+    if added:
+        conn.execute(text(f"INSERT INTO {TABLE} ({cols}) SELECT {cols} FROM {DELTA_STAGE} WHERE {_q(SID)} = :sid"),
+                     [{"sid": s} for s in added])
+    conn.execute(text(f"DROP TABLE {DELTA_STAGE}"))
+
+    if indexed:
+        sync_search_index(conn, dialect, fields, old_values, [r for r, _ in updated], max_rid if added else None)
+    else:
+        create_search_index(conn, dialect, fields)   # 색인이 없던 DB 파일
+    create_key_index(conn, resolve_key_column(set(header)))
+    stats["total"] = total - len(removed) + len(added)
+    stats["generation"] = increment_generation(conn)
+    record_ingest(conn, stats["generation"], mode, stats)
+    return stats
+
+def _swap(conn, dialect, header, types, chunks, mode: str) -> dict:
+    insert = _insert_postgres if dialect == "postgresql" else _insert_sqlite
+    ddl = ", ".join([row_id_ddl(dialect)] + [f"{_q(c)} {types[c]}" for c in header])
+    stats = {"mode": mode, "rows": 0, "inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+
+    conn.execute(text(f"DROP TABLE IF EXISTS {STAGE}"))
+    conn.execute(text(f"CREATE TABLE {STAGE} ({ddl})"))
+    for chunk in chunks:
+        rows = clean_chunk(header, types, chunk)
+        insert(conn, STAGE, header, rows)
+        stats["rows"] += len(rows)
+    stats["inserted"] = stats["rows"]
+
+    has_old = inspect(conn).has_table(TABLE)
+    old_total = conn.execute(text(f"SELECT COUNT(*) FROM {TABLE}")).scalar() if has_old else 0
+    if mode == "upsert" and has_old:
+        if UPSERT_KEY not in header:
+            raise IngestError(f"upsert 에는 '{UPSERT_KEY}' 컬럼이 필요합니다")
+        # 기존 행 중 CSV 에 없는 교과목코드만 새 테이블로 옮긴다 (있는 코드는 CSV 분반으로 대체)
+        cols = ", ".join(map(_q, header))
+        match = f"(SELECT 1 FROM {STAGE} n WHERE n.{_q(UPSERT_KEY)} = o.{_q(UPSERT_KEY)})"
+        kept = conn.execute(text(
+            f"INSERT INTO {STAGE} ({cols}) SELECT {cols} FROM {TABLE} o WHERE NOT EXISTS {match}")).rowcount
+        stats["unchanged"] = kept
+        old_total -= kept
+
+    # 교체: 같은 트랜잭션 안에서 이름 바꾸기 + 색인 재생성 + 세대 번호
+    if has_old:
+        conn.execute(text(f"DROP TABLE {TABLE}"))
+    conn.execute(text(f"ALTER TABLE {STAGE} RENAME TO {TABLE}"))
+    create_search_index(conn, dialect, resolve_search_fields(set(header)))   # FTS5 trigram / pg_trgm
+    create_key_index(conn, resolve_key_column(set(header)))                  # 커서 페이지네이션
+    stats["deleted"] = old_total
+    stats["total"] = conn.execute(text(f"SELECT COUNT(*) FROM {TABLE}")).scalar()
+    stats["generation"] = increment_generation(conn)                         # courses 기반 캐시 무효화
+    record_ingest(conn, stats["generation"], mode, stats)
+    return stats
+
+def load(engine, csv_path: str, mode: str = "delta", chunk_rows: int = CHUNK_ROWS) -> dict:
+    header, chunks = read_chunks(csv_path, chunk_rows)
+    first = next(chunks, [])
+    types = infer_types(header, first)
+    dialect = engine.dialect.name
+
+    with engine.begin() as conn:
+        if dialect == "sqlite" and not conn.connection.driver_connection.in_transaction:
+            # pysqlite 는 DML 전까지 BEGIN 을 미루므로 DDL(임시 테이블 생성)까지 한 트랜잭션에 넣으려면 직접 연다
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        stored = _stored_types(conn)
+        same = ROW_ID in stored and {c: t for c, t in stored.items() if c != ROW_ID} == {c: types[c] for c in header}
+        if mode == "delta" and not same:
+            mode = "replace"  # 처음 적재하거나 컬럼/형이 바뀌었거나 _row_id 가 없는 예전 테이블이면 통째로 교체
+        if mode == "upsert" and UPSERT_KEY not in header:
+            raise IngestError(f"upsert 에는 '{UPSERT_KEY}' 컬럼이 필요합니다")
+        if mode == "delta" or (mode == "upsert" and same):
+            stats = _apply_delta(conn, dialect, header, types, _chain(first, chunks), mode)
+        else:
+            stats = _swap(conn, dialect, header, types, _chain(first, chunks), mode)
+    # 커밋된 세대로 벡터 파일을 쓴다 (바뀐 게 없는 delta 면 이미 있는 파일을 그대로 둔다)
+    stats["vectors"] = ensure_course_vectors(engine, stats["generation"])["rows"]
+    return stats
+
+def _chain(first, rest):
+    if first:
+        yield first
+    yield from rest
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="courses CSV 적재")
+    ap.add_argument("--csv", default=CSV_PATH)
+    ap.add_argument("--mode", choices=("delta", "replace", "upsert"), default="delta",
+                    help="delta: 바뀐 행만 반영 / replace: CSV 로 통째 교체 / upsert: CSV 에 나온 교과목코드만 교체")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = ap.parse_args(argv)
 
-def main():
-    df = read_csv_smart(CSV_PATH)
-    df.columns = [c.strip() for c in df.columns]
-    df.to_sql("courses", engine, if_exists="replace", index=False)
-    print(f"Loaded {len(df)} rows into table 'courses'.")
+    engine = create_engine(DATABASE_URL)
+    t0 = time.perf_counter()
+    s = load(engine, args.csv, args.mode, args.chunk_rows)
+    print(f"Loaded {s['rows']} rows into table 'courses' ({s['mode']}; +{s['inserted']} ~{s['updated']} "
+          f"-{s['deleted']} ={s['unchanged']}, total {s['total']}, generation {s['generation']}, "
+          f"{time.perf_counter() - t0:.2f}s).")
 
 if __name__ == "__main__":
     main()
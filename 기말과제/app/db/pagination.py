@@ -0,0 +1,158 @@
+# 커서(keyset) 페이지네이션 + 스트리밍 응답
+# OFFSET 은 건너뛰는 행 수만큼 비용이 드므로, 마지막 행의 (정렬 키, 행 id) 를 커서로 돌려주고 다음 페이지는 그 뒤부터 읽는다.
+# 행 id: 적재 때 만드는 대리 키 _row_id (SQLite 는 INTEGER PRIMARY KEY = rowid 별칭, PostgreSQL 은 IDENTITY).
+#   delta 적재의 UPDATE 는 이 값을 그대로 두므로, 세대가 바뀌어도 바뀌지 않은 행 뒤로 커서가 이어진다.
+#   _row_id 가 없는 예전 테이블은 rowid / ctid (ctid 는 UPDATE 때 바뀌므로 한 세대 안에서만 유효).
+# 스트리밍은 pandas 없이 DB 커서에서 한 행씩 NDJSON / JSON 배열로 흘려보낸다.
+import base64
+import json
+from typing import AsyncIterator, Iterator, List, Optional
+
+from sqlalchemy import inspect, text
+
+KEY_CANDIDATES = ("교과목코드", "과목코드", "코드", "code")
+KEY_INDEX = "courses_keyset_idx"
+ROW_ID = "_row_id"
+STREAM_BATCH = 500
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw.decode("utf-8"))
+    except Exception:
+        raise ValueError(f"잘못된 cursor: {cursor}")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError(f"잘못된 cursor: {cursor}")
+    return values
+
+def row_id_expr(dialect: str, cols=()) -> str:
+    if ROW_ID in cols:
+        return f'"{ROW_ID}"'
+    return "ctid" if dialect == "postgresql" else "rowid"
+
+def row_id_param(rid: str, name: str) -> str:
+    return f"CAST(:{name} AS tid)" if rid == "ctid" else f":{name}"
+
+def row_id_ddl(dialect: str) -> str:
+    # 적재 때 새 테이블 맨 앞에 붙이는 대리 키 컬럼
+    if dialect == "postgresql":
+        return f'"{ROW_ID}" BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY'
+    return f'"{ROW_ID}" INTEGER PRIMARY KEY AUTOINCREMENT'   # 지운 행의 id 를 다시 쓰지 않도록
+
+def resolve_key_column(cols) -> Optional[str]:
+    return next((k for k in KEY_CANDIDATES if k in cols), None)
+
+def key_column(engine) -> Optional[str]:
+    return resolve_key_column({c["name"] for c in inspect(engine).get_columns("courses")})
+
+def create_key_index(c, key: Optional[str]):
+    if key is not None:
+        c.execute(text(f'CREATE INDEX IF NOT EXISTS {KEY_INDEX} ON courses ("{key}")'))
+
+def ensure_key_index(engine):
+    key = key_column(engine)
+    if key is None:
+        return
+    with engine.begin() as c:
+        create_key_index(c, key)
+
+def _keyset_where(key_expr: str, rid: str, nulls_first: bool, after_null: bool) -> str:
+    # (키, 행 id) 뒤의 행. 행 값 비교는 키가 NULL 이면 참/거짓이 아니라 NULL 이라 NULL 행을 따로 이어 준다
+    cr = row_id_param(rid, "cr")
+    if after_null:
+        # 커서가 NULL 묶음 안: 같은 NULL 묶음의 뒤쪽 (+ NULL 이 앞에 오면 NULL 이 아닌 행 전부)
+        tail = f"{key_expr} IS NULL AND {rid} > {cr}"
+        return f"({tail}) OR {key_expr} IS NOT NULL" if nulls_first else tail
+    after = f"({key_expr}, {rid}) > (:ck, {cr})"
+    return after if nulls_first else f"{after} OR {key_expr} IS NULL"
+
+def _courses_sql(rid: str, key: Optional[str], has_after: bool, has_limit: bool, has_offset: bool,
+                 nulls_first: bool = True, after_null: bool = False) -> str:
+    # 결과 행에는 커서용 _key, _rid 가 붙는다 (응답 전에 strip_cursor_cols 로 뺀다)
+    # NULL 키의 자리는 DB 기본값(SQLite 앞, PostgreSQL 뒤)을 그대로 명시한다 — 그래야 키 색인을 그대로 탄다
+    key_expr = f'"{key}"' if key else "NULL"
+    where = ""
+    if has_after:
+        where = (f"WHERE {_keyset_where(key_expr, rid, nulls_first, after_null)}" if key
+                 else f"WHERE {rid} > {row_id_param(rid, 'cr')}")
+    nulls = "NULLS FIRST" if nulls_first else "NULLS LAST"
+    order = f"{key_expr} {nulls}, {rid}" if key else rid
+    sql = f"SELECT *, {key_expr} AS _key, {rid} AS _rid FROM courses {where} ORDER BY {order}"
+    if has_limit:
+        sql += " LIMIT :limit"
+    if has_offset:
+        sql += " OFFSET :offset"
+    return sql
+
+def courses_statement(dialect: str, key: Optional[str], limit: int, offset: int = 0, after: Optional[list] = None,
+                      statements=None, rid: Optional[str] = None):
+    # 반환: (문장, params). statements(StatementCache)가 있으면 모양별로 한 번 만든 TextClause 를 재사용
+    # rid: 행 id 식 (스키마 캐시의 row_id, 없으면 rowid / ctid)
+    rid = rid or row_id_expr(dialect)
+    params = {}
+    after_null = after is not None and after[0] is None
+    if after is not None:
+        params["cr"] = after[1]
+        if not after_null:
+            params["ck"] = after[0]
+    if limit > 0:
+        params["limit"] = int(limit)
+    if offset > 0 and after is None:
+        params["offset"] = int(offset)
+    shape = (after is not None, limit > 0, offset > 0 and after is None, dialect != "postgresql", after_null)
+    build = lambda: _courses_sql(rid, key, *shape)
+    if statements is None:
+        return text(build()), params
+    return statements.get(("courses", dialect, key, rid) + shape, build), params
+
+CURSOR_COLS = ("_key", "_rid", "_score", "_total", ROW_ID)
+
+def strip_cursor_cols(row: dict) -> dict:
+    for k in CURSOR_COLS:
+        row.pop(k, None)
+    return row
+
+def next_cursor(rows: List[dict], limit: int, cols=("_key", "_rid")) -> Optional[str]:
+    # 페이지가 꽉 찼을 때만 다음 커서 (마지막 행 기준)
+    if limit <= 0 or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor([last[cols[0]], last[cols[1]]])
+
+STREAM_MEDIA = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+def stream_rows(engine, stmt, params: dict, fmt: str = "ndjson") -> Iterator[bytes]:
+    # 연결은 생성기 안에서 열고 닫는다 (응답을 다 보낼 때까지 서버 쪽 커서 유지)
+    dump = lambda r: json.dumps(strip_cursor_cols(dict(r)), ensure_ascii=False, default=str)
+    with engine.connect() as c:
+        result = c.execution_options(stream_results=True, yield_per=STREAM_BATCH).execute(stmt, params).mappings()
+        if fmt == "json":
+            yield b"["
+            first = True
+            for r in result:
+                yield (b"" if first else b",") + dump(r).encode("utf-8")
+                first = False
+            yield b"]"
+        else:
+            for r in result:
+                yield (dump(r) + "\n").encode("utf-8")
+
+async def astream_rows(async_engine, stmt, params: dict, fmt: str = "ndjson") -> AsyncIterator[bytes]:
+    # stream_rows 의 AsyncEngine 판
+    dump = lambda r: json.dumps(strip_cursor_cols(dict(r)), ensure_ascii=False, default=str)
+    async with async_engine.connect() as c:
+        result = (await c.stream(stmt, params)).mappings()
+        if fmt == "json":
+            yield b"["
+            first = True
+            async for r in result:
+                yield (b"" if first else b",") + dump(r).encode("utf-8")
+                first = False
+            yield b"]"
+        else:
+            async for r in result:
+                yield (dump(r) + "\n").encode("utf-8")
@@ -0,0 +1,116 @@
+# courses 테이블 스키마 캐시 + SQL 문장 캐시
+# 컬럼 목록과 거기서 정해지는 값(검색 대상 컬럼, 커서 정렬 키)을 시작 시 한 번 읽어 두고,
+# 재적재(catalog generation 변경) 때만 다시 읽는다. 요청마다 LIMIT 1 로 컬럼을 알아내거나 SQL 을 새로 만들지 않는다.
+# 문장 캐시: (이름, 방언, 모양) → TextClause. 같은 TextClause 를 재사용하면 SQLAlchemy 컴파일 캐시도 그대로 맞는다.
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.sql.elements import TextClause
+
+from .catalog import RefreshCheck, get_generation
+from .pagination import ROW_ID, resolve_key_column, row_id_expr
+from .search_index import resolve_search_fields
+
+TABLE = "courses"
+MAX_STATEMENTS = 256
+
+class StatementCache:
+    def __init__(self, size: int = MAX_STATEMENTS):
+        self.size = size
+        self.items: "OrderedDict[tuple, TextClause]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple, build: Callable[[], str]) -> TextClause:
+        with self.lock:
+            stmt = self.items.get(key)
+            if stmt is not None:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return stmt
+            self.misses += 1
+            stmt = self.items[key] = text(build())
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+            return stmt
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+    def info(self) -> dict:
+        return {"size": len(self.items), "hits": self.hits, "misses": self.misses}
+
+@dataclass
+class CatalogSchema:
+    dialect: str
+    columns: List[Tuple[str, str]]               # (이름, 타입)
+    key_column: Optional[str]                    # 커서 페이지네이션 정렬 키
+    search_fields: List[Tuple[str, float]]       # (컬럼, bm25 가중치)
+    row_id: str = "rowid"                        # 커서용 행 id 식 (_row_id, 예전 테이블은 rowid / ctid)
+    generation: int = 0
+    loaded_at: float = field(default_factory=time.time)
+
+    @property
+    def column_names(self) -> List[str]:
+        return [c for c, _ in self.columns]
+
+def introspect(engine) -> Optional[CatalogSchema]:
+    insp = inspect(engine)
+    if not insp.has_table(TABLE):
+        return None
+    cols = [(c["name"], str(c["type"])) for c in insp.get_columns(TABLE)]
+    names = {c for c, _ in cols}
+    return CatalogSchema(
+        dialect=engine.dialect.name,
+        columns=[(c, t) for c, t in cols if c != ROW_ID],
+        key_column=resolve_key_column(names),
+        search_fields=resolve_search_fields(names),
+        row_id=row_id_expr(engine.dialect.name, names),
+        generation=get_generation(engine),
+    )
+
+class SchemaRegistry:
+    def __init__(self):
+        self.schema: Optional[CatalogSchema] = None
+        self.statements = StatementCache()
+        self.refresh_check = RefreshCheck()
+        self.lock = threading.Lock()
+
+    def load(self, engine) -> Optional[CatalogSchema]:
+        with self.lock:
+            schema = introspect(engine)
+            self.statements.clear()  # 컬럼이 바뀌었을 수 있으니 문장도 새로
+            self.schema = schema
+            self.refresh_check.mark()
+            return schema
+
+    def cached(self) -> Optional[CatalogSchema]:
+        # 다시 확인할 때가 안 됐으면 DB 를 거치지 않고 바로 (async 경로에서 이벤트 루프를 막지 않도록)
+        if self.schema is not None and self.refresh_check.recent():
+            return self.schema
+        return None
+
+    def current(self, engine) -> CatalogSchema:
+        if self.schema is not None and self.refresh_check.recent():
+            return self.schema
+        if self.schema is None or self.refresh_check.read(engine) != self.schema.generation:
+            self.load(engine)
+        if self.schema is None:
+            raise RuntimeError(f"'{TABLE}' 테이블이 없습니다. ingest_csv.py 로 먼저 적재하세요.")
+        return self.schema
+
+    def info(self) -> dict:
+        s = self.schema
+        if s is None:
+            return {"loaded": False}
+        return {"loaded": True, "dialect": s.dialect, "table": TABLE, "columns": dict(s.columns),
+                "key_column": s.key_column, "row_id": s.row_id, "search_fields": [f for f, _ in s.search_fields],
+                "generation": s.generation, "loaded_at": s.loaded_at, "statements": self.statements.info()}
+
+catalog_schema = SchemaRegistry()
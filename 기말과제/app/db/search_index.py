@@ -0,0 +1,185 @@
+# 과목 검색 색인
+# SQLite: FTS5 trigram 가상 테이블(courses_fts, courses 를 content 로 쓰는 외부 콘텐츠 테이블)
+# PostgreSQL: pg_trgm GIN 식 인덱스 (교과목명 || 강좌담당교수 || 개설학과)
+# 적재(ingest) 직후 만들고, 서버 시작 시 없으면 만든다. 검색은 한 번의 쿼리로 결과와 전체 건수를 같이 가져온다.
+from typing import List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+
+FTS_TABLE = "courses_fts"
+TRGM_INDEX = "courses_search_trgm"
+# (컬럼 후보, bm25 가중치) — CSV 마다 이름이 조금씩 달라서 있는 것만 쓴다
+SEARCH_FIELDS = [
+    (("교과목명", "과목명", "name"), 10.0),
+    (("강좌담당교수", "담당교수", "교수", "professor"), 3.0),
+    (("개설학과", "dept"), 1.0),
+]
+MIN_TRIGRAM = 3  # trigram 토크나이저는 3글자 미만 검색어를 MATCH 로 찾지 못한다
+LIKE_ESCAPE = "\\"
+
+def _like_pattern(term: str) -> str:
+    # 검색어 안의 %, _ 는 와일드카드가 아니라 글자 그대로 (ESCAPE '\' 와 짝)
+    for ch in (LIKE_ESCAPE, "%", "_"):
+        term = term.replace(ch, LIKE_ESCAPE + ch)
+    return f"%{term}%"
+
+def resolve_search_fields(cols) -> List[Tuple[str, float]]:
+    out = []
+    for names, w in SEARCH_FIELDS:
+        hit = next((n for n in names if n in cols), None)
+        if hit:
+            out.append((hit, w))
+    return out
+
+def search_fields(engine) -> List[Tuple[str, float]]:
+    return resolve_search_fields({c["name"] for c in inspect(engine).get_columns("courses")})
+
+def _doc_expr(fields) -> str:
+    return " || ' ' || ".join(f"coalesce(CAST(\"{f}\" AS TEXT), '')" for f, _ in fields)
+
+def create_search_index(c, dialect: str, fields):
+    # 열린 트랜잭션(c) 안에서 색인을 새로 만든다 (적재 트랜잭션과 함께 커밋되도록)
+    if not fields:
+        return
+    cols = ", ".join(f'"{f}"' for f, _ in fields)
+    if dialect == "postgresql":
+        c.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        c.execute(text(f"DROP INDEX IF EXISTS {TRGM_INDEX}"))
+        c.execute(text(f"CREATE INDEX {TRGM_INDEX} ON courses USING gin (({_doc_expr(fields)}) gin_trgm_ops)"))
+    else:
+        c.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        c.execute(text(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({cols}, content='courses', "
+                       f"content_rowid='rowid', tokenize='trigram')"))
+        c.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')"))
+
+def sync_search_index(c, dialect: str, fields, removed, updated_rids=(), added_after_rid: Optional[int] = None):
+    # 변경분만 색인에 반영. removed = 삭제·수정된 행의 [(rid, {컬럼: 옛 값})], updated_rids = 수정된 행 rid,
+    # added_after_rid = 새 행을 넣기 전의 최대 rowid (새 행은 그 뒤 rowid 를 받는다).
+    # 외부 콘텐츠 FTS5 는 courses 를 따라가지 않으므로 옛 값으로 'delete' 를 넣고 새 행을 넣는다.
+    # pg_trgm GIN 은 테이블과 같이 갱신되므로 할 일이 없다.
+    if dialect == "postgresql" or not fields:
+        return
+    names = [f for f, _ in fields]
+    cols = ", ".join(f'"{f}"' for f in names)
+    marks = ", ".join(f":v{i}" for i in range(len(names)))
+    if removed:
+        c.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES('delete', :rid, {marks})"),
+                  [{"rid": rid, **{f"v{i}": row.get(f) for i, f in enumerate(names)}} for rid, row in removed])
+    if updated_rids:
+        c.execute(text(f"INSERT INTO {FTS_TABLE}(rowid, {cols}) SELECT rowid, {cols} FROM courses WHERE rowid = :rid"),
+                  [{"rid": rid} for rid in updated_rids])
+    if added_after_rid is not None:
+        c.execute(text(f"INSERT INTO {FTS_TABLE}(rowid, {cols}) SELECT rowid, {cols} FROM courses "
+                       f"WHERE rowid > :rid"), {"rid": added_after_rid})
+
+def build_search_index(engine):
+    fields = search_fields(engine)
+    with engine.begin() as c:
+        create_search_index(c, engine.dialect.name, fields)
+
+def has_search_index(c, dialect: str) -> bool:
+    if dialect == "postgresql":
+        return c.execute(text("SELECT 1 FROM pg_indexes WHERE indexname = :n"), {"n": TRGM_INDEX}).first() is not None
+    return inspect(c).has_table(FTS_TABLE)
+
+def ensure_search_index(engine):
+    # 색인이 없으면(예: 예전 DB 파일) 만든다
+    with engine.connect() as c:
+        exists = has_search_index(c, engine.dialect.name)
+    if not exists:
+        build_search_index(engine)
+
+def _search_shape(dialect: str, q: str, limit: int, offset: int, after: Optional[list]):
+    # 반환: (shape, params). SQL 문장은 shape 에만 의존하므로 shape 별로 한 번만 만들어 캐시할 수 있다
+    terms = [t for t in q.split() if t]
+    params = {}
+    if dialect == "postgresql":
+        params.update({f"t{i}": _like_pattern(t) for i, t in enumerate(terms)})
+        params["q"] = q
+        n_terms = (len(terms),)
+    else:
+        long_terms = [t for t in terms if len(t) >= MIN_TRIGRAM]
+        short_terms = [t for t in terms if len(t) < MIN_TRIGRAM]
+        if long_terms:
+            params["m"] = " AND ".join('"' + t.replace('"', '""') + '"' for t in long_terms)
+        params.update({f"s{i}": _like_pattern(t) for i, t in enumerate(short_terms)})
+        n_terms = (bool(long_terms), len(short_terms))
+    if after is not None:
+        params.update(cs=after[0], cr=after[1])
+    if limit > 0:
+        params["limit"] = int(limit)
+    if offset > 0 and after is None:
+        params["offset"] = int(offset)
+    return n_terms + (after is not None, limit > 0, offset > 0 and after is None), params
+
+def _search_sql(dialect: str, fields, shape: tuple, rid: Optional[str] = None) -> str:
+    # 공백으로 나눈 검색어는 모두 포함(AND)해야 한다.
+    # 정렬은 (_score 오름차순, _rid) 로 고정해 두어 커서(after = [마지막 _score, 마지막 _rid])로 이어 읽을 수 있다.
+    # _rid: PostgreSQL 은 rid(대리 키 _row_id, 예전 테이블은 ctid), SQLite 는 FTS rowid (_row_id 가 있으면 그 별칭)
+    *terms, has_after, has_limit, has_offset = shape
+    rid = rid or "ctid"
+    if dialect == "postgresql":
+        doc = _doc_expr(fields)
+        where = " AND ".join(f"({doc}) ILIKE :t{i} ESCAPE '{LIKE_ESCAPE}'" for i in range(terms[0]))
+        inner = (f"SELECT *, -similarity({doc}, :q) AS _score, {rid} AS _rid, COUNT(*) OVER() AS _total "
+                 f"FROM courses WHERE {where}")
+        sql = f"SELECT * FROM ({inner}) s"
+        cursor_cond = "(s._score, s._rid) > (:cs, CAST(:cr AS tid))" if rid == "ctid" else "(s._score, s._rid) > (:cs, :cr)"
+        order = "s._score, s._rid"
+    else:
+        has_long, n_short = terms
+        conds = [f"{FTS_TABLE} MATCH :m"] if has_long else []
+        for i in range(n_short):
+            # 짧은 검색어는 색인된 필드에서 부분 문자열로 (FTS 테이블 안에서만 훑는다)
+            conds.append("(" + " OR ".join(f'{FTS_TABLE}."{f}" LIKE :s{i} ESCAPE \'{LIKE_ESCAPE}\'' for f, _ in fields) + ")")
+        weights = ", ".join(str(w) for _, w in fields)
+        score = f"bm25({FTS_TABLE}, {weights})" if has_long else "0"
+        # bm25() 는 창 함수와 같은 SELECT 에서 쓸 수 없어서 CTE 로 먼저 점수를 내고, 건수는 다음 단계에서
+        sql = (f"WITH hits AS (SELECT rowid AS rid, {score} AS score FROM {FTS_TABLE} WHERE {' AND '.join(conds)}), "
+               f"counted AS (SELECT rid, score, COUNT(*) OVER() AS total FROM hits) "
+               f"SELECT c.*, counted.score AS _score, counted.rid AS _rid, counted.total AS _total "
+               f"FROM counted JOIN courses c ON c.rowid = counted.rid")
+        cursor_cond = "(counted.score, counted.rid) > (:cs, :cr)"
+        order = "counted.score, counted.rid"
+    if has_after:
+        sql += f" WHERE {cursor_cond}"
+    sql += f" ORDER BY {order}"
+    if has_limit:
+        sql += " LIMIT :limit"
+    if has_offset:
+        sql += " OFFSET :offset"
+    return sql
+
+def search_statement(dialect: str, fields, q: str, limit: int, offset: int = 0, after: Optional[list] = None,
+                     statements=None, rid: Optional[str] = None):
+    # 반환: (문장, params). statements(StatementCache)가 있으면 shape 별로 만들어 둔 TextClause 를 재사용
+    shape, params = _search_shape(dialect, q, limit, offset, after)
+    build = lambda: _search_sql(dialect, fields, shape, rid)
+    if statements is None:
+        return text(build()), params
+    return statements.get(("search", dialect, tuple(f for f, _ in fields), rid) + shape, build), params
+
+def search_courses(conn, dialect: str, fields, q: str, limit: int, offset: int = 0, after: Optional[list] = None,
+                   statements=None, rid: Optional[str] = None):
+    # 반환: (전체 건수, 결과 dict 목록 — 커서용 _score/_rid 포함)
+    stmt, params = search_statement(dialect, fields, q, limit, offset, after, statements, rid)
+    rows = [dict(r) for r in conn.execute(stmt, params).mappings()]
+    if not rows and (offset > 0 or after is not None):
+        # 마지막 페이지를 넘긴 경우에만 건수를 따로 센다
+        stmt, params = search_statement(dialect, fields, q, 1, statements=statements, rid=rid)
+        first = conn.execute(stmt, params).mappings().first()
+        return (int(first["_total"]) if first else 0), []
+    total = rows[0]["_total"] if rows else 0
+    return int(total), rows
+
+async def asearch_courses(conn, dialect: str, fields, q: str, limit: int, offset: int = 0,
+                          after: Optional[list] = None, statements=None, rid: Optional[str] = None):
+    # search_courses 의 AsyncConnection 판
+    stmt, params = search_statement(dialect, fields, q, limit, offset, after, statements, rid)
+    rows = [dict(r) for r in (await conn.execute(stmt, params)).mappings()]
+    if not rows and (offset > 0 or after is not None):
+        stmt, params = search_statement(dialect, fields, q, 1, statements=statements, rid=rid)
+        first = (await conn.execute(stmt, params)).mappings().first()
+        return (int(first["_total"]) if first else 0), []
+    total = rows[0]["_total"] if rows else 0
+    return int(total), rows
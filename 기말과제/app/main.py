@@ -11,31 +11,49 @@ print(">>> PYTHONPATH:", sys.path[0])
 
 # ───────────────────────── 표준/외부 모듈 ─────────────────────────
 import re
-import random
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
 from typing import Optional, List, Dict, Any
 
-import pandas as pd
 from dotenv import load_dotenv
 from fastapi import FastAPI, Query
+from fastapi import Request as HTTPRequest  # scheduler.Request 와 이름이 겹친다
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
-from sqlalchemy import create_engine, text
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import create_engine
 from pydantic import BaseModel
 
 # ───────────────────────── 내부 모듈 (backend.core.*) ─────────────────────────
 try:
-    from backend.core.gemini_client import summarize_text_ko, rank_courses_ko
+    from backend.core.gemini_client import asummarize_text_ko, arank_courses_ko, astream_summary_ko, client as gemini
 except Exception:
-    def summarize_text_ko(text: str) -> str:
+    gemini = None
+    async def asummarize_text_ko(text: str) -> str:
         return text[:200] + ("..." if len(text) > 200 else "")
-    def rank_courses_ko(prefs: str, courses: list, topk: int = 5):
-        return courses[:topk]
+    async def astream_summary_ko(text: str, metrics: Optional[dict] = None):
+        yield await asummarize_text_ko(text)
 
-from backend.core.scheduler import (
-    solve, Course, Room, Instructor, Grid, Hard, Soft, Request
+from backend.core.room_monitor import room_monitor
+from backend.core.room_events import room_events
+from backend.core.availability import room_availability
+from backend.core.solve_cache import solve_cache
+from backend.core.recommend import recommender
+from backend.core.search_engine import search_engine
+from backend.core.response_cache import CatalogCacheMiddleware, response_cache
+from backend.core.json_response import FastJSONResponse, json_backend, dumps
+from backend.db.search_index import ensure_search_index, search_courses, asearch_courses, search_statement
+from backend.db.pagination import (
+    decode_cursor, next_cursor, strip_cursor_cols, courses_statement, stream_rows, astream_rows, ensure_key_index,
+    STREAM_MEDIA,
 )
-from backend.core.room_monitor import load_usage_data, get_current_empty_rooms
+from backend.db.async_db import db_async_enabled, pool_options, create_async_db_engine
+from backend.db.schema import catalog_schema
+from backend.db.catalog import changes_since, get_generation
+from backend.api.schedule import router as schedule_router
 
 # ───────────────────────── Env & DB ─────────────────────────
 # 루트(pjh/.env) 로드
@@ -50,11 +68,30 @@ if DATABASE_URL.startswith("sqlite:///./"):
     db_file = Path(__file__).resolve().parents[2] / DATABASE_URL.replace("sqlite:///./", "")
     DATABASE_URL = f"sqlite:///{db_file.as_posix()}"
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(DATABASE_URL, pool_pre_ping=True, **pool_options(DATABASE_URL))
 DB_DIALECT = engine.dialect.name
 
+# DB_ASYNC=1 이면 /health, /courses, /search 를 AsyncEngine(aiosqlite/asyncpg) 으로 처리.
+# 색인 생성·스키마 확인 같은 드문 작업은 계속 동기 engine 을 쓴다.
+DB_ASYNC = db_async_enabled()
+async_engine = create_async_db_engine(DATABASE_URL) if DB_ASYNC else None
+
 # ───────────────────────── FastAPI ─────────────────────────
-app = FastAPI(title="Courses API")
+# 시작 시 색인·스키마 준비 (_build_indexes)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _build_indexes()
+    yield
+
+# 기본 응답 클래스: orjson (NaN → null, numpy 스칼라 처리). JSON_RESPONSE=std 로 표준 json
+app = FastAPI(title="Courses API", default_response_class=FastJSONResponse, lifespan=lifespan)
+
+# 카탈로그 응답 캐시 + ETag/304 (세대 번호가 바뀌면 자동으로 새 키).
+# add_middleware 는 나중에 넣은 것이 바깥이 되므로 CORS 보다 먼저 등록 → 캐시 응답에도 CORS 헤더가 붙는다
+async def _catalog_generation() -> int:
+    return (await _schema_async()).generation
+
+app.add_middleware(CatalogCacheMiddleware, paths=("/courses", "/search"), generation=_catalog_generation)
 
 app.add_middleware(
     CORSMiddleware,
@@ -67,6 +104,27 @@ FRONT_DIR = Path(__file__).resolve().parents[2] / "frontend"
 if FRONT_DIR.exists():
     app.mount("/app", StaticFiles(directory=str(FRONT_DIR), html=True), name="static")
 
+def _build_indexes():
+    # 시작 시(lifespan) 추천 후보 색인 미리 만들기 (courses 테이블이 없으면 첫 요청 때 다시 시도)
+    try:
+        recommender.refresh(engine, force=True)
+    except Exception as e:
+        print(">>> recommend index skipped:", e)
+    try:
+        search_engine.refresh(engine, force=True)
+    except Exception as e:
+        print(">>> suggest index skipped:", e)
+    try:
+        ensure_search_index(engine)
+        ensure_key_index(engine)
+    except Exception as e:
+        print(">>> search index skipped:", e)
+    # 컬럼/검색 필드/정렬 키는 여기서 한 번 읽어 두고 재적재 때만 다시 읽는다
+    try:
+        catalog_schema.load(engine)
+    except Exception as e:
+        print(">>> schema load skipped:", e)
+
 # ───────────────────────── Schemas ─────────────────────────
 class SummaryIn(BaseModel):
     text: str
@@ -75,15 +133,6 @@ class RecommendIn(BaseModel):
     preferences: str
     limit: int = 5
 
-class ScheduleIn(BaseModel):
-    days: List[str] = ["MON", "TUE", "WED", "THU", "FRI"]
-    periodsPerDay: int = 9
-    blockMinutes: int = 50
-    preferMorning: bool = True
-    priorityWeight: int = 1
-    natural: str = ""
-    noFridayEvening: bool = False
-
 # ───────────────────────── 공통 유틸 ─────────────────────────
 def _to_int(x, default=0):
     if x is None:
@@ -99,86 +148,253 @@ def _to_int(x, default=0):
     except Exception:
         return default
 
-def _pick_name_col(cols):
-    for k in ["교과목명", "과목명", "name", "NAME"]:
-        if k in cols:
-            return k
-    return cols[0] if cols else "교과목명"
+def _bad_request(e: Exception):
+    return JSONResponse(status_code=400, content={"detail": str(e)})
+
+def _page_args(cursor: Optional[str], stream: Optional[str], limit: int):
+    # 반환: (after, 오류 응답 또는 None)
+    if stream and stream not in STREAM_MEDIA:
+        return None, _bad_request(ValueError(f"stream 은 {', '.join(STREAM_MEDIA)} 중 하나"))
+    if limit <= 0 and stream != "ndjson":
+        # 한 번에 전부 메모리에 올리는 응답은 막는다 (전체 내보내기는 한 행씩 흘려보내는 ndjson 으로만)
+        return None, _bad_request(ValueError("limit 은 1 이상이어야 합니다 (전체 내보내기는 stream=ndjson)"))
+    try:
+        return (decode_cursor(cursor) if cursor else None), None
+    except ValueError as e:
+        return None, _bad_request(e)
+
+def _courses_response(rows: list, limit: int):
+    nxt = next_cursor(rows, limit)
+    resp = FastJSONResponse([strip_cursor_cols(r) for r in rows])
+    if nxt:
+        resp.headers["X-Next-Cursor"] = nxt
+    return resp
+
+def _search_response(total: int, rows: list, limit: int):
+    nxt = next_cursor(rows, limit, cols=("_score", "_rid"))
+    # 응답 객체를 직접 돌려줘서 jsonable_encoder 를 거치지 않는다
+    return FastJSONResponse({"total": total, "results": [strip_cursor_cols(r) for r in rows], "next_cursor": nxt})
+
+def _pool_status(e) -> str:
+    return e.pool.status() if e is not None else ""
 
 # ───────────────────────── Endpoints ─────────────────────────
-@app.get("/health")
 def health():
-    return {"ok": True, "db": DATABASE_URL, "dialect": DB_DIALECT}
+    return {"ok": True, "db": DATABASE_URL, "dialect": DB_DIALECT, "db_mode": "sync", "pool": _pool_status(engine),
+            "schema": catalog_schema.info(), "schedule_cache": solve_cache.info(), "response_cache": response_cache.info(),
+            "json": json_backend(), "recommend": recommender.info()}
+
+# cursor: 이전 응답의 X-Next-Cursor / next_cursor 값 (교과목코드, 행 id 기준 keyset — OFFSET 대신)
+# stream=ndjson|json: pandas 없이 DB 커서에서 바로 흘려보냄 (limit=0 전체 내보내기는 ndjson 만)
+def courses(limit: int = 20, offset: int = 0, cursor: Optional[str] = None, stream: Optional[str] = None):
+    after, err = _page_args(cursor, stream, limit)
+    if err:
+        return err
+    schema = catalog_schema.current(engine)
+    stmt, params = courses_statement(DB_DIALECT, schema.key_column, limit, offset, after, catalog_schema.statements,
+                                     schema.row_id)
+    if stream:
+        return StreamingResponse(stream_rows(engine, stmt, params, stream), media_type=STREAM_MEDIA[stream])
 
-@app.get("/courses")
-def courses(limit: int = 20, offset: int = 0):
     with engine.connect() as c:
-        df = pd.read_sql(text(f"SELECT * FROM courses LIMIT {int(limit)} OFFSET {int(offset)}"), c)
-    return df.to_dict(orient="records")
+        rows = [dict(r) for r in c.execute(stmt, params).mappings()]
+    return _courses_response(rows, limit)
 
-@app.get("/search")
-def search(q: str = Query(..., min_length=1), limit: int = 100, offset: int = 0):
+def search(q: str = Query(..., min_length=1), limit: int = 100, offset: int = 0,
+           cursor: Optional[str] = None, stream: Optional[str] = None):
     try:
         q = (q or "").strip()
         if not q:
             return {"total": 0, "results": []}
+        after, err = _page_args(cursor, stream, limit)
+        if err:
+            return err
+
+        schema = catalog_schema.current(engine)
+        if stream:
+            stmt, params = search_statement(DB_DIALECT, schema.search_fields, q, limit, offset, after,
+                                            catalog_schema.statements, schema.row_id)
+            return StreamingResponse(stream_rows(engine, stmt, params, stream), media_type=STREAM_MEDIA[stream])
 
+        # FTS5 trigram / pg_trgm 색인으로 한 번에 (결과 + COUNT(*) OVER())
         with engine.connect() as c:
-            cols = pd.read_sql(text("SELECT * FROM courses LIMIT 1"), c).columns.tolist()
-            name_col = _pick_name_col(cols)
-
-            if DB_DIALECT == "postgresql":
-                sql = text(f'''
-                    SELECT * FROM courses
-                    WHERE CAST("{name_col}" AS TEXT) ILIKE :kw
-                    ORDER BY 1
-                    LIMIT {int(limit)} OFFSET {int(offset)}
-                ''')
-                cnt_sql = text(f'''
-                    SELECT COUNT(*) FROM courses
-                    WHERE CAST("{name_col}" AS TEXT) ILIKE :kw
-                ''')
-                params = {"kw": f"%{q}%"}
-
-            else:
-                sql = text(f'''
-                    SELECT * FROM courses
-                    WHERE LOWER(CAST("{name_col}" AS TEXT)) LIKE :kw
-                    ORDER BY 1
-                    LIMIT {int(limit)} OFFSET {int(offset)}
-                ''')
-                cnt_sql = text(f'''
-                    SELECT COUNT(*) FROM courses
-                    WHERE LOWER(CAST("{name_col}" AS TEXT)) LIKE :kw
-                ''')
-                params = {"kw": f"%{q.lower()}%"}
-
-            df = pd.read_sql(sql, c, params=params)
-            total = c.execute(cnt_sql, params).scalar() or 0
-
-        return {"total": int(total), "results": df.to_dict(orient="records")}
+            total, rows = search_courses(c, DB_DIALECT, schema.search_fields, q, limit, offset, after,
+                                         catalog_schema.statements, schema.row_id)
+        return _search_response(total, rows, limit)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": f"/search 실패: {e}"})
+
+# ─── async 판 (DB_ASYNC=1) ───
+async def _schema_async():
+    # 캐시가 신선하면 바로, 아니면 세대 확인(동기 DB 호출)을 스레드풀에서
+    return catalog_schema.cached() or await run_in_threadpool(catalog_schema.current, engine)
+
+async def health_async():
+    return {"ok": True, "db": DATABASE_URL, "dialect": DB_DIALECT, "db_mode": "async",
+            "pool": _pool_status(async_engine), "schema": catalog_schema.info(), "schedule_cache": solve_cache.info(),
+            "response_cache": response_cache.info(), "json": json_backend(), "recommend": recommender.info()}
+
+async def courses_async(limit: int = 20, offset: int = 0, cursor: Optional[str] = None, stream: Optional[str] = None):
+    after, err = _page_args(cursor, stream, limit)
+    if err:
+        return err
+    schema = await _schema_async()
+    stmt, params = courses_statement(DB_DIALECT, schema.key_column, limit, offset, after, catalog_schema.statements,
+                                     schema.row_id)
+    if stream:
+        return StreamingResponse(astream_rows(async_engine, stmt, params, stream), media_type=STREAM_MEDIA[stream])
+
+    async with async_engine.connect() as c:
+        rows = [dict(r) for r in (await c.execute(stmt, params)).mappings()]
+    return _courses_response(rows, limit)
+
+async def search_async(q: str = Query(..., min_length=1), limit: int = 100, offset: int = 0,
+                       cursor: Optional[str] = None, stream: Optional[str] = None):
+    try:
+        q = (q or "").strip()
+        if not q:
+            return {"total": 0, "results": []}
+        after, err = _page_args(cursor, stream, limit)
+        if err:
+            return err
+
+        schema = await _schema_async()
+        if stream:
+            stmt, params = search_statement(DB_DIALECT, schema.search_fields, q, limit, offset, after,
+                                            catalog_schema.statements, schema.row_id)
+            return StreamingResponse(astream_rows(async_engine, stmt, params, stream), media_type=STREAM_MEDIA[stream])
+
+        async with async_engine.connect() as c:
+            total, rows = await asearch_courses(c, DB_DIALECT, schema.search_fields, q, limit, offset, after,
+                                                catalog_schema.statements, schema.row_id)
+        return _search_response(total, rows, limit)
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": f"/search 실패: {e}"})
 
+# 같은 경로에 sync / async 중 하나만 등록 (DB_ASYNC 로 전환해 처리량 비교)
+for _path, _sync, _async in (("/health", health, health_async), ("/courses", courses, courses_async),
+                             ("/search", search, search_async)):
+    app.add_api_route(_path, _async if DB_ASYNC else _sync, methods=["GET"])
+
+# 시간표: /schedule, /schedule/optimize, /schedule/jobs, /schedule/{id}/delta
+app.include_router(schedule_router)
+
+# 적재 세대 구독: since 이후의 적재 기록(추가/수정/삭제 건수). 바뀐 게 없는 적재는 세대를 올리지 않는다
+@app.get("/catalog/changes")
+def catalog_changes(since: int = 0, limit: int = 100):
+    return {"generation": get_generation(engine), "changes": changes_since(engine, since, max(1, min(limit, 1000)))}
+
+@app.get("/search/suggest")
+def search_suggest(q: str = Query(..., min_length=1), limit: int = 10):
+    # 메모리 색인(자모 접두 트라이 + n-gram)만 사용, DB 조회 없음
+    try:
+        t0 = time.perf_counter()
+        items = search_engine.suggest(engine, q, max(1, min(limit, 50)))
+        return {"q": q, "suggestions": items, "took_ms": round((time.perf_counter() - t0) * 1000, 3)}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": f"/search/suggest 실패: {e}"})
+
+# LLM 호출은 async (동시 호출 수 제한 + 같은 프롬프트 합치기 + SQLite 응답 캐시, core/gemini_client.py)
 @app.post("/gemini/summary")
-def gemini_summary(body: SummaryIn):
-    return {"summary": summarize_text_ko(body.text)}
+async def gemini_summary(body: SummaryIn):
+    return {"summary": await asummarize_text_ko(body.text)}
+
+# 요약 스트리밍 (SSE): 조각이 나오는 대로 event: token, 끝나면 event: done 에 이 요청의 TTFT/총 시간.
+# EventSource 는 POST 를 못 하므로 브라우저에서는 fetch 의 ReadableStream 으로 읽는다.
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
+
+@app.post("/gemini/summary/stream")
+async def gemini_summary_stream(body: SummaryIn):
+    metrics: dict = {}
+
+    async def stream():
+        try:
+            async for piece in astream_summary_ko(body.text, metrics):
+                yield _sse("token", {"text": piece})
+        except Exception as e:
+            yield _sse("error", {"detail": f"요약 실패: {e}"})
+            return
+        yield _sse("done", metrics)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.post("/gemini/recommend")
-def gemini_recommend(body: RecommendIn):
+async def gemini_recommend(body: RecommendIn):
     topk = max(1, min(body.limit, 10))
-    with engine.connect() as c:
-        df = pd.read_sql(text("SELECT * FROM courses"), c)
-    courses = df.to_dict(orient="records")
-    res = rank_courses_ko(body.preferences, courses, topk=topk)
-    return {"result": res}
+    if gemini is None:
+        # LLM 을 쓸 수 없으면 로컬 과목 벡터(코사인 top-K)로 바로
+        res = await run_in_threadpool(recommender.recommend_local, engine, body.preferences, topk)
+        return FastJSONResponse({"result": res, "candidates": len(res), "source": "local"})
+    # 1단계: 로컬 BM25 + 과목 벡터로 후보 K개 → 2단계: 후보만 LLM 에 넘겨 순위/이유
+    courses = await run_in_threadpool(recommender.candidates, engine, body.preferences)
+    try:
+        res = await arank_courses_ko(body.preferences, courses, topk=topk)
+    except Exception as e:
+        print(">>> gemini recommend failed, using local vectors:", e)
+        res = await run_in_threadpool(recommender.recommend_local, engine, body.preferences, topk)
+        return FastJSONResponse({"result": res, "candidates": len(courses), "source": "local"})
+    return FastJSONResponse({"result": res, "candidates": len(courses), "source": "gemini"})
+
+@app.get("/gemini/stats")
+def gemini_stats():
+    return gemini.info() if gemini is not None else {"backend": None}
 
 # ───────────────────────── 실시간 공실 API ─────────────────────────
+# at: 기준 시각(ISO, 기본 지금), duration: 그 시각부터 몇 분 동안 비어 있어야 하는지
 @app.get("/v1/rooms/empty")
-def api_empty_rooms():
-    df = load_usage_data()
-    empty_rooms = get_current_empty_rooms(df)
-    return {"timestamp": pd.Timestamp.now().isoformat(), "empty_rooms": empty_rooms}
+def api_empty_rooms(at: Optional[str] = None, duration: int = 0):
+    try:
+        when = datetime.fromisoformat(at) if at else datetime.now()
+    except ValueError as e:
+        return _bad_request(e)
+    empty_rooms = room_monitor.empty_rooms(when, max(0, duration))
+    return FastJSONResponse({"timestamp": when.isoformat(), "duration": max(0, duration), "empty_rooms": empty_rooms})
+
+# 강의실 찾기: day 요일 block 교시부터 minutes 분 동안 비어 있고 정원 ≥ min_capacity, 태그(tag, 여러 개면 모두)를 가진 방.
+# 가장 최근 배정 시간표 기준 (솔버와 같은 가용성 구조). day/block 을 생략하면 지금 시각 기준 (1교시 = ROOM_DAY_START)
+@app.get("/v1/rooms")
+def api_rooms(day: Optional[str] = None, block: Optional[int] = None, minutes: Optional[int] = None,
+              min_capacity: int = 0, tag: List[str] = Query([])):
+    av = room_availability.current()
+    grid = av.grid
+    now = datetime.now()
+    day = (day or ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"][now.weekday()]).upper()[:3]
+    block = block if block is not None else av.block_at(now)
+    if day not in grid.days or not 1 <= block <= grid.blocks_per_day:
+        return _bad_request(ValueError(f"시간표 밖입니다: {day} {block}교시 (요일 {grid.days}, 1~{grid.blocks_per_day}교시)"))
+    duration = max(1, -(-(minutes or grid.block_minutes) // grid.block_minutes))
+    rooms = av.free_rooms(day, block, duration, min_capacity, tag)
+    # timetable: 배정한 시간표가 아직 없으면 false (기본 강의실이 모두 빈 것으로 나온다)
+    return FastJSONResponse({"day": day, "block": block, "duration_blocks": duration, "min_capacity": min_capacity,
+                             "timetable": room_availability.published is not None,
+                             "tags": tag, "rooms": [{"id": r.id, "name": r.name, "capacity": r.capacity,
+                                                     "tags": r.tags or []} for r in rooms]})
+
+# 공실 변화 SSE: 접속 시 현재 상태 1회, 이후엔 어떤 방이 비거나 찰 때만 (모든 탭이 방송 작업 하나를 공유)
+ROOM_EVENTS_HEARTBEAT = 25.0
+
+@app.get("/v1/rooms/events")
+async def api_room_events(request: HTTPRequest):
+    q = await room_events.subscribe()
+
+    async def stream():
+        try:
+            while True:
+                try:
+                    snap = await asyncio.wait_for(q.get(), timeout=ROOM_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": ping\n\n"  # 프록시가 연결을 끊지 않도록
+                    continue
+                yield _sse("rooms", snap)
+        finally:
+            room_events.unsubscribe(q)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 # ───────────────────────── Entry ─────────────────────────
 if __name__ == "__main__":
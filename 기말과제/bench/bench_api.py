@@ -0,0 +1,86 @@
+# Courses API 처리량 측정
+# 실행 중인 서버에 동시 요청을 보내 엔드포인트별 처리량(req/s)과 지연(p50/p95/p99)을 잰다.
+# DB_ASYNC=0 / 1 로 서버를 각각 띄워 같은 명령으로 돌리면 동기/비동기 경로를 비교할 수 있다.
+#
+#   DB_ASYNC=1 python -m uvicorn backend.app.main:app --port 8000 --workers 1
+#   python bench/bench_api.py --url http://localhost:8000 --concurrency 32 --requests 2000 --out bench_out/api_async.json
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+
+import httpx
+
+DEFAULT_TARGETS = [
+    "/health",
+    "/courses?limit=20",
+    "/courses?limit=100",
+    "/search?q=데이터&limit=100",
+    "/search?q=실습&limit=20",
+]
+
+def _pct(xs, p):
+    if not xs:
+        return None
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))]
+
+async def run_target(client: httpx.AsyncClient, path: str, total: int, concurrency: int) -> dict:
+    lat, errors, sizes = [], 0, []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with sem:
+            t = time.perf_counter()
+            try:
+                r = await client.get(path)
+                if r.status_code != 200:
+                    errors += 1
+                sizes.append(len(r.content))
+            except httpx.HTTPError:
+                errors += 1
+            lat.append((time.perf_counter() - t) * 1000)
+
+    await client.get(path)  # 예열 (색인/문장 캐시)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    wall = time.perf_counter() - t0
+    return {
+        "path": path, "requests": total, "concurrency": concurrency, "errors": errors,
+        "rps": round(total / wall, 1),
+        "p50_ms": round(_pct(lat, 50), 2), "p95_ms": round(_pct(lat, 95), 2), "p99_ms": round(_pct(lat, 99), 2),
+        "mean_ms": round(statistics.fmean(lat), 2),
+        "bytes": int(statistics.fmean(sizes)) if sizes else 0,
+    }
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        health = (await client.get("/health")).json()
+        rows = []
+        for path in args.paths or DEFAULT_TARGETS:
+            row = await run_target(client, path, args.requests, args.concurrency)
+            rows.append(row)
+            print(f"{path:<32} {row['rps']:>8} req/s  p50={row['p50_ms']}ms p95={row['p95_ms']}ms "
+                  f"p99={row['p99_ms']}ms errors={row['errors']}", flush=True)
+    return {"meta": {"url": args.url, "db_mode": health.get("db_mode"), "dialect": health.get("dialect"),
+                     "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, "results": rows}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Courses API 처리량 측정")
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--requests", type=int, default=1000, help="엔드포인트당 요청 수")
+    ap.add_argument("--path", dest="paths", action="append", help="측정할 경로 (여러 번 지정 가능)")
+    ap.add_argument("--out", help="결과 JSON 경로")
+    args = ap.parse_args(argv)
+    report = asyncio.run(main_async(args))
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
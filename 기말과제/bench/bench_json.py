@@ -0,0 +1,89 @@
+# 응답 직렬화 벤치마크 (before / after)
+# 엔드포인트별 실제 응답 모양을 courses DB 에서 만들어 두고
+#   before: FastAPI 기본 경로 = jsonable_encoder → JSONResponse(json.dumps)
+#   after : FastJSONResponse (orjson, 핸들러가 직접 돌려줘서 jsonable_encoder 생략)
+# 의 렌더링 시간을 잰다. 서버 전체 지연은 JSON_RESPONSE=std / orjson 으로 띄워 bench_api.py 로 비교.
+#
+#   python bench/bench_json.py --db courses.db --repeat 300 --out bench_out/json.json
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # app.* import 용
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, text
+
+from app.core.json_response import FastJSONResponse, json_backend
+from app.core.recommend import recommender
+from app.db.pagination import strip_cursor_cols
+from app.db.schema import catalog_schema
+from app.db.search_index import ensure_search_index, search_courses
+
+def build_payloads(engine) -> dict:
+    ensure_search_index(engine)  # 앱 시작 때와 같이 (없을 때만 만든다)
+    schema = catalog_schema.load(engine)
+    with engine.connect() as c:
+        rows100 = [dict(r) for r in c.execute(text("SELECT * FROM courses LIMIT 100")).mappings()]
+        total, hits = search_courses(c, engine.dialect.name, schema.search_fields, "데이터", 100)
+    cands = recommender.candidates(engine, "데이터 분석 실습", 30)
+    # pandas 경로(공실/시간표)에서 새는 값: NaN, numpy 스칼라
+    mixed = [{**r, "수강인원": np.int64(i), "score": np.float64("nan") if i % 3 == 0 else np.float32(0.5)}
+             for i, r in enumerate(rows100[:50])]
+    return {
+        "/courses?limit=20": rows100[:20],
+        "/courses?limit=100": rows100,
+        "/search?q=데이터&limit=100": {"total": total, "results": [strip_cursor_cols(r) for r in hits],
+                                     "next_cursor": None},
+        "/gemini/recommend (30 candidates)": {"result": cands, "candidates": len(cands)},
+        "pandas records (NaN/numpy)": mixed,
+    }
+
+def _before(payload) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+def _after(payload) -> bytes:
+    return FastJSONResponse(payload).body
+
+def measure(fn, payload, repeat: int) -> dict:
+    try:
+        body = fn(payload)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn(payload)
+        times.append((time.perf_counter() - t) * 1e6)
+    return {"median_us": round(statistics.median(times), 1), "p95_us": round(sorted(times)[int(0.95 * (repeat - 1))], 1),
+            "bytes": len(body)}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="응답 직렬화 벤치마크")
+    ap.add_argument("--db", default=str(Path(__file__).resolve().parents[1] / "courses.db"))
+    ap.add_argument("--repeat", type=int, default=300)
+    ap.add_argument("--out", help="결과 JSON 경로")
+    args = ap.parse_args(argv)
+
+    engine = create_engine(f"sqlite:///{Path(args.db).resolve().as_posix()}")
+    rows = []
+    for name, payload in build_payloads(engine).items():
+        before, after = measure(_before, payload, args.repeat), measure(_after, payload, args.repeat)
+        speedup = (round(before["median_us"] / after["median_us"], 2)
+                   if "median_us" in before and "median_us" in after else None)
+        rows.append({"endpoint": name, "before": before, "after": after, "speedup": speedup})
+        b = before.get("median_us", before.get("error"))
+        print(f"{name:<36} before={b}  after={after.get('median_us')}us  x{speedup}", flush=True)
+    report = {"meta": {"backend": json_backend(), "repeat": args.repeat,
+                       "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, "results": rows}
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
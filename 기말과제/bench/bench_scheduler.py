@@ -0,0 +1,251 @@
+# 시간표 솔버 벤치마크
+# 크기(세션 수)·강의실 빡빡함·강사 겹침을 바꿔 가며 합성 문제를 만들고, 엔진/모드별로 풀어서
+# 모델 생성 시간, 변수/제약 수, 풀이 시간, 목적값, 최대 RSS 를 JSON/CSV 로 남긴다.
+# 케이스마다 새 프로세스에서 돌려서 RSS 최대치가 앞 케이스에 오염되지 않게 한다.
+#
+#   python bench/bench_scheduler.py                              # 기본 매트릭스
+#   python bench/bench_scheduler.py --sizes 10,200 --engines interval,greedy --out bench_out
+#   python bench/bench_scheduler.py --baseline bench_out/report.json   # 회귀 시 종료 코드 1
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import random
+import resource
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # app.* import 용
+
+from app.core.scheduler import Course, Room, Instructor, Grid, Hard, Soft, Request, solve, greedy, SEEDED_WALL_FACTOR
+
+DAYS = ["MON", "TUE", "WED", "THU", "FRI"]
+BLOCKS_PER_DAY = 9
+MORNING_LAST_BLOCK = 3  # 솔버의 오전 선호와 같은 기준 (시작 교시 ≤ 3)
+
+DEFAULT_SIZES = [10, 50, 200, 1000, 5000]
+DEFAULT_ENGINES = ["greedy", "dense", "interval", "decomposed"]
+DEFAULT_TIGHTNESS = [0.5, 0.75]   # 전체 세션-블록 / 전체 방-블록
+DEFAULT_OVERLAP = [4]            # 강사 1명당 평균 세션 수
+MODES = {
+    "cold": {},
+    "warm": {"warm_start": True},
+}
+
+# ---------- 합성 문제 ----------
+@dataclass
+class Case:
+    sessions: int
+    tightness: float
+    overlap: float
+    engine: str
+    mode: str
+    seed: int = 1
+
+    @property
+    def name(self) -> str:
+        return f"n{self.sessions}-t{self.tightness}-o{self.overlap}-{self.engine}-{self.mode}"
+
+def generate(sessions: int, tightness: float, overlap: float, seed: int = 1):
+    # 세션 수가 sessions 가 될 때까지 과목을 만들고, 방 수는 빡빡함에 맞춰 정한다
+    rng = random.Random(seed)
+    n_inst = max(1, round(sessions / overlap))
+    n_dept = max(1, n_inst // 10)
+    courses, total, blocks = [], 0, 0
+    while total < sessions:
+        spw = min(rng.choice([1, 1, 2, 3]), sessions - total)
+        dur = rng.choice([1, 1, 2, 3]) if spw == 1 else 1
+        inst = rng.randrange(n_inst)
+        courses.append(Course(
+            id=f"C{len(courses):05d}", name=f"과목{len(courses)}",
+            size=rng.choice([20, 25, 30, 35, 40, 45, 55]),
+            sessions_per_week=spw, duration_blocks=dur,
+            instructor_id=f"I{inst:04d}", department=f"D{inst % n_dept:02d}",
+        ))
+        total += spw
+        blocks += spw * dur
+    slots = len(DAYS) * BLOCKS_PER_DAY
+    caps = [30, 45, 60]  # 가장 큰 과목(55명)도 들어갈 방이 있도록 정원 종류마다 최소 1개
+    n_rooms = max(len(caps), -(-blocks // int(slots * tightness)))
+    rooms = [Room(id=f"R{j:04d}", name=f"R{j}", capacity=caps[j % len(caps)]) for j in range(n_rooms)]
+    instructors = []
+    for k in range(n_inst):
+        unav = [(rng.choice(DAYS), rng.randint(1, BLOCKS_PER_DAY)) for _ in range(rng.randint(0, 3))]
+        instructors.append(Instructor(id=f"I{k:04d}", name=f"강사{k}", unavailable=unav))
+    return courses, rooms, instructors
+
+# ---------- 검증 ----------
+def check(courses, rooms, instructors, assignments) -> int:
+    # 위반 수: 방/강사 겹침, 정원 초과, 강사 불가 시간
+    by_id = {c.id: c for c in courses}
+    cap = {r.id: r.capacity for r in rooms}
+    unav = {i.id: set(i.unavailable or []) for i in instructors}
+    room_used, inst_used, bad = set(), set(), 0
+    for a in assignments:
+        c = by_id[a["course_id"]]
+        if cap.get(a["room_id"], 0) < c.size:
+            bad += 1
+        for b in range(a["block"], a["block"] + a.get("duration_blocks", 1)):
+            for used, key in ((room_used, a["room_id"]), (inst_used, c.instructor_id)):
+                if (key, a["day"], b) in used:
+                    bad += 1
+                used.add((key, a["day"], b))
+            if (a["day"], b) in unav.get(c.instructor_id, ()):
+                bad += 1
+    return bad
+
+# ---------- 실행 ----------
+def _peak_rss_mb() -> float:
+    # Linux: KB 단위. decomposed 는 자식 프로세스를 쓰므로 둘 중 큰 값
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(self_kb, child_kb) / 1024, 1)
+
+def run_case(case: Case, time_limit: float, workers: int) -> dict:
+    t0 = time.perf_counter()
+    courses, rooms, instructors = generate(case.sessions, case.tightness, case.overlap, case.seed)
+    gen_seconds = time.perf_counter() - t0
+    req = Request(
+        grid=Grid(days=DAYS, blocks_per_day=BLOCKS_PER_DAY), hard=Hard(),
+        soft=Soft(prefer_morning=True, weight=1), randomize=False, seed=case.seed,
+        engine=case.engine if case.engine != "greedy" else "dense",
+        time_limit=time_limit, workers=workers, **MODES[case.mode],
+    )
+    res = greedy(courses, rooms, instructors, req) if case.engine == "greedy" else solve(courses, rooms, instructors, req)
+    st = res["stats"]
+    asg = res["assignments"]
+    return {
+        **asdict(case), "case": case.name,
+        "courses": len(courses), "rooms": len(rooms), "instructors": len(instructors),
+        "status": res["status"],
+        "gen_seconds": round(gen_seconds, 4),
+        "build_seconds": st.get("build_seconds"),
+        "solve_seconds": st.get("solve_seconds"),
+        "num_vars": st.get("num_vars"),
+        "num_constraints": st.get("num_constraints"),
+        "objective": res.get("objective"),
+        "assigned": len(asg),
+        "morning": sum(1 for a in asg if a["block"] <= MORNING_LAST_BLOCK),
+        "violations": check(courses, rooms, instructors, asg),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+def _child(case, time_limit, workers, queue):
+    try:
+        queue.put(run_case(case, time_limit, workers))
+    except Exception as e:
+        queue.put({**asdict(case), "case": case.name, "error": repr(e)})
+
+def run_isolated(case: Case, time_limit: float, workers: int) -> dict:
+    queue = mp.Queue()
+    p = mp.Process(target=_child, args=(case, time_limit, workers, queue))
+    p.start()
+    # 솔버의 벽시계 상한(시드가 있으면 결정적 시간으로 끊고 벽시계는 time_limit × SEEDED_WALL_FACTOR 안전선) + 생성/검증 여유
+    wall = time_limit * SEEDED_WALL_FACTOR + 60
+    try:
+        row = queue.get(timeout=wall)
+    except Exception:
+        row = {**asdict(case), "case": case.name, "error": f"timeout after {wall:.0f}s"}
+    p.join(5)
+    if p.is_alive():
+        p.kill()
+    return row
+
+# ---------- 리포트 / 회귀 비교 ----------
+FIELDS = ["case", "sessions", "tightness", "overlap", "engine", "mode", "seed", "courses", "rooms", "instructors",
+          "status", "gen_seconds", "build_seconds", "solve_seconds", "num_vars", "num_constraints", "objective",
+          "assigned", "morning", "violations", "peak_rss_mb", "error"]
+
+def write_report(rows, out_dir: Path, meta: dict):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "report.json").write_text(json.dumps({"meta": meta, "results": rows}, ensure_ascii=False, indent=2),
+                                         encoding="utf-8")
+    with open(out_dir / "report.csv", "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(rows)
+
+def compare(rows, baseline_path: Path, slowdown: float, rss_growth: float):
+    # 반환: 회귀 메시지 목록
+    base = {r["case"]: r for r in json.loads(baseline_path.read_text(encoding="utf-8"))["results"]}
+    problems = []
+    for r in rows:
+        b = base.get(r["case"])
+        if b is None or b.get("error"):
+            continue
+        if r.get("error"):
+            problems.append(f"{r['case']}: error {r['error']}")
+            continue
+        if r["violations"]:
+            problems.append(f"{r['case']}: {r['violations']} violations")
+        if r["assigned"] < b["assigned"]:
+            problems.append(f"{r['case']}: assigned {b['assigned']} -> {r['assigned']}")
+        if r["morning"] < b["morning"]:
+            problems.append(f"{r['case']}: morning sessions {b['morning']} -> {r['morning']}")
+        total = (r["build_seconds"] or 0) + (r["solve_seconds"] or 0)
+        base_total = (b["build_seconds"] or 0) + (b["solve_seconds"] or 0)
+        if base_total > 0.05 and total > base_total * slowdown:
+            problems.append(f"{r['case']}: time {base_total:.3f}s -> {total:.3f}s")
+        if r["peak_rss_mb"] > b["peak_rss_mb"] * rss_growth:
+            problems.append(f"{r['case']}: peak RSS {b['peak_rss_mb']}MB -> {r['peak_rss_mb']}MB")
+    return problems
+
+def _floats(s):
+    return [float(x) for x in s.split(",") if x]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="시간표 솔버 벤치마크")
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    ap.add_argument("--engines", default=",".join(DEFAULT_ENGINES))
+    ap.add_argument("--modes", default=",".join(MODES))
+    ap.add_argument("--tightness", default=",".join(map(str, DEFAULT_TIGHTNESS)))
+    ap.add_argument("--overlap", default=",".join(map(str, DEFAULT_OVERLAP)))
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--time-limit", type=float, default=10.0)
+    ap.add_argument("--workers", type=int, default=0)
+    ap.add_argument("--max-dense", type=int, default=200, help="dense 엔진은 이 세션 수까지만 (변수 수가 세션×슬롯×방)")
+    ap.add_argument("--out", default="bench_out")
+    ap.add_argument("--baseline", help="이전 report.json — 회귀가 있으면 종료 코드 1")
+    ap.add_argument("--slowdown", type=float, default=1.5)
+    ap.add_argument("--rss-growth", type=float, default=1.3)
+    args = ap.parse_args(argv)
+
+    cases = []
+    for n in map(int, args.sizes.split(",")):
+        for tight in _floats(args.tightness):
+            for ov in _floats(args.overlap):
+                for eng in args.engines.split(","):
+                    if eng == "dense" and n > args.max_dense:
+                        continue
+                    for mode in args.modes.split(","):
+                        if eng == "greedy" and mode != "cold":
+                            continue  # 그리디는 힌트를 쓰지 않는다
+                        cases.append(Case(n, tight, ov, eng, mode, args.seed))
+
+    rows = []
+    for case in cases:
+        row = run_isolated(case, args.time_limit, args.workers)
+        rows.append(row)
+        if row.get("error"):
+            print(f"{case.name:<40} ERROR {row['error']}", flush=True)
+        else:
+            print(f"{case.name:<40} status={row['status']} build={row['build_seconds']}s solve={row['solve_seconds']}s "
+                  f"vars={row['num_vars']} assigned={row['assigned']} morning={row['morning']} "
+                  f"viol={row['violations']} rss={row['peak_rss_mb']}MB", flush=True)
+
+    meta = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "time_limit": args.time_limit,
+            "workers": args.workers, "python": sys.version.split()[0]}
+    write_report(rows, Path(args.out), meta)
+    print(f"report: {Path(args.out) / 'report.json'}, {Path(args.out) / 'report.csv'}")
+
+    if args.baseline:
+        problems = compare(rows, Path(args.baseline), args.slowdown, args.rss_growth)
+        for p in problems:
+            print("REGRESSION", p)
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -123,7 +123,8 @@ function groupPretty(assignments, blockMin) {
         blocks: [],
         room: a.room_id
       });
-    map.get(k).blocks.push(a.block);
+    const dur = a.duration_blocks || 1;
+    for (let i = 0; i < dur; i++) map.get(k).blocks.push(a.block + i);
   });
   const lines = [];
   for (const v of map.values()) {
@@ -155,6 +156,13 @@ function groupPretty(assignments, blockMin) {
   return lines.join("\n\n");
 }
 
+function spanOf(block, dur, blockMin) {
+  const last = block + (dur || 1) - 1;
+  return `${rangeOf(block, blockMin).split("~")[0]}~${
+    rangeOf(last, blockMin).split("~")[1]
+  }`;
+}
+
 function renderAssignments(assignments, blockMin) {
   assignmentsWrap.innerHTML = "";
   if (!assignments?.length) {
@@ -173,7 +181,7 @@ function renderAssignments(assignments, blockMin) {
           <td>${a.session_index}</td>
           <td><span class="pill">${a.day}</span></td>
           <td>${a.block}</td>
-          <td>${rangeOf(a.block, blockMin)}</td>
+          <td>${spanOf(a.block, a.duration_blocks, blockMin)}</td>
           <td>${a.room_id}</td>
         </tr>`;
       })
@@ -215,33 +223,100 @@ btnSearch.addEventListener("click", async () => {
   }
 });
 
+// 시간표 배정은 작업(job)으로 넣고 SSE 로 진행 상황을 받는다
+function renderSummary(s, note) {
+  summary.innerHTML = `<div class="muted">과목 ${
+    s.courses ?? "?"
+  }개 · 방 ${s.rooms ?? "?"}개 · 강사 ${s.instructors ?? "?"}명 · ${
+    Array.isArray(s.days) ? s.days.join(",") : ""
+  } / 일일 ${s.blocks_per_day ?? "?"}교시${note ? ` · ${note}` : ""}</div>`;
+}
+
+function showProgress(ev, blockMin) {
+  summary.innerHTML = `<div class="muted">배정 중… 목적값 ${
+    ev.objective ?? "-"
+  } (${Number(ev.elapsed || 0).toFixed(1)}초)</div>`;
+  if (ev.assignments) renderAssignments(ev.assignments, blockMin);
+}
+
+function showJobResult(job) {
+  const s = job.summary || {};
+  renderSummary(s, job.cached ? "캐시된 결과" : "");
+  renderAssignments(job.result?.assignments || [], Number(s.block_minutes || 50));
+}
+
+// EventSource 가 안 되면(프록시 등) 1초 간격 폴링으로
+async function pollJob(jobId) {
+  for (;;) {
+    const job = await apiGet(`/schedule/jobs/${jobId}`);
+    if (job.status === "done") return showJobResult(job);
+    if (job.status === "error") throw new Error(job.result?.detail || "작업 실패");
+    const last = job.progress?.[job.progress.length - 1];
+    if (last) showProgress(last, Number(minutes.value || 50));
+    await new Promise(r => setTimeout(r, 1000));
+  }
+}
+
+function watchJob(jobId, blockMin) {
+  const es = new EventSource(new URL(`/schedule/jobs/${jobId}/events`, BASE));
+  es.addEventListener("progress", e => showProgress(JSON.parse(e.data), blockMin));
+  es.addEventListener("done", () => {
+    es.close();
+    apiGet(`/schedule/jobs/${jobId}`).then(showJobResult);
+  });
+  es.addEventListener("error", e => {
+    es.close();
+    if (e.data) return alert(`배정 실패: ${JSON.parse(e.data).detail}`);
+    pollJob(jobId).catch(err => alert(`배정 실패: ${err.message}`));
+  });
+}
+
+// 입력 중 자동완성 (/search/suggest, 서버 메모리 색인)
+const qSuggest = document.getElementById("qSuggest");
+let suggestTimer = null;
+q.addEventListener("input", () => {
+  clearTimeout(suggestTimer);
+  const kw = (q.value || "").trim();
+  if (!kw || !qSuggest) return;
+  suggestTimer = setTimeout(async () => {
+    try {
+      const data = await apiGet(
+        `/search/suggest?q=${encodeURIComponent(kw)}&limit=10`
+      );
+      // 과목명을 HTML 로 끼워 넣지 않도록 요소를 만들어 value 만 넣는다
+      qSuggest.replaceChildren(...data.suggestions.map(s => {
+        const opt = document.createElement("option");
+        opt.value = s.text;
+        return opt;
+      }));
+    } catch (e) {
+      console.error(e);
+    }
+  }, 80);
+});
+
 btnSchedule.addEventListener("click", async () => {
   try {
-    const payload = {};
-    const reqText = (reqKo.value || "").trim();
-    if (reqText) {
-      payload.requirements_ko = reqText;
-    } else {
-      payload.grid_days = days.value
+    const blockMin = Number(minutes.value || 50);
+    const payload = {
+      days: days.value
         .split(",")
         .map(s => s.trim().toUpperCase())
-        .filter(Boolean);
-      payload.blocks_per_day = Number(blocks.value || 8);
-      payload.block_minutes = Number(minutes.value || 50);
-      payload.hard_no_friday_evening = !!noFri.checked;
-      payload.soft_prefer_morning = !!prefMorning.checked;
-      payload.soft_weight = Number(weight.value || 1);
+        .filter(Boolean),
+      periodsPerDay: Number(blocks.value || 8),
+      blockMinutes: blockMin,
+      noFridayEvening: !!noFri.checked,
+      preferMorning: !!prefMorning.checked,
+      priorityWeight: Number(weight.value || 1),
+      natural: (reqKo.value || "").trim()
+    };
+
+    const job = await apiPost("/schedule/jobs", payload);
+    if (job.status === "done") {
+      return showJobResult(await apiGet(`/schedule/jobs/${job.job_id}`));
     }
-    payload.randomize = true; // 항상 랜덤
-
-    const res = await apiPost("/schedule", payload);
-    const s = res.summary || {};
-    summary.innerHTML = `<div class="muted">과목 ${
-      s.courses ?? "?"
-    }개 · 방 ${s.rooms ?? "?"}개 · 강사 ${s.instructors ?? "?"}명 · ${
-      Array.isArray(s.days) ? s.days.join(",") : ""
-    } / 일일 ${s.blocks_per_day ?? "?"}교시</div>`;
-    renderAssignments(res.solution?.assignments || [], Number(s.block_minutes || 50));
+    summary.innerHTML = `<div class="muted">배정 작업 시작 (${job.job_id})</div>`;
+    watchJob(job.job_id, blockMin);
   } catch (e) {
     console.error(e);
     alert(`배정 실패: ${e.message}`);
@@ -257,20 +332,32 @@ btnAll.click();
 // ────────────────────────────────
 // ✅ 실시간 공실 현황 (추가 부분)
 // ────────────────────────────────
+function renderEmptyRooms(rooms) {
+  const list = document.getElementById("room-list");
+  if (!list) return;
+  list.innerHTML = rooms
+    .map(r => `<li>🏫 ${r}</li>`)
+    .join("");
+}
+
 async function fetchEmptyRooms() {
   try {
-    const res = await fetch("http://localhost:8000/v1/rooms/empty");
-    const data = await res.json();
-    const list = document.getElementById("room-list");
-    if (!list) return;
-    list.innerHTML = data.empty_rooms
-      .map(r => `<li>🏫 ${r}</li>`)
-      .join("");
+    const data = await apiGet("/v1/rooms/empty");
+    renderEmptyRooms(data.empty_rooms);
   } catch (e) {
     console.error("공실 정보 불러오기 실패:", e);
   }
 }
 
-// 1분마다 자동 갱신
-setInterval(fetchEmptyRooms, 60000);
-fetchEmptyRooms();
+// 서버가 방 상태가 바뀌는 순간에만 보내 준다 (SSE). 연결이 끊기면 EventSource 가 알아서 다시 붙고,
+// EventSource 자체가 없으면 1분 폴링으로
+function watchEmptyRooms() {
+  if (!window.EventSource) {
+    setInterval(fetchEmptyRooms, 60000);
+    return fetchEmptyRooms();
+  }
+  const es = new EventSource(new URL("/v1/rooms/events", BASE));
+  es.addEventListener("rooms", e => renderEmptyRooms(JSON.parse(e.data).empty_rooms));
+}
+
+watchEmptyRooms();
@@ -0,0 +1,43 @@
+# 테스트 공통 준비
+# main.py 는 pjh 루트에서 `backend.*` 로 import 하므로, 여기서는 app 패키지를 backend 라는 이름으로 올린다.
+# 추적 중인 courses.db 는 건드리지 않도록 임시 복사본을 쓰고, 캐시 파일은 모두 임시 디렉터리로 보낸다.
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+APP_DIR = ROOT / "app"
+TMP = Path(tempfile.mkdtemp(prefix="courses-test-"))
+
+shutil.copy(ROOT / "courses.db", TMP / "courses.db")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{(TMP / 'courses.db').as_posix()}",
+    "GEMINI_BACKEND": "fake",
+    "GEMINI_CACHE": "0",
+    "COURSE_VECTOR_DIR": str(TMP),
+    "SCHEDULE_CACHE_DISK": "0",
+    "SCHEDULE_JOB_WORKERS": "1",
+})
+
+if "backend" not in sys.modules:
+    spec = importlib.util.spec_from_file_location("backend", APP_DIR / "__init__.py",
+                                                  submodule_search_locations=[str(APP_DIR)])
+    backend = importlib.util.module_from_spec(spec)
+    sys.modules["backend"] = backend
+    spec.loader.exec_module(backend)
+
+@pytest.fixture(scope="session")
+def main():
+    import backend.main as m
+    return m
+
+@pytest.fixture(scope="session")
+def client(main):
+    from fastapi.testclient import TestClient
+    with TestClient(main.app) as c:
+        yield c
@@ -0,0 +1,139 @@
+# /courses, /search: 커서 페이지네이션 왕복, 적재(delta) 중에도 이어지는 커서, limit 검사, NULL 키, ETag/304 + CORS, LIKE 와일드카드
+import csv
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from backend.db import schema
+from backend.db.pagination import courses_statement, decode_cursor, next_cursor
+
+from test_ingest import CODE, NAME, SOURCE_CSV, _write_csv, ingest_csv
+
+ALL = 1000
+
+def _walk_courses(client, limit: int, cursor=None, pages=None):
+    out = []
+    while pages is None or pages > 0:
+        r = client.get("/courses", params={"limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200, r.text
+        out.extend(r.json())
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        pages = None if pages is None else pages - 1
+    return out, cursor
+
+def _key(row: dict) -> tuple:
+    return tuple(sorted(row.items()))
+
+def test_courses_cursor_round_trip(client):
+    everything = client.get("/courses", params={"limit": ALL}).json()
+    assert len(everything) > 7
+    pages, _ = _walk_courses(client, 7)
+    assert pages == everything
+
+def test_search_cursor_round_trip(client):
+    q = "전공"
+    full = client.get("/search", params={"q": q, "limit": ALL}).json()
+    assert full["total"] > 3 and full["next_cursor"] is None
+    got, cursor = [], None
+    while True:
+        body = client.get("/search", params={"q": q, "limit": 3, **({"cursor": cursor} if cursor else {})}).json()
+        assert body["total"] == full["total"]
+        got.extend(body["results"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert got == full["results"]
+
+@pytest.mark.parametrize("path", ["/courses", "/search?q=전공"])
+def test_bad_cursor_is_400(client, path):
+    sep = "&" if "?" in path else "?"
+    assert client.get(f"{path}{sep}cursor=not-a-cursor").status_code == 400
+
+@pytest.mark.parametrize("path", ["/courses", "/search?q=전공"])
+def test_unbounded_limit_only_for_ndjson(client, path):
+    sep = "&" if "?" in path else "?"
+    assert client.get(f"{path}{sep}limit=0").status_code == 400
+    assert client.get(f"{path}{sep}limit=-1&stream=json").status_code == 400
+    r = client.get(f"{path}{sep}limit=0&stream=ndjson")
+    assert r.status_code == 200 and r.text.count("\n") > 3
+
+@pytest.mark.parametrize("dialect", ["sqlite", "postgresql"])
+def test_keyset_cursor_walks_null_keys(tmp_path, dialect):
+    # 키가 NULL 인 행도 건너뛰거나 되풀이하지 않는다. NULL 자리는 SQLite 앞 / PostgreSQL 뒤 —
+    # PostgreSQL 모양의 문장(NULLS LAST)도 SQLite 에서 그대로 돌려 본다
+    e = create_engine(f"sqlite:///{(tmp_path / 'k.db').as_posix()}")
+    codes = ["B", None, "A", None, "C", "A", None, "B"]
+    with e.begin() as c:
+        c.execute(text('CREATE TABLE courses ("_row_id" INTEGER PRIMARY KEY, "code" TEXT)'))
+        for code in codes:
+            c.execute(text('INSERT INTO courses ("code") VALUES (:c)'), {"c": code})
+    got, after = [], None
+    with e.connect() as c:
+        while True:
+            stmt, params = courses_statement(dialect, "code", 2, after=after, rid='"_row_id"')
+            rows = [dict(r) for r in c.execute(stmt, params).mappings()]
+            got.extend(r["_row_id"] for r in rows)
+            nxt = next_cursor(rows, 2)
+            if not nxt:
+                break
+            after = decode_cursor(nxt)
+    e.dispose()
+    nulls = [i + 1 for i, k in enumerate(codes) if k is None]
+    keyed = [i + 1 for i, k in sorted(enumerate(codes), key=lambda x: (x[1] or "", x[0])) if k is not None]
+    assert got == (nulls + keyed if dialect == "sqlite" else keyed + nulls)
+
+def test_etag_304_keeps_cors_headers(client):
+    origin = {"Origin": "http://example.com"}
+    first = client.get("/courses", params={"limit": 5}, headers=origin)
+    etag = first.headers["etag"]
+    assert first.headers["access-control-allow-origin"] == "*"
+    cached = client.get("/courses", params={"limit": 5}, headers=origin)
+    assert cached.status_code == 200 and cached.headers["etag"] == etag
+    assert cached.headers["access-control-allow-origin"] == "*"
+    assert cached.content == first.content
+    again = client.get("/courses", params={"limit": 5}, headers={**origin, "If-None-Match": etag})
+    assert again.status_code == 304 and not again.content
+    assert again.headers["etag"] == etag
+    assert again.headers["access-control-allow-origin"] == "*"
+
+@pytest.mark.parametrize("q", ["_", "%", "\\"])
+def test_like_wildcards_are_literal(client, q):
+    # 짧은 검색어는 LIKE 로 찾는다. 와일드카드가 그대로 통하면 모든 행이 걸린다
+    assert client.get("/search", params={"q": q}).json()["total"] == 0
+
+def test_cursor_survives_delta_ingest(client, main, tmp_path, monkeypatch):
+    # 적재로 행이 바뀌어도 (교과목코드, 행 id) keyset 커서는 건너뛰거나 중복 없이 이어진다
+    # 서버는 세대 번호를 몇 초에 한 번만 확인하므로 여기서는 매 요청 확인하게 한다
+    monkeypatch.setattr(schema.catalog_schema.refresh_check, "interval", 0.0)
+    with open(SOURCE_CSV, encoding="utf-8", newline="") as f:
+        header, *rows = list(csv.reader(f))
+    ingest_csv.load(main.engine, _write_csv(tmp_path / "a.csv", header, rows), "replace")
+
+    ci, ni = header.index(CODE), header.index(NAME)
+    rows.sort(key=lambda r: r[ci])
+    first, cursor = _walk_courses(client, 10, pages=1)
+    seen = {r[CODE] for r in first}
+    dropped = next(r for r in rows if r[ci] in seen)          # 이미 받은 페이지의 행 삭제
+    edited = next(r for r in rows if r[ci] > max(seen))       # 아직 안 받은 페이지의 행 수정
+    changed = [list(r) for r in rows if r is not dropped]
+    for r in changed:
+        if r[ci] == edited[ci]:
+            r[ni] = "적재중수정"
+    added = list(edited)
+    added[ci], added[ni] = "ZZ01", "적재중추가"
+    changed.append(added)
+    gen = main.get_generation(main.engine)
+    stats = ingest_csv.load(main.engine, _write_csv(tmp_path / "b.csv", header, changed), "delta")
+    assert stats["mode"] == "delta" and stats["generation"] == gen + 1
+
+    rest, _ = _walk_courses(client, 10, cursor=cursor)
+    names = [r[NAME] for r in rest]
+    assert "적재중수정" in names and "적재중추가" in names
+    walked = first + rest
+    assert len({_key(r) for r in walked}) == len(walked)
+    # 앞쪽(삭제된 한 행을 뺀 첫 페이지) + 커서 뒤쪽 = 적재 후 전체
+    now = client.get("/courses", params={"limit": ALL}).json()
+    assert len(now) == len(first) - 1 + len(rest)
+    assert rest == now[len(first) - 1:]
@@ -0,0 +1,121 @@
+# CSV 적재(delta / replace / upsert): 바뀐 행만 반영, 행 id 유지, FTS5 색인 일치, 바뀐 게 없으면 세대 유지
+import csv
+import shutil
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from conftest import APP_DIR, ROOT
+
+# ingest_csv.py 는 app/db 에서 스크립트로 돌리는 모듈이라 형제 모듈을 바로 import 한다
+sys.path.insert(0, str(APP_DIR / "db"))
+import ingest_csv  # noqa: E402
+
+SOURCE_CSV = APP_DIR / "db" / "courses_data.csv"
+NAME = "교과목명"
+CODE = "교과목코드"
+
+def _read_csv():
+    with open(SOURCE_CSV, encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    return rows[0], rows[1:]
+
+def _write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows([header] + rows)
+    return str(path)
+
+@pytest.fixture
+def engine(tmp_path):
+    shutil.copy(ROOT / "courses.db", tmp_path / "courses.db")
+    e = create_engine(f"sqlite:///{(tmp_path / 'courses.db').as_posix()}")
+    yield e
+    e.dispose()
+
+def _rows(engine) -> dict:
+    # 교과목코드가 하나뿐인 행: 코드 → (행 id, 교과목명)
+    with engine.connect() as c:
+        got = c.execute(text(f'SELECT _row_id, "{CODE}", "{NAME}" FROM courses')).all()
+    codes = [r[1] for r in got]
+    return {r[1]: (r[0], r[2]) for r in got if codes.count(r[1]) == 1}
+
+def _assert_fts_consistent(engine):
+    with engine.connect() as c:
+        # 외부 콘텐츠 FTS5: 색인이 courses 내용과 같은지 SQLite 가 직접 확인 (다르면 오류)
+        c.exec_driver_sql("INSERT INTO courses_fts(courses_fts, rank) VALUES('integrity-check', 1)")
+        for rid, name in c.execute(text(f'SELECT _row_id, "{NAME}" FROM courses')).all():
+            hits = c.execute(text(f'SELECT rowid FROM courses_fts WHERE "{NAME}" = :n'), {"n": name}).scalars().all()
+            assert rid in hits, (rid, name)
+
+def _generation(engine) -> int:
+    with engine.connect() as c:
+        return ingest_csv.read_generation(c)
+
+def test_first_delta_migrates_to_replace(engine, tmp_path):
+    header, rows = _read_csv()
+    stats = ingest_csv.load(engine, _write_csv(tmp_path / "in.csv", header, rows), "delta")
+    assert stats["mode"] == "replace"   # _row_id 가 없던 예전 테이블
+    assert stats["total"] == len(rows)
+    _assert_fts_consistent(engine)
+
+def test_noop_delta_keeps_generation(engine, tmp_path):
+    header, rows = _read_csv()
+    path = _write_csv(tmp_path / "in.csv", header, rows)
+    ingest_csv.load(engine, path, "delta")
+    gen = _generation(engine)
+    stats = ingest_csv.load(engine, path, "delta")
+    assert (stats["inserted"], stats["updated"], stats["deleted"]) == (0, 0, 0)
+    assert stats["generation"] == gen == _generation(engine)
+
+def test_delta_applies_only_changes(engine, tmp_path):
+    header, rows = _read_csv()
+    ingest_csv.load(engine, _write_csv(tmp_path / "a.csv", header, rows), "delta")
+    before = _rows(engine)
+    gen = _generation(engine)
+
+    ci, ni = header.index(CODE), header.index(NAME)
+    edited, dropped = [r for r in rows if r[ci] in before][:2]
+    changed = [list(r) for r in rows if r is not dropped]
+    next(r for r in changed if r[ci] == edited[ci])[ni] = "수정된과목이름"
+    added = list(edited)
+    added[ci], added[ni] = "Z999", "새로추가된과목"
+    changed.append(added)
+
+    stats = ingest_csv.load(engine, _write_csv(tmp_path / "b.csv", header, changed), "delta")
+    assert (stats["inserted"], stats["updated"], stats["deleted"]) == (1, 1, 1)
+    assert stats["generation"] == gen + 1
+    after = _rows(engine)
+    assert after[edited[ci]] == (before[edited[ci]][0], "수정된과목이름")   # 수정된 행은 같은 id
+    assert dropped[ci] not in after
+    assert after["Z999"][0] > max(rid for rid, _ in before.values())
+    assert all(after[k] == v for k, v in before.items() if k not in (edited[ci], dropped[ci]))
+    _assert_fts_consistent(engine)
+
+def test_upsert_touches_only_listed_codes(engine, tmp_path):
+    header, rows = _read_csv()
+    ingest_csv.load(engine, _write_csv(tmp_path / "a.csv", header, rows), "replace")
+    before = _rows(engine)
+    ci, ni = header.index(CODE), header.index(NAME)
+    row = list(next(r for r in rows if r[ci] in before))
+    row[ni] = "업서트된과목"
+
+    stats = ingest_csv.load(engine, _write_csv(tmp_path / "u.csv", header, [row]), "upsert")
+    assert (stats["inserted"], stats["updated"], stats["deleted"]) == (0, 1, 0)
+    assert stats["total"] == len(rows)
+    after = _rows(engine)
+    assert after[row[ci]] == (before[row[ci]][0], "업서트된과목")
+    assert all(after[k] == v for k, v in before.items() if k != row[ci])
+    _assert_fts_consistent(engine)
+
+    gen = _generation(engine)
+    again = ingest_csv.load(engine, _write_csv(tmp_path / "u.csv", header, [row]), "upsert")
+    assert again["generation"] == gen
+
+def test_replace_rebuilds_table(engine, tmp_path):
+    header, rows = _read_csv()
+    path = _write_csv(tmp_path / "a.csv", header, rows[:10])
+    ingest_csv.load(engine, _write_csv(tmp_path / "all.csv", header, rows), "replace")
+    stats = ingest_csv.load(engine, path, "replace")
+    assert stats["mode"] == "replace" and stats["total"] == 10
+    _assert_fts_consistent(engine)
@@ -0,0 +1,49 @@
+# 시간표 라우터가 main 앱에 붙어 있는지 (앱을 통해 호출)
+import time
+
+from ortools.sat.python import cp_model
+
+OK = (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+def test_schedule_routes_mounted(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    for p in ("/schedule", "/schedule/optimize", "/schedule/jobs", "/schedule/jobs/{job_id}",
+              "/schedule/jobs/{job_id}/events", "/schedule/{schedule_id}/delta"):
+        assert p in paths
+
+def test_schedule_optimize(client):
+    r = client.post("/schedule/optimize", json={"timeLimit": 2, "seed": 1})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["status"] in OK
+    assert body["alternatives"] and body["alternatives"][0]["schedule"]
+
+def test_schedule_job(client):
+    r = client.post("/schedule/jobs", json={"timeLimit": 2})
+    assert r.status_code == 200, r.text
+    job_id = r.json()["job_id"]
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        snap = client.get(f"/schedule/jobs/{job_id}").json()
+        if snap["status"] in ("done", "error"):
+            break
+        time.sleep(0.2)
+    assert snap["status"] == "done", snap
+    events = client.get(f"/schedule/jobs/{job_id}/events").text
+    assert "event: done" in events
+
+def test_job_is_queued_until_worker_starts(client):
+    # 제출 직후에는 아직 풀에서 꺼내지지 않았으므로 queued (worker 의 첫 이벤트가 와야 running)
+    body = client.post("/schedule/jobs", json={"timeLimit": 1, "seed": 7}).json()
+    assert body["cached"] is False and body["status"] == "queued"
+    seen = set()
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        seen.add(client.get(f"/schedule/jobs/{body['job_id']}").json()["status"])
+        if seen & {"done", "error"}:
+            break
+        time.sleep(0.05)
+    assert "done" in seen and seen <= {"queued", "running", "done"}
+
+def test_unknown_engine_is_422(client):
+    assert client.post("/schedule/optimize", json={"engine": "bogus"}).status_code == 422
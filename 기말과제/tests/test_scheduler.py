@@ -0,0 +1,212 @@
+# 엔진별 배정 결과가 충돌 없는지 (여러 교시 수업의 방·강사 시간 겹침, 정원, 불가 시간, 이미 쓰이는 방)
+# + 분할 풀이, 시드 재현성, 그리디/warm start, 증분 재배정(resolve)의 핀 검증
+import random
+
+import pytest
+from ortools.sat.python import cp_model
+
+from backend.core import decompose
+from backend.core.scheduler import Course, Grid, Hard, Instructor, Request, Room, Soft, greedy, resolve, solve
+
+OK = (cp_model.OPTIMAL, cp_model.FEASIBLE)
+GRID = Grid(days=["MON", "TUE", "WED"], blocks_per_day=5)
+ROOMS = [Room("R1", "R1", 20), Room("R2", "R2", 40), Room("R3", "R3", 60), Room("R4", "R4", 60)]
+INSTRUCTORS = [Instructor("i1", "강사1", [("MON", 1), ("MON", 2)]), Instructor("i2", "강사2"),
+               Instructor("i3", "강사3")]
+COURSES = [
+    Course("c1", "과목1", size=50, sessions_per_week=2, duration_blocks=2, instructor_id="i1", department="A"),
+    Course("c2", "과목2", size=30, sessions_per_week=2, duration_blocks=1, instructor_id="i1", department="A"),
+    Course("c3", "과목3", size=15, sessions_per_week=1, duration_blocks=3, instructor_id="i2", department="A"),
+    Course("c4", "과목4", size=35, sessions_per_week=2, duration_blocks=2, instructor_id="i2", department="B"),
+    Course("c5", "과목5", size=10, sessions_per_week=2, duration_blocks=1, instructor_id="i3", department="B"),
+    Course("c6", "과목6", size=55, sessions_per_week=1, duration_blocks=2, instructor_id="i3", department="B"),
+]
+# 다른 곳에서 이미 쓰는 방·시간 (R3 는 월요일 오전 내내)
+OCCUPIED = [{"course_id": "ext", "session_index": 0, "day": "MON", "block": 1, "duration_blocks": 3, "room_id": "R3"}]
+
+def _request(engine: str, **kw) -> Request:
+    kw = {"time_limit": 5, "workers": 1, "seed": 0, "randomize": False, "occupied": OCCUPIED, **kw}
+    return Request(grid=GRID, hard=Hard(), soft=Soft(prefer_morning=True), engine=engine, **kw)
+
+def _cells(a: dict):
+    return [(a["day"], a["block"] + k) for k in range(a["duration_blocks"])]
+
+def assert_conflict_free(assignments, courses=COURSES, occupied=OCCUPIED):
+    course = {c.id: c for c in courses}
+    cap = {r.id: r.capacity for r in ROOMS}
+    unav = {i.id: set(i.unavailable or []) for i in INSTRUCTORS}
+    assert sorted((a["course_id"], a["session_index"]) for a in assignments) == \
+        sorted((c.id, s) for c in courses for s in range(c.sessions_per_week))
+    rooms, teachers = {}, {}
+    for a in occupied:
+        for cell in _cells(a):
+            rooms[(a["room_id"], cell)] = a["course_id"]
+    for a in assignments:
+        c = course[a["course_id"]]
+        assert a["duration_blocks"] == c.duration_blocks
+        assert a["day"] in GRID.days and 1 <= a["block"] <= GRID.blocks_per_day - c.duration_blocks + 1, a
+        assert cap[a["room_id"]] >= c.size, a
+        for cell in _cells(a):
+            assert cell not in unav[c.instructor_id], a
+            assert rooms.setdefault((a["room_id"], cell), a["course_id"]) == a["course_id"], (a, cell)
+            assert teachers.setdefault((c.instructor_id, cell), a["course_id"]) == a["course_id"], (a, cell)
+
+def _large(n_sessions: int, seed: int = 1):
+    # bench_scheduler 와 같은 모양의 합성 문제 (5일 × 9교시, 방-블록 대비 세션-블록 75%)
+    rng = random.Random(seed)
+    n_inst = n_sessions // 4
+    courses, total, blocks = [], 0, 0
+    while total < n_sessions:
+        spw = min(rng.choice([1, 1, 2, 3]), n_sessions - total)
+        dur = rng.choice([1, 1, 2, 3]) if spw == 1 else 1
+        courses.append(Course(f"C{len(courses)}", f"C{len(courses)}", size=rng.choice([20, 30, 40, 55]),
+                              sessions_per_week=spw, duration_blocks=dur, instructor_id=f"I{rng.randrange(n_inst)}"))
+        total += spw
+        blocks += spw * dur
+    rooms = [Room(f"R{j}", f"R{j}", [30, 45, 60][j % 3]) for j in range(max(3, -(-blocks // int(45 * 0.75))))]
+    instructors = [Instructor(f"I{k}", f"I{k}") for k in range(n_inst)]
+    grid = Grid(days=["MON", "TUE", "WED", "THU", "FRI"], blocks_per_day=9)
+    return courses, rooms, instructors, grid
+
+@pytest.mark.parametrize("engine", ["dense", "interval"])
+def test_cp_engines_conflict_free(engine):
+    res = solve(COURSES, ROOMS, INSTRUCTORS, _request(engine))
+    assert res["status"] in OK
+    assert_conflict_free(res["assignments"])
+
+# ---------- 분할 풀이 ----------
+@pytest.fixture
+def small_parts(monkeypatch):
+    # 파티션 목표 7세션: 학과 A(c1~c4) / 학과 B(c5, c6)
+    monkeypatch.setattr(decompose, "MIN_PART_SESSIONS", 7)
+
+def test_partition_packs_small_departments():
+    # 학과가 바뀌어도 목표 크기까지는 한 파티션에 담는다 (목표 6: {c1, c2} / {c3, c4} + 학과 B 의 {c5, c6})
+    assert len(decompose.partition(COURSES, INSTRUCTORS)) == 1
+    parts = decompose.partition(COURSES, INSTRUCTORS, target=6)
+    assert [sorted(c.id for c in p) for p in parts] == [["c1", "c2"], ["c3", "c4", "c5", "c6"]]
+
+def test_decomposed_conflict_free(small_parts):
+    res = solve(COURSES, ROOMS, INSTRUCTORS, _request("decomposed"))
+    assert res["status"] in OK and res["stats"]["partitions"] == [4, 2]
+    assert_conflict_free(res["assignments"])
+
+def test_decomposed_repair_conflict_free(small_parts):
+    # 60석 방이 하나뿐이면 B 파티션은 방을 못 받아 repair(A 결과를 막아 둔 채 전체 방으로)로 풀린다
+    res = solve(COURSES, ROOMS[:3], INSTRUCTORS, _request("decomposed", occupied=None))
+    assert res["status"] in OK
+    assert res["stats"]["repaired"]
+    assert_conflict_free(res["assignments"], occupied=[])
+
+def test_decomposed_failed_repair_keeps_partial(monkeypatch):
+    # 목표 6: {c3~c6} 파티션이 60석 방을 다 쓰면 repair 로도 c1 을 못 넣는다 — 빈 시간표 대신 그리디로 채운 부분 결과
+    monkeypatch.setattr(decompose, "MIN_PART_SESSIONS", 6)
+    res = solve(COURSES, ROOMS[:3], INSTRUCTORS, _request("decomposed", occupied=None))
+    if res["status"] not in OK:
+        assert res["status"] == cp_model.UNKNOWN and res["stats"]["fallback"] == "greedy"
+        assert res["assignments"] and res["stats"]["unassigned"] == len(res["unassigned"])
+    done = {(a["course_id"], a["session_index"]) for a in res["assignments"]}
+    assert done | {(u["course_id"], u["session_index"]) for u in res.get("unassigned", [])} == \
+        {(c.id, s) for c in COURSES for s in range(c.sessions_per_week)}
+
+def test_decomposed_keeps_deadline():
+    # 파티션 풀이 + repair 가 하나의 마감을 나눠 쓴다 (예전엔 파티션마다 최소 1초 + repair 에 time_limit 전체)
+    courses, rooms, instructors, grid = _large(600)
+    req = Request(grid=grid, hard=Hard(), soft=Soft(prefer_morning=True), engine="decomposed", time_limit=2,
+                  workers=1, randomize=False, warm_start=True)
+    res = solve(courses, rooms, instructors, req)
+    assert res["stats"]["solve_seconds"] < req.time_limit + 1
+    assert res["status"] in OK or res["stats"].get("fallback") == "greedy"
+    assert len(res["assignments"]) + len(res.get("unassigned", [])) == sum(c.sessions_per_week for c in courses)
+
+def test_decomposed_resolve_keeps_pin(small_parts):
+    # 고정/힌트가 있으면 나누지 않고 한 번에 푼다 (파티션마다 버리면 /delta 의 이동이 무시된다)
+    base = solve(COURSES, ROOMS, INSTRUCTORS, _request("decomposed"))["assignments"]
+    pin = {"course_id": "c5", "session_index": 0, "day": "TUE", "block": 5, "room_id": "R1"}
+    res = resolve(COURSES, ROOMS, INSTRUCTORS, _request("decomposed", time_limit=2), base, [pin])
+    assert res["status"] in OK and res["stats"]["decomposed"] is False
+    assert_conflict_free(res["assignments"])
+    moved = [a for a in res["assignments"] if (a["course_id"], a["session_index"]) == ("c5", 0)]
+    assert [(a["day"], a["block"], a["room_id"]) for a in moved] == [("TUE", 5, "R1")]
+
+def test_pool_alternatives_conflict_free():
+    res = solve(COURSES, ROOMS, INSTRUCTORS, _request("interval", pool_size=3))
+    assert res["status"] in OK
+    for alt in res.get("pool") or []:
+        assert_conflict_free(alt["assignments"])
+
+@pytest.mark.parametrize("engine", ["dense", "interval"])
+def test_same_seed_same_schedule(engine):
+    # 시드가 있으면 결정적 시간으로만 끊으므로 두 번 풀어도 같은 시간표
+    courses, rooms, instructors, grid = _large(200)
+    req = Request(grid=grid, hard=Hard(), soft=Soft(prefer_morning=True), engine=engine, time_limit=1,
+                  workers=1, seed=3, randomize=False, warm_start=True)
+    first, second = (solve(courses, rooms, instructors, req) for _ in range(2))
+    assert first["status"] in OK and first["stats"]["deterministic"]
+    assert first["assignments"] == second["assignments"] and first["objective"] == second["objective"]
+
+# ---------- 그리디 / warm start ----------
+def test_greedy_conflict_free():
+    res = greedy(COURSES, ROOMS, INSTRUCTORS, _request("dense"))
+    assert res["status"] == cp_model.FEASIBLE, res["unassigned"]
+    assert_conflict_free(res["assignments"])
+
+def test_greedy_partial_is_not_infeasible():
+    # 방이 모자라 다 못 넣어도 "불가능" 증명이 아니므로 UNKNOWN + 못 넣은 세션 목록
+    res = greedy(COURSES, ROOMS[:1], INSTRUCTORS, _request("dense", occupied=None))
+    assert res["status"] == cp_model.UNKNOWN
+    assert res["unassigned"] and res["stats"]["unassigned"] == len(res["unassigned"])
+
+def test_interval_warm_start_with_morning_preference():
+    # 오전 보너스 리터럴까지 힌트해야 힌트가 완전하다 — 빠지면 큰 입력에서 해 없이(UNKNOWN) 끝났다
+    courses, rooms, instructors, grid = _large(1000)
+    req = Request(grid=grid, hard=Hard(), soft=Soft(prefer_morning=True), engine="interval", time_limit=5,
+                  workers=1, randomize=False, warm_start=True)
+    res = solve(courses, rooms, instructors, req)
+    assert res["status"] in OK and "fallback" not in res["stats"]
+    assert len(res["assignments"]) == sum(c.sessions_per_week for c in courses)
+    assert res["objective"] <= -1
+
+def test_warm_start_falls_back_to_greedy():
+    # CP-SAT 가 시간 안에 해를 못 내도 그리디가 다 넣었으면 빈 시간표 대신 그 결과
+    courses, rooms, instructors, grid = _large(600)
+    req = Request(grid=grid, hard=Hard(), soft=Soft(prefer_morning=True), engine="interval", time_limit=0.001,
+                  workers=1, randomize=False, warm_start=True)
+    res = solve(courses, rooms, instructors, req)
+    assert res["status"] == cp_model.FEASIBLE and res["stats"]["fallback"] == "greedy"
+    assert len(res["assignments"]) == sum(c.sessions_per_week for c in courses)
+
+# ---------- 증분 재배정 ----------
+@pytest.fixture(scope="module")
+def base():
+    res = solve(COURSES, ROOMS, INSTRUCTORS, _request("interval"))
+    assert res["status"] in OK
+    return res["assignments"]
+
+@pytest.mark.parametrize("pin", [
+    {"course_id": "nope", "session_index": 0, "day": "MON", "block": 1, "room_id": "R1"},   # 없는 과목
+    {"course_id": "c2", "session_index": 5, "day": "MON", "block": 3, "room_id": "R2"},     # 없는 세션
+    {"course_id": "c3", "session_index": 0, "day": "SUN", "block": 1, "room_id": "R1"},     # 격자 밖 요일
+    {"course_id": "c1", "session_index": 0, "day": "TUE", "block": 1, "room_id": "R1"},     # 정원 부족
+    {"course_id": "c2", "session_index": 0, "day": "MON", "block": 2, "room_id": "R2"},     # 강사 불가 시간
+    {"course_id": "c3", "session_index": 0, "day": "TUE", "block": 4, "room_id": "R1"},     # 하루를 넘김
+    {"course_id": "c5", "session_index": 0, "day": "TUE", "block": 1, "room_id": "R9"},     # 없는 방
+])
+def test_resolve_rejects_bad_pin(base, pin):
+    with pytest.raises(ValueError):
+        resolve(COURSES, ROOMS, INSTRUCTORS, _request("interval", time_limit=2), base, [pin])
+
+@pytest.mark.parametrize("mode", ["fix", "penalize"])
+def test_resolve_keeps_pin_conflict_free(base, mode):
+    pin = {"course_id": "c5", "session_index": 0, "day": "TUE", "block": 5, "room_id": "R1"}
+    res = resolve(COURSES, ROOMS, INSTRUCTORS, _request("interval", time_limit=2), base, [pin], mode=mode)
+    assert res["status"] in OK
+    assert_conflict_free(res["assignments"])
+    moved = [a for a in res["assignments"] if (a["course_id"], a["session_index"]) == ("c5", 0)]
+    assert [(a["day"], a["block"], a["room_id"]) for a in moved] == [("TUE", 5, "R1")]
+
+def test_delta_endpoint_rejects_bad_pin(client):
+    sid = client.post("/schedule", json={}).json()["schedule_id"]
+    r = client.post(f"/schedule/{sid}/delta", json={"moves": [{"course_id": "nope", "day": "MON", "block": 1}]})
+    assert r.status_code == 400, r.text
+    assert client.post("/schedule/missing/delta", json={}).status_code == 404